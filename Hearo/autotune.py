@@ -0,0 +1,167 @@
+"""
+Đo RTF/độ trễ của các cấu hình Whisper trên máy hiện tại và ghi cấu hình tốt nhất
+vẫn nằm trong ngân sách độ trễ vào config.ini.
+
+    python -m Hearo.autotune [--clip meeting.wav] [--latency-budget 3.5] [--dry-run]
+                             [--language-overhead]
+"""
+import argparse
+import itertools
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from .config.app_config import AppConfig
+from .core.mel_frontend import StreamingMelFrontend
+from .core.whisper_backend import MODEL_LADDER, WhisperBackend
+
+DEFAULT_MODELS = "tiny,base,small"
+DEFAULT_COMPUTE_TYPES = "int8,int8_float32,float32"
+DEFAULT_BEAMS = "1,5"
+
+def _csv(value: str) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+def _default_threads() -> str:
+    cores = os.cpu_count() or 4
+    return ",".join(str(t) for t in sorted({1, 2, 4, cores}) if t <= cores)
+
+def synthetic_clip(seconds: float, samplerate: int = 16000, seed: int = 0) -> np.ndarray:
+    """Tín hiệu giống giọng nói: hài âm có cao độ trôi, điều biên theo nhịp âm tiết, thêm nhiễu."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4.0 * t), 0, None) * (rng.random(len(t)) > 0.0005)
+    audio = 0.08 * voice * syllables + 0.005 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+def load_clip(path: Optional[str], seconds: float, samplerate: int) -> np.ndarray:
+    if not path:
+        return synthetic_clip(seconds, samplerate)
+    from faster_whisper import decode_audio
+    return decode_audio(path, sampling_rate=samplerate)[:int(seconds * samplerate)]
+
+def benchmark(backend: WhisperBackend, audio: np.ndarray, window_seconds: float, beam_size: int,
+              detect_every_window: bool = False):
+    """
+    Chạy đúng đường xử lý của engine (frontend -> encode -> decode) trên các cửa sổ overlap 50%.
+    Mặc định ngôn ngữ dò 1 lần rồi giữ (như khi LanguageTracker đã chốt); detect_every_window
+    dò lại ở mọi cửa sổ để đo phần tiết kiệm được khi chốt ngôn ngữ.
+    """
+    clip_seconds = len(audio) / backend.feature_extractor.sampling_rate
+    frontend = StreamingMelFrontend(backend.feature_extractor, capacity_seconds=clip_seconds + 1)
+    frontend.push(audio)
+    window_frames = frontend.frames_for(window_seconds)
+    hop_frames = window_frames // 2
+    starts = list(range(0, frontend.total_frames - window_frames + 1, hop_frames))
+    if not starts:
+        raise ValueError("Clip ngắn hơn 1 cửa sổ")
+
+    language = None
+    latencies = []
+    # Cửa sổ đầu làm warm-up, không tính
+    for i, start in enumerate(starts):
+        began = time.perf_counter()
+        encoder_output = backend.encode(frontend.window(start, window_frames))
+        if language is None or detect_every_window:
+            language, _ = backend.detect_language(encoder_output)
+        backend.decode(encoder_output, language=language, beam_size=beam_size)
+        if i > 0 or len(starts) == 1:
+            latencies.append(time.perf_counter() - began)
+
+    hop_seconds = hop_frames * frontend.hop_length / frontend.sampling_rate
+    return {
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_max": float(np.max(latencies)),
+        # Mỗi hop phải xử lý xong 1 cửa sổ -> RTF hiệu dụng = độ trễ / hop
+        "rtf": float(np.mean(latencies)) / hop_seconds,
+    }
+
+def choose(results: List[dict], latency_budget: float) -> Optional[dict]:
+    """Model lớn nhất rồi beam lớn nhất còn giữ được thời gian thực; cùng chất lượng thì lấy cấu hình nhanh nhất."""
+    ok = [r for r in results if r["rtf"] < 1.0 and r["latency_max"] <= latency_budget]
+    if not ok:
+        return None
+    def rank(r):
+        size = MODEL_LADDER.index(r["model_size"]) if r["model_size"] in MODEL_LADDER else -1
+        return (-size, -r["beam_size"], r["latency_p50"])
+    return sorted(ok, key=rank)[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hearo hardware autotuner")
+    parser.add_argument("--config", default="config.ini")
+    parser.add_argument("--clip", help="File âm thanh dùng để đo (mặc định: clip tổng hợp)")
+    parser.add_argument("--seconds", type=float, default=40.0, help="Độ dài âm thanh dùng để đo")
+    parser.add_argument("--device", help="Mặc định lấy từ config (cuda tự lùi về cpu)")
+    parser.add_argument("--models", default=DEFAULT_MODELS)
+    parser.add_argument("--compute-types", default=DEFAULT_COMPUTE_TYPES)
+    parser.add_argument("--beams", default=DEFAULT_BEAMS)
+    parser.add_argument("--threads", default=_default_threads())
+    parser.add_argument("--latency-budget", type=float,
+                        help="Độ trễ tối đa mỗi cửa sổ (giây), mặc định 70%% thời lượng 1 hop")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ in kết quả, không ghi config")
+    parser.add_argument("--language-overhead", action="store_true",
+                        help="Đo thêm RTF khi dò ngôn ngữ ở mọi cửa sổ (language để trống) so với đã chốt")
+    args = parser.parse_args(argv)
+
+    config = AppConfig(args.config)
+    window_seconds = config.audio.record_seconds
+    latency_budget = args.latency_budget or 0.7 * window_seconds / 2
+
+    device = (args.device or config.whisper.device).lower()
+    if device == "cuda" and not torch.cuda.is_available():
+        print("CUDA không khả dụng, đo trên CPU.")
+        device = "cpu"
+    threads = [int(t) for t in _csv(args.threads)] if device == "cpu" else [0]
+
+    audio = load_clip(args.clip, max(args.seconds, 2 * window_seconds), config.audio.samplerate)
+    print(f"Autotune: {len(audio) / config.audio.samplerate:.0f}s âm thanh, cửa sổ {window_seconds}s, "
+          f"ngân sách độ trễ {latency_budget:.2f}s trên {device.upper()}")
+
+    results = []
+    for model_size, compute_type, cpu_threads in itertools.product(
+            _csv(args.models), _csv(args.compute_types), threads):
+        try:
+            backend = WhisperBackend(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+        except Exception as e:
+            print(f"  bỏ qua {model_size}/{compute_type}/{cpu_threads} threads: {e}")
+            continue
+        for beam_size in (int(b) for b in _csv(args.beams)):
+            stats = benchmark(backend, audio, window_seconds, beam_size)
+            row = {"model_size": model_size, "compute_type": compute_type,
+                   "cpu_threads": cpu_threads, "beam_size": beam_size, **stats}
+            results.append(row)
+            print(f"  {model_size:>8} {compute_type:>13} threads={cpu_threads:<2} beam={beam_size} | "
+                  f"RTF {row['rtf']:.3f} | p50 {row['latency_p50']:.2f}s | max {row['latency_max']:.2f}s")
+            if args.language_overhead:
+                auto = benchmark(backend, audio, window_seconds, beam_size, detect_every_window=True)
+                print(f"  {'':>8} {'':>13} dò ngôn ngữ mỗi cửa sổ: RTF {auto['rtf']:.3f} "
+                      f"(chốt ngôn ngữ nhanh hơn {(1 - row['rtf'] / auto['rtf']) * 100:.1f}%)")
+        del backend
+
+    best = choose(results, latency_budget)
+    if best is None:
+        print("Không cấu hình nào giữ được thời gian thực trong ngân sách độ trễ; giữ nguyên config.")
+        return 1
+
+    print(f"Chọn: {best['model_size']} / {best['compute_type']} / beam {best['beam_size']} / "
+          f"{best['cpu_threads']} threads (RTF {best['rtf']:.3f})")
+    if args.dry_run:
+        return 0
+
+    config.whisper.device = device
+    config.whisper.model_size = best["model_size"]
+    config.whisper.compute_type = best["compute_type"]
+    config.whisper.beam_size = best["beam_size"]
+    config.whisper.cpu_threads = best["cpu_threads"]
+    config.save_config()
+    print(f"Đã ghi vào {args.config}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
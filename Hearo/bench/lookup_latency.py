@@ -0,0 +1,137 @@
+"""
+Đo độ trễ click -> render của lookup keyword trên mock_upstream: thời gian tới section đầu
+tiên, tới định nghĩa và tới khi xong (p50/p95/p99), cùng số request mỗi upstream cho 1 lookup.
+Không dùng cache đĩa hay kho offline; mỗi lookup là 1 keyword mới.
+
+    python -m Hearo.bench.lookup_latency [--lookups 200] [--concurrency 1] [--warmup 40]
+                                         [--latency-scale 1.0] [--error-rate 0.0] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from dataclasses import replace
+from typing import Dict, List
+
+import numpy as np
+
+from ..core import search_engine
+from .mock_upstream import MockUpstream
+
+PERCENTILES = (50, 95, 99)
+
+async def _lookup(keyword: str) -> Dict[str, float]:
+    started = time.perf_counter()
+    marks: Dict[str, float] = {}
+    async for section, _ in search_engine.aiter_keyword_info(keyword):
+        elapsed = (time.perf_counter() - started) * 1000
+        marks.setdefault("first_section", elapsed)
+        if section == "definition":
+            marks["definition"] = elapsed
+        if section == "done":
+            marks["done"] = elapsed
+            marks.setdefault("definition", elapsed)
+    return marks
+
+async def _run_lookups(keywords: List[str], concurrency: int) -> List[Dict[str, float]]:
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(kw):
+        async with sem:
+            return await _lookup(kw)
+    return await asyncio.gather(*(one(kw) for kw in keywords))
+
+def _summary(samples: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for metric in ("first_section", "definition", "done"):
+        values = [s[metric] for s in samples if metric in s]
+        out[metric] = {f"p{q}": round(float(np.percentile(values, q)), 1) for q in PERCENTILES}
+    return out
+
+# Global của search_engine bị thay trong lúc đo, trả lại như cũ khi xong
+_ISOLATED_GLOBALS = ("PAYLOAD_CACHE_PATH", "_payload_cache", "LOCAL_KB_PATH", "_local_kb",
+                     "SOURCE_STATS_PATH", "ADAPTIVE_SOURCES", "_ranking")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keyword lookup latency benchmark trên mock upstream")
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=40, help="Lookup chạy trước, không tính (làm nóng pool, thống kê nguồn)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Nhân độ trễ của mọi upstream")
+    parser.add_argument("--error-rate", type=float, default=None, help="Ghi đè tỉ lệ lỗi 503 của mọi upstream")
+    parser.add_argument("--static-sources", action="store_true", help="Tắt xếp hạng nguồn định nghĩa (gọi cả 4)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    mock = MockUpstream(seed=args.seed)
+    for name, p in mock.profiles.items():
+        mock.profiles[name] = replace(
+            p, latency_ms=p.latency_ms * args.latency_scale, tail_ms=p.tail_ms * args.latency_scale,
+            error_rate=p.error_rate if args.error_rate is None else args.error_rate)
+
+    # Chỉ đo đường mạng: không cache đĩa, không kho offline, thống kê nguồn riêng cho lần chạy
+    saved = {name: getattr(search_engine, name) for name in _ISOLATED_GLOBALS}
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            search_engine.PAYLOAD_CACHE_PATH = ""
+            search_engine._payload_cache = None
+            search_engine.LOCAL_KB_PATH = ""
+            search_engine._local_kb = None
+            search_engine.SOURCE_STATS_PATH = os.path.join(folder, "source_stats.json")
+            search_engine.ADAPTIVE_SOURCES = not args.static_sources
+            search_engine._ranking = None
+
+            async def run():
+                await mock.start()
+                previous = search_engine.override_endpoints(**mock.endpoints())
+                try:
+                    await _run_lookups([f"warmup term {i}" for i in range(args.warmup)], args.concurrency)
+                    mock.reset()
+                    started = time.perf_counter()
+                    samples = await _run_lookups([f"bench term {i}" for i in range(args.lookups)], args.concurrency)
+                    wall = time.perf_counter() - started
+                finally:
+                    search_engine.override_endpoints(**previous)
+                    await mock.stop()
+                return samples, wall
+
+            try:
+                # Chạy trên loop nền của search_engine để dùng session pool như app
+                samples, wall = search_engine._runner.run(run())
+            finally:
+                # Ghi thống kê khi thư mục tạm còn: hook atexit không được tạo lại nó sau khi đã xoá
+                if search_engine._ranking is not None:
+                    search_engine._ranking.save()
+                search_engine._ranking = None
+    finally:
+        for name, value in saved.items():
+            setattr(search_engine, name, value)
+
+    report = {
+        "lookups": args.lookups,
+        "concurrency": args.concurrency,
+        "adaptive_sources": not args.static_sources,
+        "latency_ms": _summary(samples),
+        "requests_per_lookup": round(sum(mock.requests.values()) / max(1, args.lookups), 2),
+        "requests_by_upstream": {k: round(v / max(1, args.lookups), 2) for k, v in sorted(mock.requests.items())},
+        "upstream_errors": dict(mock.errors),
+        "lookups_per_second": round(args.lookups / wall, 1),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.lookups} lookups (concurrency {args.concurrency}, "
+          f"{'xếp hạng nguồn' if report['adaptive_sources'] else 'gọi cả 4 nguồn'}), {report['lookups_per_second']} lookup/s")
+    for metric, values in report["latency_ms"].items():
+        print(f"  {metric:<14} " + " | ".join(f"{k} {v:7.1f} ms" for k, v in values.items()))
+    print(f"  requests/lookup {report['requests_per_lookup']}: "
+          + ", ".join(f"{k} {v}" for k, v in report["requests_by_upstream"].items()))
+    if mock.errors:
+        print(f"  lỗi upstream: {dict(mock.errors)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Server aiohttp giả lập các upstream của search_engine (Wikipedia summary/search/pageimages/
+api.php, Commons, Wikidata, DDG, Wiktionary, Openverse, Google News RSS) để đo lookup không
+cần internet. Mỗi upstream chạy trên 1 cổng riêng nên breaker và giới hạn kết nối theo host
+vẫn đúng như thật; độ trễ, tỉ lệ lỗi, tỉ lệ có kết quả và kích thước payload chỉnh theo
+UpstreamProfile.
+
+    async with MockUpstream() as mock:
+        previous = search_engine.override_endpoints(**mock.endpoints())
+
+    python -m Hearo.bench.mock_upstream [--port 8900]   # chạy riêng, in các endpoint
+"""
+import argparse
+import asyncio
+import html
+import random
+import zlib
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+from aiohttp import web
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 100.0  # trung vị, phân phối lognormal
+    jitter: float = 0.5  # sigma của lognormal; 0 = độ trễ cố định
+    tail_rate: float = 0.02  # tỉ lệ request rơi vào đuôi chậm
+    tail_ms: float = 1500.0
+    error_rate: float = 0.0  # trả 503
+    hit_rate: float = 0.8  # tỉ lệ keyword có kết quả (cố định theo keyword, không ngẫu nhiên mỗi lần)
+    payload_bytes: int = 1024  # độ dài đoạn text chính
+    items: int = 10  # số ảnh / bài news mỗi response
+
+# Gần với hành vi đo được của các API thật
+DEFAULT_PROFILES: Dict[str, UpstreamProfile] = {
+    "wikipedia": UpstreamProfile(latency_ms=120, hit_rate=0.7),
+    "commons": UpstreamProfile(latency_ms=300, hit_rate=0.8),
+    "wikidata": UpstreamProfile(latency_ms=150, hit_rate=0.8, payload_bytes=120),
+    "ddg": UpstreamProfile(latency_ms=250, hit_rate=0.35),
+    "wiktionary": UpstreamProfile(latency_ms=180, hit_rate=0.4, payload_bytes=300),
+    "openverse": UpstreamProfile(latency_ms=400, error_rate=0.05, hit_rate=0.9),
+    "news": UpstreamProfile(latency_ms=350, hit_rate=0.9, payload_bytes=200, items=100),
+}
+
+class MockUpstream:
+    def __init__(self, profiles: Optional[Dict[str, UpstreamProfile]] = None, seed: int = 0):
+        self.profiles = {name: replace(p) for name, p in DEFAULT_PROFILES.items()}
+        self.profiles.update(profiles or {})
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._runners = []
+        self._bases: Dict[str, str] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """port=0: mỗi upstream 1 cổng ngẫu nhiên; khác 0: các cổng liên tiếp từ `port`."""
+        routes = {
+            "wikipedia": [
+                ("/api/rest_v1/page/summary/{title}", self._wiki_summary),
+                ("/w/rest.php/v1/search/page", self._wiki_search),
+                ("/w/api.php", self._wiki_api),
+            ],
+            "commons": [("/w/api.php", self._commons)],
+            "wikidata": [("/w/api.php", self._wikidata)],
+            "ddg": [("/", self._ddg)],
+            "wiktionary": [("/api/rest_v1/page/definition/{term}", self._wiktionary)],
+            "openverse": [("/v1/images", self._openverse)],
+            "news": [("/rss/search", self._news)],
+        }
+        for i, (name, handlers) in enumerate(routes.items()):
+            app = web.Application()
+            for path, handler in handlers:
+                app.router.add_get(path, self._wrap(name, handler))
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, host, port + i if port else 0)
+            await site.start()
+            self._runners.append(runner)
+            self._bases[name] = f"http://{host}:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+    def reset(self):
+        self.requests.clear()
+        self.errors.clear()
+
+    def endpoints(self) -> Dict[str, str]:
+        """Giá trị cho search_engine.override_endpoints; các placeholder giữ như URL thật."""
+        b = self._bases
+        return {
+            "WIKI_SUMMARY": b["wikipedia"] + "/api/rest_v1/page/summary/{title}",
+            "WIKI_SEARCH": b["wikipedia"] + "/w/rest.php/v1/search/page?q={q}&limit=1",
+            "WIKI_PAGEIMAGES": b["wikipedia"] + "/w/api.php?action=query&format=json&prop=pageimages&titles={title}&pithumbsize=600",
+            "WIKI_API": b["wikipedia"] + "/w/api.php",
+            "COMMONS_MEDIASEARCH": b["commons"] + "/w/api.php?action=query&format=json&generator=search&gsrlimit={n}&gsrsearch={q}&prop=imageinfo",
+            "WIKIDATA_SEARCH": b["wikidata"] + "/w/api.php?action=wbsearchentities&format=json&language={lang}&search={q}&limit=1",
+            "DDG_IA": b["ddg"] + "/?q={q}&format=json",
+            "WIKT_DEF": b["wiktionary"] + "/api/rest_v1/page/definition/{term}",
+            "OPENVERSE_ENDPOINT": b["openverse"] + "/v1/images",
+            "GOOGLE_NEWS_RSS": b["news"] + "/rss/search?q={q}&hl={hl}&gl={gl}&ceid={ceid}",
+        }
+
+    def _wrap(self, name: str, handler):
+        profile = self.profiles[name]
+
+        async def wrapped(request):
+            self.requests[name] += 1
+            delay = profile.latency_ms / 1000
+            if profile.jitter:
+                delay *= self._rng.lognormvariate(0, profile.jitter)
+            if self._rng.random() < profile.tail_rate:
+                delay += profile.tail_ms / 1000
+            await asyncio.sleep(delay)
+            if self._rng.random() < profile.error_rate:
+                self.errors[name] += 1
+                return web.Response(status=503)
+            return await handler(request, profile)
+        return wrapped
+
+    @staticmethod
+    def _hit(name: str, keyword: str, profile: UpstreamProfile) -> bool:
+        h = zlib.crc32(f"{name}:{keyword.strip().lower()}".encode("utf-8"))
+        return h / 0xFFFFFFFF < profile.hit_rate
+
+    @staticmethod
+    def _text(keyword: str, size: int) -> str:
+        base = f"{keyword} is a term used in this benchmark. "
+        return (base * (size // len(base) + 1))[:size]
+
+    def _image(self, name: str, keyword: str, i: int) -> str:
+        return f"{self._bases[name]}/img/{zlib.crc32(keyword.encode('utf-8')):08x}-{i}.jpg"
+
+    # --- Wikipedia ---
+    async def _wiki_summary(self, request, profile):
+        title = request.match_info["title"].replace("_", " ")
+        if not self._hit("wikipedia", title, profile):
+            return web.json_response({"type": "not_found", "title": "Not found."}, status=404)
+        return web.json_response({
+            "title": title.title(),
+            "extract": self._text(title, profile.payload_bytes),
+            "content_urls": {"desktop": {"page": f"{self._bases['wikipedia']}/wiki/{title.replace(' ', '_')}"}},
+            "thumbnail": {"source": self._image("wikipedia", title, 0)},
+        })
+
+    async def _wiki_search(self, request, profile):
+        q = request.query.get("q", "")
+        # Search vẫn tìm được trang cho 1 phần keyword mà summary trực tiếp trượt
+        if not self._hit("wikipedia-search", q, profile):
+            return web.json_response({"pages": []})
+        return web.json_response({"pages": [{"title": q.title(), "key": q.title().replace(" ", "_")}]})
+
+    async def _wiki_api(self, request, profile):
+        titles = [t for t in request.query.get("titles", "").split("|") if t]
+        if "extracts" in request.query.get("prop", ""):
+            pages = []
+            for t in titles:
+                if self._hit("wikipedia", t, profile):
+                    pages.append({"title": t, "extract": self._text(t, profile.payload_bytes),
+                                  "fullurl": f"{self._bases['wikipedia']}/wiki/{t.replace(' ', '_')}",
+                                  "thumbnail": {"source": self._image("wikipedia", t, 0)}})
+                else:
+                    pages.append({"title": t, "missing": True})
+            return web.json_response({"batchcomplete": True, "query": {"pages": pages}})
+        pages = {}
+        for i, t in enumerate(titles):
+            page = {"title": t}
+            if self._hit("wikipedia", t, profile):
+                page["thumbnail"] = {"source": self._image("wikipedia", t, 0)}
+            pages[str(i + 1)] = page
+        return web.json_response({"query": {"pages": pages}})
+
+    async def _commons(self, request, profile):
+        q = request.query.get("gsrsearch", "")
+        if not self._hit("commons", q, profile):
+            return web.json_response({"batchcomplete": ""})
+        n = min(int(request.query.get("gsrlimit", profile.items)), profile.items)
+        pages = {str(i): {"title": f"File:{q} {i}.jpg",
+                          "imageinfo": [{"thumburl": self._image("commons", q, i), "url": self._image("commons", q, i)}]}
+                 for i in range(n)}
+        return web.json_response({"query": {"pages": pages}})
+
+    # --- Nguồn định nghĩa khác ---
+    async def _wikidata(self, request, profile):
+        q = request.query.get("search", "")
+        if not self._hit("wikidata", q, profile):
+            return web.json_response({"search": []})
+        return web.json_response({"search": [{"id": f"Q{zlib.crc32(q.encode('utf-8')) % 10**6}", "label": q,
+                                              "description": self._text(q, profile.payload_bytes)}]})
+
+    async def _ddg(self, request, profile):
+        q = request.query.get("q", "")
+        if not self._hit("ddg", q, profile):
+            return web.json_response({"Heading": "", "AbstractText": "", "AbstractURL": "", "Image": ""})
+        return web.json_response({"Heading": q, "AbstractText": self._text(q, profile.payload_bytes),
+                                  "AbstractURL": f"{self._bases['ddg']}/{q}", "Image": ""})
+
+    async def _wiktionary(self, request, profile):
+        term = request.match_info["term"]
+        if not self._hit("wiktionary", term, profile):
+            return web.json_response({"title": "Not found."}, status=404)
+        return web.json_response({"en": [{"partOfSpeech": "Noun", "definitions": [
+            {"definition": self._text(term, profile.payload_bytes)}]}]})
+
+    # --- Ảnh và news ---
+    async def _openverse(self, request, profile):
+        q = (request.query.get("q") or request.query.get("title") or "").strip('"')
+        if not self._hit("openverse", q, profile):
+            return web.json_response({"result_count": 0, "results": []})
+        n = min(int(request.query.get("page_size", profile.items)), profile.items)
+        return web.json_response({"result_count": n, "results": [
+            {"title": f"{q} {i}", "url": self._image("openverse", q, i), "thumbnail": self._image("openverse", q, i),
+             "source": "flickr"} for i in range(n)]})
+
+    async def _news(self, request, profile):
+        q = request.query.get("q", "").split(" when:")[0].strip('"')
+        etag = f'"{zlib.crc32(q.encode("utf-8")):08x}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        n = profile.items if self._hit("news", q, profile) else 0
+        items = "".join(
+            f"<item><title>{html.escape(q)} news {i}</title><link>{self._bases['news']}/a/{i}</link>"
+            f"<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate><description>{html.escape(self._text(q, profile.payload_bytes))}</description>"
+            f"<source url=\"{self._bases['news']}\">Mock</source></item>"
+            for i in range(n)
+        )
+        body = f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><rss version=\"2.0\"><channel><title>{html.escape(q)}</title>{items}</channel></rss>"
+        return web.Response(text=body, content_type="application/rss+xml", headers={"ETag": etag})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock upstream cho search_engine")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900, help="Cổng đầu tiên; mỗi upstream dùng 1 cổng tiếp theo")
+    args = parser.parse_args(argv)
+
+    async def run():
+        mock = MockUpstream()
+        await mock.start(args.host, args.port)
+        try:
+            for name, url in mock.endpoints().items():
+                print(f"{name}={url}")
+            await asyncio.Event().wait()
+        finally:
+            await mock.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+So sánh độ trễ 1 lần click keyword: session mới mỗi lần (cách cũ) và session pool dùng chung
+của _AsyncLoopRunner, trên 1 server mock HTTPS chạy local.
+
+    python -m Hearo.bench.pooled_session [--clicks 50] [--latency-ms 20] [--no-tls]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import time
+from typing import Optional
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from ..core import search_engine
+
+def _self_signed_context(folder: str) -> Optional[ssl.SSLContext]:
+    """Tạo cert tự ký bằng openssl; None nếu máy không có openssl."""
+    if not shutil.which("openssl"):
+        return None
+    cert, key = os.path.join(folder, "cert.pem"), os.path.join(folder, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(cert, key)
+    return ctx
+
+async def _start_server(latency_ms: float, server_ssl: Optional[ssl.SSLContext]):
+    async def handler(request):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return web.json_response({"title": request.path, "extract": "x" * 512})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server_ssl)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, port
+
+async def _click(session: aiohttp.ClientSession, base: str, client_ssl):
+    """Giống hình dạng fan-out của fetch_keyword_info: 4 nguồn định nghĩa song song rồi 3 call nối tiếp."""
+    async def get(path):
+        async with session.get(base + path, ssl=client_ssl) as r:
+            await r.read()
+    await asyncio.gather(*(get(f"/definition/{i}") for i in range(4)))
+    for path in ("/pageimages", "/openverse", "/news"):
+        await get(path)
+
+async def _measure(clicks: int, base: str, client_ssl, pooled: bool):
+    latencies = []
+    for _ in range(clicks):
+        started = time.perf_counter()
+        if pooled:
+            await _click(await search_engine._runner.get_session(), base, client_ssl)
+        else:
+            async with aiohttp.ClientSession() as session:
+                await _click(session, base, client_ssl)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def _report(name, latencies):
+    print(f"{name:<24} mean {np.mean(latencies):7.1f} ms | p50 {np.percentile(latencies, 50):7.1f} ms | "
+          f"p95 {np.percentile(latencies, 95):7.1f} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pooled session click-latency benchmark")
+    parser.add_argument("--clicks", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Độ trễ xử lý giả lập của server")
+    parser.add_argument("--no-tls", action="store_true")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as folder:
+        server_ssl = None if args.no_tls else _self_signed_context(folder)
+        client_ssl = False
+        if server_ssl is not None:
+            client_ssl = ssl.create_default_context(cafile=os.path.join(folder, "cert.pem"))
+
+        async def run():
+            runner, port = await _start_server(args.latency_ms, server_ssl)
+            base = f"{'https' if server_ssl else 'http'}://127.0.0.1:{port}"
+            try:
+                fresh = await _measure(args.clicks, base, client_ssl, pooled=False)
+                pooled = await _measure(args.clicks, base, client_ssl, pooled=True)
+            finally:
+                await runner.cleanup()
+            return base, fresh, pooled
+
+        # Chạy trên đúng loop nền của search_engine để dùng session pool thật
+        base, fresh, pooled = search_engine._runner.run(run())
+
+    print(f"{args.clicks} clicks x 7 requests -> {base} (server latency {args.latency_ms:.0f} ms)")
+    _report("session mới mỗi click", fresh)
+    _report("session pool dùng chung", pooled)
+
+if __name__ == "__main__":
+    main()
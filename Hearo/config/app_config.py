@@ -17,8 +17,14 @@ class WhisperConfig:
     device: str = "cuda"
     compute_type: str = "float16"
     beam_size: int = 5
+    cpu_threads: int = 0
+    adaptive_quality: bool = True
     vad_filter: bool = True
-    task: str = "transcribe"
+    task: str = "transcribe"  # transcribe | translate | both (1 lần encode, 2 lượt decode)
+    language: str = ""
+    language_recheck_interval: int = 30
+    refine_model_size: str = ""  # rỗng = tắt tầng refine nền
+    refine_compute_type: str = "int8"
 
 @dataclass
 class TextProcessorConfig:
@@ -27,7 +33,34 @@ class TextProcessorConfig:
     max_buffer_size: int = 50
     max_keywords: int = 8
     min_word_length: int = 3
+    keyword_glossary: str = ""  # file thuật ngữ (mỗi dòng 1 cụm) luôn được nhận là keyword
+    transcript_dir: str = ""  # rỗng = không lưu transcript (.txt + Doc đã parse .spacy) khi dừng
     
+@dataclass
+class SearchConfig:
+    cache_path: str = ""  # rỗng = ~/.hearo/keyword_cache.sqlite3
+    definition_ttl: int = 7 * 24 * 3600
+    images_ttl: int = 7 * 24 * 3600
+    news_ttl: int = 1800
+    prewarm_connections: bool = True
+    prefetch: bool = True  # lấy trước thông tin keyword ở nền khi keyword xuất hiện
+    prefetch_concurrency: int = 2
+    prefetch_rate_per_host: float = 2.0  # request/giây mỗi host
+    prefetch_slow_seconds: float = 5.0  # độ trễ trung bình vượt ngưỡng này thì tạm dừng prefetch
+    news_refresh_seconds: float = 120.0  # chu kỳ làm mới news đã hết hạn của keyword đang hiển thị, 0 = tắt
+    lookup_deadline: float = 8.0  # thời gian tối đa cho 1 lookup keyword (giây)
+    hedge_delay: float = 1.0  # gửi request dự phòng cho nguồn định nghĩa sau N giây, 0 = tắt
+    breaker_failures: int = 3  # số lỗi liên tiếp trước khi tạm bỏ qua 1 host
+    breaker_cooldown: float = 60.0
+    cache_thumbnails: bool = True  # ảnh trong panel đi qua cache đĩa thay vì tải lại mỗi lần
+    thumbnail_cache_path: str = ""  # rỗng = ~/.hearo/thumbnails
+    thumbnail_cache_mb: int = 200
+    local_kb_path: str = ""  # rỗng = ~/.hearo/knowledge.sqlite3 (tạo bằng python -m Hearo.core.local_kb import ...)
+    adaptive_sources: bool = True  # gọi nguồn định nghĩa tốt nhất trước thay vì cả 4 cùng lúc
+    source_fallback_delay: float = 0.8  # thời gian tối đa chờ 1 nguồn trước khi gọi nguồn kế tiếp
+    source_stats_path: str = ""  # rỗng = ~/.hearo/source_stats.json
+    info_bundles: str = ""  # các file bundle nạp sẵn lúc khởi động, phân tách bằng dấu phẩy (python -m Hearo.core.info_bundle build ...)
+
 @dataclass
 class UIConfig:
     min_width: int = 400
@@ -57,6 +90,7 @@ class AppConfig:
         self.audio = self._load_audio_config()
         self.whisper = self._load_whisper_config()
         self.text_processor = self._load_text_processor_config()
+        self.search = self._load_search_config()
         self.ui = self._load_ui_config()
     
 
@@ -77,8 +111,14 @@ class AppConfig:
             device=whisper_section.get('device', 'cuda'),
             compute_type=whisper_section.get('compute_type', 'float16'),
             beam_size=whisper_section.getint('beam_size', 5),
+            cpu_threads=whisper_section.getint('cpu_threads', 0),
+            adaptive_quality=whisper_section.getboolean('adaptive_quality', True),
             vad_filter=whisper_section.getboolean('vad_filter', True),
-            task=whisper_section.get('task', 'transcribe')
+            task=whisper_section.get('task', 'transcribe'),
+            language=whisper_section.get('language', ''),
+            language_recheck_interval=whisper_section.getint('language_recheck_interval', 30),
+            refine_model_size=whisper_section.get('refine_model_size', ''),
+            refine_compute_type=whisper_section.get('refine_compute_type', 'int8')
         )
     
     def _load_text_processor_config(self) -> TextProcessorConfig:
@@ -89,10 +129,41 @@ class AppConfig:
                 overlap_threshold=tp_section.getfloat('overlap_threshold', 0.6),
                 max_buffer_size=tp_section.getint('max_buffer_size', 50),
                 max_keywords=tp_section.getint('max_keywords', 8),
-                min_word_length=tp_section.getint('min_word_length', 3)
+                min_word_length=tp_section.getint('min_word_length', 3),
+                keyword_glossary=tp_section.get('keyword_glossary', ''),
+                transcript_dir=tp_section.get('transcript_dir', '')
             )
         return TextProcessorConfig()
     
+    def _load_search_config(self) -> SearchConfig:
+        if 'Search' in self.config:
+            search_section = self.config['Search']
+            return SearchConfig(
+                cache_path=search_section.get('cache_path', ''),
+                definition_ttl=search_section.getint('definition_ttl', 7 * 24 * 3600),
+                images_ttl=search_section.getint('images_ttl', 7 * 24 * 3600),
+                news_ttl=search_section.getint('news_ttl', 1800),
+                prewarm_connections=search_section.getboolean('prewarm_connections', True),
+                prefetch=search_section.getboolean('prefetch', True),
+                prefetch_concurrency=search_section.getint('prefetch_concurrency', 2),
+                prefetch_rate_per_host=search_section.getfloat('prefetch_rate_per_host', 2.0),
+                prefetch_slow_seconds=search_section.getfloat('prefetch_slow_seconds', 5.0),
+                news_refresh_seconds=search_section.getfloat('news_refresh_seconds', 120.0),
+                lookup_deadline=search_section.getfloat('lookup_deadline', 8.0),
+                hedge_delay=search_section.getfloat('hedge_delay', 1.0),
+                breaker_failures=search_section.getint('breaker_failures', 3),
+                breaker_cooldown=search_section.getfloat('breaker_cooldown', 60.0),
+                cache_thumbnails=search_section.getboolean('cache_thumbnails', True),
+                thumbnail_cache_path=search_section.get('thumbnail_cache_path', ''),
+                thumbnail_cache_mb=search_section.getint('thumbnail_cache_mb', 200),
+                local_kb_path=search_section.get('local_kb_path', ''),
+                adaptive_sources=search_section.getboolean('adaptive_sources', True),
+                source_fallback_delay=search_section.getfloat('source_fallback_delay', 0.8),
+                source_stats_path=search_section.get('source_stats_path', ''),
+                info_bundles=search_section.get('info_bundles', '')
+            )
+        return SearchConfig()
+    
     def _load_ui_config(self) -> UIConfig:
         if 'UI' in self.config:
             ui_section = self.config['UI']
@@ -122,12 +193,25 @@ class AppConfig:
         
         config['Whisper'] = {
             'model_size': 'base', 'device': 'cuda', 'compute_type': 'float16',
-            'beam_size': '5', 'vad_filter': 'True', 'task': 'transcribe'
+            'beam_size': '5', 'cpu_threads': '0', 'adaptive_quality': 'True', 'vad_filter': 'True', 'task': 'transcribe',
+            'language': '', 'language_recheck_interval': '30',
+            'refine_model_size': '', 'refine_compute_type': 'int8'
         }
         
         config['TextProcessor'] = {
             'similarity_threshold': '0.7', 'overlap_threshold': '0.6',
-            'max_buffer_size': '50', 'max_keywords': '8', 'min_word_length': '3'
+            'max_buffer_size': '50', 'max_keywords': '8', 'min_word_length': '3',
+            'keyword_glossary': '', 'transcript_dir': ''
+        }
+
+        config['Search'] = {
+            'cache_path': '', 'definition_ttl': '604800', 'images_ttl': '604800', 'news_ttl': '1800',
+            'prewarm_connections': 'True', 'prefetch': 'True', 'prefetch_concurrency': '2',
+            'prefetch_rate_per_host': '2.0', 'prefetch_slow_seconds': '5.0', 'news_refresh_seconds': '120.0',
+            'lookup_deadline': '8.0', 'hedge_delay': '1.0', 'breaker_failures': '3', 'breaker_cooldown': '60.0',
+            'cache_thumbnails': 'True', 'thumbnail_cache_path': '', 'thumbnail_cache_mb': '200',
+            'local_kb_path': '', 'adaptive_sources': 'True', 'source_fallback_delay': '0.8',
+            'source_stats_path': '', 'info_bundles': ''
         }
 
         config['UI'] = {
@@ -145,6 +229,7 @@ class AppConfig:
         self.config['Audio'] = {str(k): str(v) for k, v in self.audio.__dict__.items()}
         self.config['Whisper'] = {str(k): str(v) for k, v in self.whisper.__dict__.items()}
         self.config['TextProcessor'] = {str(k): str(v) for k, v in self.text_processor.__dict__.items()}
+        self.config['Search'] = {str(k): str(v) for k, v in self.search.__dict__.items()}
         self.config['UI'] = {str(k): str(v) for k, v in self.ui.__dict__.items()}
         
         with open(self.config_file, 'w', encoding='utf-8') as configfile:
@@ -3,7 +3,9 @@ from collections import Counter
 import spacy
 from threading import Lock
 from .keyword_extractor import KeywordExtractor
-from .search_engine import get_info_for_keyword
+from .search_engine import get_info_for_keyword, astream_info_for_keyword, aget_keyword_digest
+from .info_bundle import read_glossary
+from . import prefetcher
 
 import spacy_stanza, stanza
 stanza.download('vi')
@@ -38,6 +40,21 @@ ke = KeywordExtractor(
 
 _ke_lock = Lock()
 
+def _extract(source, parse, ref, mode: str, top_k: int, order: str) -> list[str]:
+    with _ke_lock:
+        if mode == "new":
+            new_keywords = ke.update(source, return_new_meta=False, parse=parse, ref=ref)
+            if not new_keywords:
+                return []
+            print(f"AI Service: New keywords -> {new_keywords}")
+            prefetcher.get_prefetcher().enqueue(new_keywords)
+            return new_keywords
+        else:
+            ke.update(source, return_new_meta=False, parse=parse, ref=ref)
+            keywords = ke.get_top(top_k, order=order, return_meta=False)
+            print(f"AI Service: Top keywords -> {keywords}")
+            return keywords
+
 def extract_keywords_from_text(
     text: str,
     *,
@@ -47,20 +64,51 @@ def extract_keywords_from_text(
 ) -> list[str]:
     if not text or not text.strip():
         return []
+    return _extract(text, None, None, mode, top_k, order)
 
+def extract_keywords_from_doc(
+    doc,
+    *,
+    parse=None,
+    ref=None,
+    mode: str = "new",
+    top_k: int = 15,
+    order: str = "appearance"
+) -> list[str]:
+    """Như extract_keywords_from_text cho Doc lấy từ DocStore; parse = DocStore.parse, ref = chỉ số câu."""
+    if not doc.text.strip():
+        return []
+    return _extract(doc, parse, ref, mode, top_k, order)
+
+def keyword_occurrences(keyword: str, limit: int = 0):
+    """(tổng số lần, `limit` vị trí gần nhất [(ref, start_char, end_char)]) của keyword trong transcript."""
     with _ke_lock:
-        if mode == "new":
-            new_keywords = ke.update(text, return_new_meta=False)
-            if not new_keywords:
-                return []
-            print(f"AI Service: New keywords -> {new_keywords}")
-            return new_keywords
-        else:
-            ke.update(text, return_new_meta=False)
-            keywords = ke.get_top(top_k, order=order, return_meta=False)
-            print(f"AI Service: Top keywords -> {keywords}")
-            return keywords
+        occ = ke.occurrences_of(keyword)
+        return len(occ), occ[-limit:] if limit else list(occ)
+
+def clear_occurrences():
+    """Transcript mới: id câu bắt đầu lại từ 0, vị trí của phiên trước không còn đúng."""
+    with _ke_lock:
+        ke.clear_occurrences()
+
+def load_glossary(path: str):
+    """Thêm thuật ngữ trong file vào gazetteer của extractor."""
+    try:
+        terms = read_glossary(path)
+    except OSError as e:
+        print(f"AI Service: Không đọc được glossary {path}: {e}")
+        return
+    with _ke_lock:
+        ke.add_glossary(terms)
+    print(f"AI Service: Đã nạp {len(terms)} thuật ngữ glossary từ {path}")
 
 def get_info_for_keyword_ui(keyword: str) -> str:
     print(f"AI Service: Lấy thông tin cho '{keyword}'")
-    return get_info_for_keyword(keyword, lang="en")  
\ No newline at end of file
+    return get_info_for_keyword(keyword, lang="en")  
+
+def set_visible_keywords(keywords: list[str]):
+    """Báo cho prefetcher các keyword đang hiển thị để lấy trước chúng đầu tiên."""
+    prefetcher.get_prefetcher().set_visible(keywords)
+
+def cancel_prefetch():
+    prefetcher.get_prefetcher().cancel()
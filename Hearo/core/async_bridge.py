@@ -0,0 +1,61 @@
+import asyncio
+import inspect
+import traceback
+from PySide6.QtCore import QObject, Signal
+
+from . import search_engine
+
+class AsyncCall(QObject):
+    """
+    Chạy 1 coroutine trên loop nền của search_engine, báo kết quả về thread UI qua signal.
+    Khác Worker: không giữ thread nào trong lúc chờ mạng, và cancel() huỷ luôn task trên loop.
+    Signal giống WorkerSignals để controller nối slot như cũ.
+    """
+    progress = Signal(object)
+    result = Signal(object)
+    error = Signal(tuple)
+    finished = Signal()
+
+    def __init__(self, fn, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = None
+        self.cancelled = False
+        # Hàm nhận progress_callback thì được nối vào signal progress để báo kết quả từng phần
+        if "progress_callback" in inspect.signature(fn).parameters:
+            self.kwargs["progress_callback"] = self._emit_progress
+
+    def start(self):
+        if self.cancelled:
+            self.finished.emit()
+            return self
+        self.future = asyncio.run_coroutine_threadsafe(
+            self.fn(*self.args, **self.kwargs), search_engine._runner.loop)
+        self.future.add_done_callback(self._done)
+        return self
+
+    def cancel(self):
+        """Bỏ kết quả và huỷ coroutine; an toàn khi gọi nhiều lần hoặc sau khi đã xong."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def _emit_progress(self, value):
+        if not self.cancelled:
+            self.progress.emit(value)
+
+    def _done(self, future):
+        # Chạy trên thread loop nền; emit sang QObject ở thread UI là queued connection
+        try:
+            if not (self.cancelled or future.cancelled()):
+                exc = future.exception()
+                if exc is None:
+                    self.result.emit(future.result())
+                else:
+                    print(f"[AsyncCall] {self.fn.__name__} lỗi: {exc}")
+                    tb = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+                    self.error.emit((type(exc), exc, tb))
+        finally:
+            self.finished.emit()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+import os, time
+from typing import Dict, Iterator, List, Tuple
+
+from spacy.tokens import Doc, DocBin
+from spacy.tokenizer import Tokenizer
+
+# Cờ trong Doc.user_data: Doc đã qua cả pipeline (tagger/NER...), không chỉ tokenize
+PARSED = "hearo_parsed"
+SENT_ID = "hearo_sent_id"
+SAID_AT = "hearo_said_at"
+
+class DocStore:
+    """
+    Transcript theo câu (nơi duy nhất giữ text) cùng Doc của từng câu, dùng chung cho mọi consumer
+    (hiển thị, trích keyword, chấm điểm, ngữ cảnh keyword, export) thay vì mỗi nơi tự gọi nlp(text):
+      - get(i): Doc đã tokenize, tạo 1 lần cho mỗi nội dung câu
+      - parse(doc) / parsed(i): chạy pipeline tại chỗ, tối đa 1 lần mỗi câu; consumer chỉ cần
+        token (gazetteer) thì không kích hoạt bước này
+    Câu đổi nội dung (ghép overlap, bản refine) thì Doc cũ bị thay. save()/load() dùng DocBin.
+    """
+    def __init__(self, nlp):
+        self.nlp = nlp
+        # spacy-stanza chạy cả mô hình trong tokenizer: tokenize = parse
+        self._cheap_tokenizer = isinstance(getattr(nlp, "tokenizer", None), Tokenizer)
+        self._texts: List[str] = []
+        self._said_at: List[float] = []
+        self._docs: Dict[int, Doc] = {}
+        self.tokenize_count = 0
+        self.parse_count = 0
+        self.parse_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def set(self, sent_id: int, text: str):
+        """Ghi nội dung câu sent_id (== len(self) để thêm câu mới); Doc chỉ tạo lại khi text đổi."""
+        if sent_id == len(self._texts):
+            self._texts.append(text)
+            self._said_at.append(time.time())
+        elif self._texts[sent_id] != text:
+            self._texts[sent_id] = text
+            self._docs.pop(sent_id, None)
+
+    def text(self, sent_id: int) -> str:
+        return self._texts[sent_id]
+
+    def texts(self, start: int = 0) -> List[str]:
+        """Text các câu từ start (âm = tính từ cuối), vd. texts(-2) cho 2 câu mới nhất."""
+        return self._texts[start:]
+
+    def said_at(self, sent_id: int) -> float:
+        """Thời điểm (epoch) câu bắt đầu xuất hiện trong transcript."""
+        return self._said_at[sent_id]
+
+    def get(self, sent_id: int) -> Doc:
+        doc = self._docs.get(sent_id)
+        if doc is None:
+            if self._cheap_tokenizer:
+                doc = self.nlp.make_doc(self._texts[sent_id])
+                self.tokenize_count += 1
+            else:
+                doc = self._run_pipeline(self._texts[sent_id])
+            doc.user_data[SENT_ID] = sent_id
+            self._docs[sent_id] = doc
+        return doc
+
+    def _run_pipeline(self, text_or_doc) -> Doc:
+        started = time.perf_counter()
+        doc = self.nlp(text_or_doc)
+        self.parse_seconds += time.perf_counter() - started
+        self.parse_count += 1
+        doc.user_data[PARSED] = True
+        return doc
+
+    def parse(self, doc: Doc) -> Doc:
+        """Chạy pipeline cho Doc lấy từ get() (tại chỗ); Doc đã parse thì trả lại ngay."""
+        if doc.user_data.get(PARSED):
+            return doc
+        parsed = self._run_pipeline(doc)
+        sent_id = doc.user_data.get(SENT_ID)
+        if sent_id is not None and self._docs.get(sent_id) is doc:
+            self._docs[sent_id] = parsed
+        return parsed
+
+    def parsed(self, sent_id: int) -> Doc:
+        return self.parse(self.get(sent_id))
+
+    def docs(self, *, parsed: bool = False) -> Iterator[Tuple[int, Doc]]:
+        for i in range(len(self._texts)):
+            yield i, (self.parsed(i) if parsed else self.get(i))
+
+    def full_text(self) -> str:
+        return " ".join(self._texts)
+
+    def stats(self) -> Dict[str, float]:
+        n = len(self._texts)
+        return {
+            "sentences": n,
+            "tokenized": self.tokenize_count,
+            "parsed": self.parse_count,
+            "parse_ms_per_sentence": round(self.parse_seconds * 1000 / n, 2) if n else 0.0,
+        }
+
+    def save(self, path: str):
+        """Ghi mọi câu (Doc đủ annotation nếu đã parse) vào 1 file DocBin, ghi tạm rồi thay."""
+        db = DocBin(store_user_data=True)
+        for i, doc in self.docs():
+            doc.user_data[SAID_AT] = self._said_at[i]
+            db.add(doc)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(db.to_bytes())
+        os.replace(tmp, path)
+
+    def load(self, path: str):
+        """Thay nội dung bằng các câu trong file DocBin; Doc đã parse không phải parse lại."""
+        with open(path, "rb") as f:
+            db = DocBin(store_user_data=True).from_bytes(f.read())
+        self.clear()
+        for i, doc in enumerate(db.get_docs(self.nlp.vocab)):
+            doc.user_data[SENT_ID] = i
+            self._texts.append(doc.text)
+            self._said_at.append(float(doc.user_data.get(SAID_AT, 0.0)))
+            self._docs[i] = doc
+
+    def clear(self):
+        self._texts = []
+        self._said_at = []
+        self._docs = {}
+        self.tokenize_count = 0
+        self.parse_count = 0
+        self.parse_seconds = 0.0
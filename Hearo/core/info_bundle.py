@@ -0,0 +1,174 @@
+"""
+Info bundle cho các buổi họp có sẵn bộ từ vựng (tên sản phẩm, khách hàng, hệ thống nội bộ):
+tra trước mọi thuật ngữ trong glossary, đóng gói định nghĩa, ảnh, thumbnail và news vào 1 file
+JSON nén gzip có version. Lúc chạy, bundle được nạp vào payload cache và thumbnail cache nên
+click vào các thuật ngữ đó trong buổi họp trả kết quả ngay, không cần mạng.
+
+    python -m Hearo.core.info_bundle build glossary.txt -o weekly-sync.hearo.gz --lang en
+    python -m Hearo.core.info_bundle info weekly-sync.hearo.gz
+    python -m Hearo.core.info_bundle load weekly-sync.hearo.gz
+"""
+from __future__ import annotations
+import argparse, asyncio, base64, datetime as dt, gzip, json, os, time
+from typing import Any, Dict, Iterable, List
+
+from . import search_engine
+
+BUNDLE_FORMAT = "hearo-info-bundle"
+BUNDLE_VERSION = 1
+BUILD_CONCURRENCY = 4
+
+def read_glossary(path: str) -> List[str]:
+    """Mỗi dòng 1 thuật ngữ (cột đầu nếu là TSV/CSV); bỏ dòng trống, dòng '#' và thuật ngữ trùng."""
+    terms: List[str] = []
+    seen = set()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "\t" in line:
+                line = line.split("\t")[0]
+            elif path.lower().endswith(".csv"):
+                line = line.split(",")[0]
+            term = line.strip()
+            key = search_engine.lookup_key(term)
+            if key and key not in seen:
+                seen.add(key)
+                terms.append(term)
+    return terms
+
+def _thumbnail_urls(payload: Dict[str, Any], limit: int) -> List[str]:
+    urls = [(payload.get("definition") or {}).get("thumbnail")]
+    urls += [img.get("thumbnail") for img in payload.get("images") or []][:limit]
+    return [u for u in urls if u and u.startswith(("http://", "https://"))]
+
+async def build_bundle(terms: List[str], *, lang: str = search_engine.DEFAULT_LANG, name: str = "",
+                       thumbnails: bool = True, max_thumbnails: int = 6,
+                       concurrency: int = BUILD_CONCURRENCY) -> Dict[str, Any]:
+    """Tra từng thuật ngữ bằng fetch_keyword_info (tối đa `concurrency` cùng lúc) rồi gom thành bundle."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    async def one(term: str) -> Dict[str, Any]:
+        nonlocal done
+        async with sem:
+            payload = await search_engine.fetch_keyword_info(term, lang=lang)
+            images: Dict[str, Dict[str, str]] = {}
+            if thumbnails:
+                for url in _thumbnail_urls(payload, max_thumbnails):
+                    got = await search_engine.fetch_thumbnail(url)
+                    if got is not None:
+                        images[url] = {"content_type": got[1], "data": base64.b64encode(got[0]).decode("ascii")}
+        done += 1
+        found = "ok" if payload.get("definition") or payload.get("images") else "không có kết quả"
+        if (payload.get("meta") or {}).get("incomplete"):
+            found += " (có request lỗi, section rỗng không được nạp)"
+        print(f"[Bundle] {done}/{len(terms)} {term}: {found}, {len(images)} thumbnail")
+        return {"payload": payload, "thumbnails": images}
+
+    results = await asyncio.gather(*(one(t) for t in terms))
+    thumbs: Dict[str, Dict[str, str]] = {}
+    for r in results:
+        thumbs.update(r["thumbnails"])
+    return {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "name": name,
+        "lang": lang,
+        "created_at": time.time(),
+        "terms": terms,
+        "payloads": [r["payload"] for r in results],
+        "thumbnails": thumbs,
+    }
+
+def write_bundle(bundle: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def read_bundle(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        bundle = json.load(f)
+    if bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} không phải info bundle của Hearo")
+    if int(bundle.get("version", 0)) > BUNDLE_VERSION:
+        raise ValueError(f"{path} là bundle version {bundle.get('version')}, bản này chỉ đọc tới {BUNDLE_VERSION}")
+    return bundle
+
+def load_bundle(path: str) -> Dict[str, int]:
+    """
+    Nạp bundle vào payload cache và thumbnail cache. Dữ liệu giữ thời điểm tra gốc: section đã
+    quá TTL (thường là news) vẫn hiện ngay và được làm mới ở nền khi có mạng; entry trong cache
+    mới hơn bundle thì giữ nguyên. Payload tra lúc có request lỗi chỉ nạp các section có dữ liệu.
+    """
+    bundle = read_bundle(path)
+    pc = search_engine.get_payload_cache()
+    tc = search_engine.get_thumbnail_cache()
+    created_at = float(bundle.get("created_at") or time.time())
+    stats = {"payloads": 0, "thumbnails": 0}
+    if pc is not None:
+        for payload in bundle.get("payloads") or []:
+            sections = search_engine._cacheable_sections(payload)
+            if not sections:
+                continue
+            pc.put(payload, sections=sections, fetched_at=created_at)
+            stats["payloads"] += 1
+    if tc is not None:
+        for url, img in (bundle.get("thumbnails") or {}).items():
+            if tc.get(url) is None:
+                tc.put(url, base64.b64decode(img["data"]), img["content_type"])
+                stats["thumbnails"] += 1
+    return stats
+
+def load_bundles(paths: Iterable[str]):
+    for path in paths:
+        try:
+            stats = load_bundle(path)
+            print(f"[Bundle] Đã nạp {path}: {stats['payloads']} thuật ngữ, {stats['thumbnails']} thumbnail mới")
+        except Exception as e:
+            print(f"[Bundle] Không nạp được {path}: {e}")
+
+def configure(search_config) -> None:
+    """Nạp các bundle trong [Search] info_bundles (phân tách bằng dấu phẩy)."""
+    load_bundles(p.strip() for p in search_config.info_bundles.split(",") if p.strip())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hearo offline info bundles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Tra trước mọi thuật ngữ trong glossary và ghi bundle")
+    build.add_argument("glossary")
+    build.add_argument("-o", "--output", required=True)
+    build.add_argument("--lang", default=search_engine.DEFAULT_LANG)
+    build.add_argument("--name", default="")
+    build.add_argument("--no-thumbnails", action="store_true")
+    build.add_argument("--max-thumbnails", type=int, default=6, help="Số thumbnail ảnh tối đa mỗi thuật ngữ")
+    build.add_argument("--concurrency", type=int, default=BUILD_CONCURRENCY)
+    info = sub.add_parser("info", help="In thông tin bundle")
+    info.add_argument("bundle")
+    load = sub.add_parser("load", help="Nạp bundle vào cache của máy này")
+    load.add_argument("bundle", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        terms = read_glossary(args.glossary)
+        bundle = search_engine._runner.run(build_bundle(
+            terms, lang=args.lang, name=args.name or os.path.splitext(os.path.basename(args.glossary))[0],
+            thumbnails=not args.no_thumbnails, max_thumbnails=args.max_thumbnails, concurrency=args.concurrency))
+        write_bundle(bundle, args.output)
+        print(f"{args.output}: {len(terms)} thuật ngữ, {len(bundle['thumbnails'])} thumbnail, "
+              f"{os.path.getsize(args.output) / 1024:.0f} KB")
+    elif args.command == "info":
+        bundle = read_bundle(args.bundle)
+        created = dt.datetime.fromtimestamp(bundle["created_at"]).strftime("%Y-%m-%d %H:%M")
+        found = sum(1 for p in bundle["payloads"] if p.get("definition"))
+        print(f"{bundle.get('name') or args.bundle} (v{bundle['version']}, {bundle['lang']}, tạo {created})")
+        print(f"{len(bundle['terms'])} thuật ngữ, {found} có định nghĩa, {len(bundle['thumbnails'])} thumbnail")
+    else:
+        load_bundles(args.bundle)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,10 @@
 # keyword_extractor.py
 from __future__ import annotations
 from collections import Counter
-from typing import Dict, List, Iterable, Optional, Tuple
+from typing import Any, Dict, List, Iterable, Optional, Tuple
 import spacy
-from spacy.matcher import Matcher
+from spacy.matcher import Matcher, PhraseMatcher
+from spacy.tokenizer import Tokenizer
 from spacy.util import filter_spans
 
 NER_LABELS_PRIORITY = {
@@ -55,12 +56,20 @@ def _sent_index_map(doc):
         for t in doc: sid[t.i] = 0
     return sid
 
+def _covered_tokens(spans) -> set:
+    return {i for sp in spans for i in range(sp.start, sp.end)}
+
 class KeywordExtractor:
     """
     Trình trích xuất tối ưu cho streaming:
       - update(text|Doc) liên tục
       - get_top(...) để lấy bảng xếp hạng hiện tại
       - trả keyword mới sinh ở mỗi lần update
+    Gazetteer (PhraseMatcher theo LOWER) chứa keyword đã biết + glossary: chạy trên make_doc
+    trước, chỉ đếm lại các cụm đã biết; câu mà mọi từ nội dung đều đã được gazetteer phủ thì
+    bỏ qua cả pipeline (tagger/NER) lẫn bước thu thập ứng viên.
+    occurrences: key -> [(ref, start_char, end_char)] cho mọi lần keyword xuất hiện, ref là
+    id câu do caller truyền vào update (chỉ số câu trong DocStore) hoặc id batch nội bộ.
     """
     def __init__(
         self,
@@ -71,7 +80,8 @@ class KeywordExtractor:
         use_ner: bool = True,
         weight_ner: float = 1.5,
         weight_propn: float = 1.2,
-        use_lemma: bool = True
+        use_lemma: bool = True,
+        glossary: Iterable[str] = ()
     ):
         self.nlp = nlp
         self.min_char = min_char
@@ -84,6 +94,8 @@ class KeywordExtractor:
         self.global_freq = Counter()    
         self.seen = set()
         self.meta: Dict[str, dict] = {}
+        self.occurrences: Dict[str, List[Tuple[Any, int, int]]] = {}
+        self._ref_keys: Dict[Any, set] = {}
         self._tok_offset = 0 
         self._sent_offset = 0
 
@@ -91,12 +103,24 @@ class KeywordExtractor:
 
         self._phrase_token_cache: Dict[str, List[str]] = {}
 
+        # Pipeline kiểu spacy-stanza chạy cả mô hình ngay trong tokenizer: make_doc không rẻ hơn
+        self._cheap_tokenizer = isinstance(getattr(nlp, "tokenizer", None), Tokenizer)
+        self._glossary: Dict[str, str] = {}
+        self.gazetteer = PhraseMatcher(nlp.vocab, attr="LOWER")
+        self.gazetteer_hits = 0
+        self.pipeline_skips = 0
+        self.add_glossary(glossary)
+
     def _token_key(self, tok):
         return (tok.lemma_ if self.use_lemma and tok.lemma_ else tok.text).lower()
 
     def _normalize_phrase(self, text: str) -> str:
         return text.strip().lower()
 
+    @staticmethod
+    def _span_tokens(span) -> List[str]:
+        return [t.text.lower() for t in span if not t.is_punct and not t.is_space]
+
     def _phrase_tokens(self, phrase: str) -> List[str]:
         k = phrase.lower()
         if k in self._phrase_token_cache:
@@ -106,6 +130,46 @@ class KeywordExtractor:
         self._phrase_token_cache[k] = toks
         return toks
 
+    def _add_pattern(self, key: str, phrase: str):
+        self.gazetteer.add(key, [self.nlp.make_doc(phrase)])
+
+    def add_glossary(self, terms: Iterable[str]):
+        """Thuật ngữ do người dùng cung cấp: được nhận ra ngay cả khi NER/POS không bắt được."""
+        for term in terms:
+            key = self._normalize_phrase(term)
+            if len(key) >= self.min_char and key not in self._glossary:
+                self._glossary[key] = term.strip()
+                if key not in self.meta:
+                    self._add_pattern(key, term)
+
+    def _match_known(self, doc) -> List:
+        """Cụm đã biết trong doc, ưu tiên cụm dài nhất khi chồng lên nhau (1 lượt tuyến tính)."""
+        spans = self.gazetteer(doc, as_spans=True)
+        return filter_spans(spans) if spans else []
+
+    @staticmethod
+    def _fully_covered(doc, covered: set) -> bool:
+        return all(t.i in covered for t in doc if not (t.is_punct or t.is_space or t.is_stop))
+
+    @staticmethod
+    def _resolve_known(known: List, candidates: List):
+        """
+        Giải quyết chồng lấn giữa cụm đã biết và ứng viên mới theo luật của filter_spans: cụm dài
+        hơn thắng, bằng nhau thì cụm đã biết thắng. Nhờ vậy "Apple Vision Pro" vẫn được nhận ra khi
+        "Apple" đã là keyword; ứng viên chỉ chồng nhau giữ nguyên như trước.
+        """
+        kept_known = list(known)
+        out = []
+        for cand in candidates:
+            sp = cand[1]
+            rivals = [k for k in kept_known if k.start < sp.end and sp.start < k.end]
+            if rivals:
+                if not any(x is sp for x in filter_spans(rivals + [sp])):
+                    continue
+                kept_known = [k for k in kept_known if not any(k is r for r in rivals)]
+            out.append(cand)
+        return kept_known, out
+
     def _collect_candidates(self, doc) -> List:
         sent_id_map = _sent_index_map(doc)
         spans = []
@@ -145,17 +209,104 @@ class KeywordExtractor:
             out.append((typ, sp, sent_id_map.get(sp.start, 0)))
         return out
 
+    def _add_occurrence(self, key: str, ref, sp):
+        self.occurrences.setdefault(key, []).append((ref, sp.start_char, sp.end_char))
+        self._ref_keys.setdefault(ref, set()).add(key)
+
+    def _forget_ref(self, ref):
+        """Câu được xử lý lại (ghép thêm text, bản refine): bỏ vị trí cũ của nó trước khi ghi lại."""
+        for key in self._ref_keys.pop(ref, ()):
+            occ = [o for o in self.occurrences.get(key, ()) if o[0] != ref]
+            if occ:
+                self.occurrences[key] = occ
+            else:
+                self.occurrences.pop(key, None)
+
+    def clear_occurrences(self):
+        self.occurrences.clear()
+        self._ref_keys.clear()
+
+    def occurrences_of(self, keyword: str) -> List[Tuple[Any, int, int]]:
+        return self.occurrences.get(self._normalize_phrase(keyword), [])
+
+    def count(self, keyword: str) -> int:
+        """Số lần keyword được nhắc, lấy từ occurrences (câu xử lý lại không bị đếm 2 lần)."""
+        return len(self.occurrences_of(keyword))
+
     def _update_freq(self, doc):
         self.global_freq.update(self._token_key(w) for w in doc if not w.is_punct and not w.is_space)
 
-    def update(self, text_or_doc, *, return_new_meta: bool = True):
-        """Xử lý 1 batch text/Doc, trả về danh sách keyword mới (theo thời gian)."""
-        doc = text_or_doc if hasattr(text_or_doc, "to_array") else self.nlp(text_or_doc)
+    def _update_freq_known(self, doc, known):
+        """Như _update_freq cho doc chỉ mới tokenize: từ trong cụm đã biết lấy lemma đã lưu."""
+        inside = {}
+        for sp in known:
+            lemmas = self.meta.get(sp.label_, {}).get("lemmas")
+            if lemmas and len(lemmas) == sp.end - sp.start:
+                inside.update(zip(range(sp.start, sp.end), lemmas))
+        self.global_freq.update(inside.get(w.i) or w.lower_ for w in doc if not w.is_punct and not w.is_space)
 
-        self._update_freq(doc)
+    def _count_known(self, known, new_items: List[dict], ref):
+        for sp in known:
+            key = sp.label_
+            m = self.meta.get(key)
+            if m is not None:
+                self._add_occurrence(key, ref, sp)
+            elif key in self._glossary:
+                # Thuật ngữ glossary xuất hiện lần đầu -> thành keyword mới
+                self.meta[key] = m = {
+                    "text": self._glossary[key],
+                    "tok_i": self._tok_offset + sp.start,
+                    "start_char": sp.start_char,
+                    "sent_id": self._sent_offset,
+                    "has_propn": False,
+                    "has_ner": False,
+                    "glossary": True,
+                    "lemmas": [self._token_key(t) for t in sp],
+                    "tokens": self._span_tokens(sp),
+                }
+                self.seen.add(key)
+                new_items.append(m)
+                self._add_occurrence(key, ref, sp)
+        self.gazetteer_hits += len(known)
 
-        candidates = self._collect_candidates(doc)
+    def update(self, text_or_doc, *, return_new_meta: bool = True, parse=None, ref=None):
+        """
+        Xử lý 1 batch text/Doc, trả về danh sách keyword mới (theo thời gian).
+        Doc mới chỉ tokenize (từ DocStore) đi kèm parse(doc) -> Doc đã qua pipeline; parse chỉ
+        được gọi khi gazetteer không phủ hết câu. Doc không kèm parse coi như đã parse.
+        ref: id câu ghi vào occurrences; update lại cùng ref thì thay vị trí cũ của câu đó.
+        """
         new_items = []
+        if ref is None:
+            ref = self._sent_offset
+        else:
+            self._forget_ref(ref)
+        if hasattr(text_or_doc, "to_array"):
+            doc = text_or_doc
+            known = self._match_known(doc)
+            skip = parse is not None and self._fully_covered(doc, _covered_tokens(known))
+            if parse is not None and not skip:
+                doc = parse(doc)
+        elif self._cheap_tokenizer:
+            doc = self.nlp.make_doc(text_or_doc)
+            known = self._match_known(doc)
+            skip = self._fully_covered(doc, _covered_tokens(known))
+            if not skip:
+                doc = self.nlp(doc)
+        else:
+            doc = self.nlp(text_or_doc)
+            known = self._match_known(doc)
+            skip = False
+
+        if skip:
+            self.pipeline_skips += 1
+            self._update_freq_known(doc, known)
+        else:
+            self._update_freq(doc)
+        candidates = []
+        if not skip:
+            known, candidates = self._resolve_known(known, self._collect_candidates(doc))
+        self._count_known(known, new_items, ref)
 
         for typ, sp, sent_local in candidates:
             phrase = sp.text.strip()
@@ -176,11 +327,14 @@ class KeywordExtractor:
                     "sent_id": sent_id_global,
                     "has_propn": has_propn,
                     "has_ner": has_ner,
+                    "lemmas": [self._token_key(t) for t in sp],
+                    "tokens": self._span_tokens(sp),
                 }
                 self.seen.add(key)
                 new_items.append(self.meta[key])
-            else:
-                pass
+                if key not in self._glossary:
+                    self._add_pattern(key, phrase)
+            self._add_occurrence(key, ref, sp)
 
         self._tok_offset += len(doc)
         try:
@@ -195,7 +349,8 @@ class KeywordExtractor:
             return [m["text"] for m in sorted(new_items, key=lambda m: m["tok_i"])]
 
     def _score(self, phrase_text: str, meta: dict) -> float:
-        toks = self._phrase_tokens(phrase_text)
+        # Token lưu lúc phát hiện cụm: chấm điểm không phải tokenize lại mỗi lần get_top
+        toks = meta.get("tokens") or self._phrase_tokens(phrase_text)
         base = sum(self.global_freq.get(t, 0) for t in toks)
         if meta.get("has_propn"): 
             base *= self.weight_propn
@@ -212,7 +367,7 @@ class KeywordExtractor:
         out = items[:top_k]
         if return_meta:
             return [
-                {**m, "score": float(self._score(m["text"], m))}
+                {**m, "count": self.count(m["text"]), "score": float(self._score(m["text"], m))}
                 for m in out
             ]
         return [m["text"] for m in out]
@@ -221,9 +376,15 @@ class KeywordExtractor:
         self.global_freq.clear()
         self.seen.clear()
         self.meta.clear()
+        self.clear_occurrences()
         self._tok_offset = 0
         self._sent_offset = 0
         self._phrase_token_cache.clear()
+        # Giữ glossary, bỏ các keyword đã học của phiên trước
+        glossary = list(self._glossary.values())
+        self._glossary.clear()
+        self.gazetteer = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+        self.add_glossary(glossary)
 
 def extract_keywords(nlp, text, top_k=20, min_char=2, order="score", return_meta=False):
     ke = KeywordExtractor(nlp, min_char=min_char)
@@ -0,0 +1,80 @@
+from typing import Optional
+
+class LanguageTracker:
+    """
+    Ghim ngôn ngữ cho cả phiên thay vì để Whisper dò lại ở mỗi cửa sổ:
+      - fixed_language: lấy từ config, không bao giờ dò
+      - dò ở các cửa sổ đầu, ghim khi có confirm_windows lần dò tự tin liên tiếp
+      - dò lại định kỳ (recheck_interval cửa sổ) hoặc khi chất lượng giải mã tụt
+    """
+    def __init__(
+        self,
+        fixed_language: Optional[str] = None,
+        *,
+        min_probability: float = 0.8,
+        confirm_windows: int = 2,
+        recheck_interval: int = 30,
+        min_avg_logprob: float = -1.0
+    ):
+        self.fixed_language = (fixed_language or "").strip().lower() or None
+        self.min_probability = min_probability
+        self.confirm_windows = max(1, confirm_windows)
+        self.recheck_interval = recheck_interval
+        self.min_avg_logprob = min_avg_logprob
+        self.reset()
+
+    def reset(self):
+        self.pinned: Optional[str] = None
+        self._candidate: Optional[str] = None
+        self._streak = 0
+        self._since_check = 0
+        self._recheck = False
+        self.detections = 0
+        self.windows = 0
+
+    def next_language(self) -> Optional[str]:
+        """Ngôn ngữ truyền cho cửa sổ kế tiếp; None nghĩa là cửa sổ này cần dò."""
+        self.windows += 1
+        if self.fixed_language:
+            return self.fixed_language
+        if self.pinned is None or self._recheck:
+            return None
+        if self.recheck_interval > 0 and self._since_check >= self.recheck_interval:
+            self._recheck = True
+            return None
+        self._since_check += 1
+        return self.pinned
+
+    def observe_detection(self, language: Optional[str], probability: float):
+        """Gọi sau mỗi cửa sổ đã chạy dò ngôn ngữ."""
+        if self.fixed_language or not language:
+            return
+        self.detections += 1
+        if probability < self.min_probability:
+            self._streak = 0
+            return
+
+        if language == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate, self._streak = language, 1
+
+        if language == self.pinned:
+            self._since_check = 0
+            self._recheck = False
+        elif self._streak >= self.confirm_windows:
+            if self.pinned:
+                print(f"Đổi ngôn ngữ phiên: {self.pinned} -> {language} (p={probability:.2f})")
+            else:
+                print(f"Ghim ngôn ngữ phiên: {language} (p={probability:.2f})")
+            self.pinned = language
+            self._since_check = 0
+            self._recheck = False
+
+    def observe_decode(self, avg_logprob: Optional[float]):
+        """Giải mã kém tự tin khi đang ghim -> có thể đã đổi người nói/ngôn ngữ, dò lại."""
+        if self.fixed_language or self.pinned is None or avg_logprob is None:
+            return
+        if avg_logprob < self.min_avg_logprob and not self._recheck:
+            print(f"Độ tự tin giải mã thấp ({avg_logprob:.2f}), dò lại ngôn ngữ...")
+            self._recheck = True
@@ -0,0 +1,216 @@
+"""
+Kho định nghĩa offline: SQLite (bảng tiêu đề có index + FTS5 cho tìm toàn văn), dựng từ
+dump Wikipedia abstracts hoặc corpus của người dùng (TSV / JSONL).
+
+    python -m Hearo.core.local_kb import enwiki-latest-abstract.xml.gz --lang en
+    python -m Hearo.core.local_kb import glossary.tsv --lang vi
+    python -m Hearo.core.local_kb lookup "machine learning"
+"""
+from __future__ import annotations
+import argparse, bz2, gzip, json, os, re, sqlite3, time
+import xml.etree.ElementTree as ET
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_KB_PATH = os.path.join(os.path.expanduser("~"), ".hearo", "knowledge.sqlite3")
+BATCH_SIZE = 5000
+# Prefix match chỉ nhận tiêu đề không dài quá n lần keyword, tránh "AI" khớp "Aircraft carrier"
+PREFIX_MAX_RATIO = 3.0
+PREFIX_SCAN = 32
+
+def title_key(title: str) -> str:
+    return re.sub(r"\s+", " ", (title or "").replace("_", " ")).strip().casefold()
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+def read_wikipedia_abstracts(path: str) -> Iterator[Tuple[str, str, str]]:
+    """(title, abstract, url) từ file *-abstract.xml[.gz], đọc stream không nạp cả file."""
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag != "doc":
+                continue
+            title = (elem.findtext("title") or "").strip()
+            if title.startswith("Wikipedia: "):
+                title = title[len("Wikipedia: "):]
+            abstract = (elem.findtext("abstract") or "").strip()
+            url = (elem.findtext("url") or "").strip()
+            elem.clear()
+            # Bỏ trang không có tóm tắt hoặc chỉ là mảnh markup còn sót
+            if title and len(abstract) > 20 and not abstract.startswith(("|", "{", "[")):
+                yield title, abstract, url
+
+def read_tsv(path: str) -> Iterator[Tuple[str, str, str]]:
+    """Mỗi dòng: title<TAB>abstract[<TAB>url]."""
+    with _open(path) as f:
+        for raw in f:
+            parts = raw.decode("utf-8").rstrip("\n").split("\t")
+            if len(parts) >= 2 and parts[0].strip() and parts[1].strip():
+                yield parts[0].strip(), parts[1].strip(), (parts[2].strip() if len(parts) > 2 else "")
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, str, str]]:
+    """Mỗi dòng 1 object có title và abstract (hoặc extract/definition), url tuỳ chọn."""
+    with _open(path) as f:
+        for raw in f:
+            if not raw.strip():
+                continue
+            item = json.loads(raw)
+            title = (item.get("title") or "").strip()
+            abstract = (item.get("abstract") or item.get("extract") or item.get("definition") or "").strip()
+            if title and abstract:
+                yield title, abstract, item.get("url") or ""
+
+def read_corpus(path: str) -> Iterator[Tuple[str, str, str]]:
+    name = path.lower().removesuffix(".gz").removesuffix(".bz2")
+    if name.endswith(".xml"):
+        return read_wikipedia_abstracts(path)
+    if name.endswith((".jsonl", ".json")):
+        return read_jsonl(path)
+    return read_tsv(path)
+
+class LocalKnowledgeBase:
+    """
+    Tra định nghĩa theo tiêu đề trong SQLite: khớp chính xác rồi tới prefix, đều qua
+    index B-tree của title_key nên dưới 1ms; search() dùng FTS5 cho truy vấn toàn văn.
+    """
+    def __init__(self, path: str = DEFAULT_KB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                " id INTEGER PRIMARY KEY, lang TEXT NOT NULL, title TEXT NOT NULL,"
+                " title_key TEXT NOT NULL, abstract TEXT NOT NULL, url TEXT NOT NULL DEFAULT '')"
+            )
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS articles_title ON articles (lang, title_key)")
+            self.has_fts = self._create_fts()
+
+    def _create_fts(self) -> bool:
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+                " title, abstract, content='articles', content_rowid='id')"
+            )
+            return True
+        except sqlite3.OperationalError:
+            # SQLite build không có FTS5: tra tiêu đề vẫn chạy, chỉ mất search()
+            return False
+
+    def import_rows(self, rows: Iterable[Tuple[str, str, str]], lang: str) -> int:
+        """Ghi (title, abstract, url) theo lô; tiêu đề trùng thì bản sau đè bản trước."""
+        count = 0
+        batch: List[Tuple[str, str, str, str, str]] = []
+
+        def flush():
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO articles (lang, title, title_key, abstract, url) VALUES (?, ?, ?, ?, ?)",
+                    batch,
+                )
+            batch.clear()
+
+        for title, abstract, url in rows:
+            batch.append((lang, title, title_key(title), abstract, url))
+            count += 1
+            if len(batch) >= BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+        if self.has_fts:
+            with self._lock, self._conn:
+                self._conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+        return count
+
+    def _row_to_definition(self, row) -> Dict[str, Any]:
+        title, abstract, url = row
+        return {"title": title, "extract": abstract, "url": url or None, "source": "local"}
+
+    def lookup(self, keyword: str, lang: str, prefix: bool = True) -> Optional[Dict[str, Any]]:
+        """Khớp tiêu đề chính xác; prefix=True thì thử thêm trang phân biệt nghĩa và prefix theo từ."""
+        key = title_key(keyword)
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, abstract, url FROM articles WHERE lang = ? AND title_key = ?", (lang, key)
+            ).fetchone()
+            # Range trên index thay cho LIKE để chắc chắn dùng B-tree.
+            # Trang phân biệt nghĩa "python (programming language)" trước, rồi tới prefix theo từ
+            if row is None and prefix:
+                row = self._prefix(lang, key + " (", None)
+            if row is None and prefix:
+                row = self._prefix(lang, key + " ", int(len(key) * PREFIX_MAX_RATIO))
+        return self._row_to_definition(row) if row else None
+
+    def _prefix(self, lang: str, prefix: str, max_length: Optional[int]):
+        # Chỉ đọc PREFIX_SCAN dòng đầu theo thứ tự index rồi chọn tiêu đề ngắn nhất:
+        # prefix phổ biến ("the ...") không phải sort cả dải
+        rows = self._conn.execute(
+            "SELECT title, abstract, url, title_key FROM articles"
+            " WHERE lang = ? AND title_key >= ? AND title_key < ? AND length(title_key) <= ?"
+            " ORDER BY title_key LIMIT ?",
+            (lang, prefix, prefix + "\U0010ffff", max_length if max_length is not None else 1 << 30, PREFIX_SCAN),
+        ).fetchall()
+        if not rows:
+            return None
+        return min(rows, key=lambda r: len(r[3]))[:3]
+
+    def search(self, query: str, lang: str, limit: int = 5) -> List[Dict[str, Any]]:
+        if not self.has_fts or not query.strip():
+            return []
+        terms = " ".join('"' + t.replace('"', '""') + '"' for t in query.split())
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT a.title, a.abstract, a.url FROM articles_fts f JOIN articles a ON a.id = f.rowid"
+                " WHERE articles_fts MATCH ? AND a.lang = ? ORDER BY bm25(articles_fts) LIMIT ?",
+                (terms, lang, limit),
+            ).fetchall()
+        return [self._row_to_definition(r) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hearo offline knowledge base")
+    parser.add_argument("--db", default=DEFAULT_KB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Nạp dump Wikipedia abstracts (.xml[.gz]) hoặc corpus .tsv/.jsonl")
+    imp.add_argument("paths", nargs="+")
+    imp.add_argument("--lang", default="en")
+    look = sub.add_parser("lookup", help="Tra 1 keyword như fetch_keyword_info sẽ tra")
+    look.add_argument("keyword")
+    look.add_argument("--lang", default="en")
+    look.add_argument("--search", action="store_true", help="Tìm toàn văn (FTS5) thay vì theo tiêu đề")
+    args = parser.parse_args(argv)
+
+    kb = LocalKnowledgeBase(args.db)
+    if args.command == "import":
+        for path in args.paths:
+            started = time.perf_counter()
+            n = kb.import_rows(read_corpus(path), args.lang)
+            print(f"{path}: {n} mục trong {time.perf_counter() - started:.1f}s")
+        print(f"Tổng: {kb.count()} mục trong {args.db}")
+    else:
+        started = time.perf_counter()
+        results = kb.search(args.keyword, args.lang) if args.search else [kb.lookup(args.keyword, args.lang)]
+        elapsed = (time.perf_counter() - started) * 1000
+        for r in filter(None, results):
+            print(f"{r['title']}: {r['extract'][:200]}")
+        print(f"({elapsed:.2f} ms)")
+    kb.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
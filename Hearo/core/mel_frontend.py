@@ -0,0 +1,74 @@
+import numpy as np
+
+LOG_FLOOR = -10.0  # log10(1e-10), giá trị của khung im lặng/padding
+
+class StreamingMelFrontend:
+    """
+    Tính log-mel một lần khi âm thanh tới, giữ các khung trong ring buffer:
+      - push(audio) chỉ STFT phần mẫu mới -> chi phí/giây âm thanh không phụ thuộc overlap
+      - window(start, n) cắt khung đã tính sẵn, pad tới 30s và chuẩn hoá như Whisper
+    Thông số (n_fft, hop, mel_filters) lấy từ FeatureExtractor của faster-whisper.
+    """
+    def __init__(self, feature_extractor, capacity_seconds: float = 90.0):
+        self.n_fft = feature_extractor.n_fft
+        self.hop_length = feature_extractor.hop_length
+        self.sampling_rate = feature_extractor.sampling_rate
+        self.nb_max_frames = feature_extractor.nb_max_frames
+        self.mel_filters = np.asarray(feature_extractor.mel_filters, dtype=np.float32)
+        self.n_mels = self.mel_filters.shape[0]
+        self.hann = np.hanning(self.n_fft + 1)[:-1].astype(np.float32)
+        self.capacity = int(capacity_seconds * self.sampling_rate / self.hop_length)
+        self.reset()
+
+    def reset(self):
+        # Whisper pad giữa (center=True) nên khung k nằm quanh mẫu k*hop
+        self._pending = np.zeros(self.n_fft // 2, dtype=np.float32)
+        self._ring = np.full((self.n_mels, self.capacity), LOG_FLOOR, dtype=np.float32)
+        self.total_frames = 0
+
+    def frames_for(self, seconds: float) -> int:
+        return int(round(seconds * self.sampling_rate / self.hop_length))
+
+    def push(self, audio: np.ndarray) -> int:
+        """Nạp mẫu mới, trả về số khung vừa tính."""
+        buf = np.concatenate([self._pending, np.asarray(audio, dtype=np.float32).ravel()])
+        if len(buf) < self.n_fft:
+            self._pending = buf
+            return 0
+
+        n = 1 + (len(buf) - self.n_fft) // self.hop_length
+        frames = np.lib.stride_tricks.sliding_window_view(buf, self.n_fft)[::self.hop_length][:n]
+        power = np.abs(np.fft.rfft(frames * self.hann, axis=1)) ** 2
+        log_mel = np.log10(np.maximum(self.mel_filters @ power.T, 1e-10))
+        self._write(log_mel.astype(np.float32))
+
+        self._pending = buf[n * self.hop_length:]
+        return n
+
+    def _write(self, log_mel: np.ndarray):
+        n = log_mel.shape[1]
+        if n > self.capacity:
+            log_mel = log_mel[:, -self.capacity:]
+            self.total_frames += n - self.capacity
+            n = self.capacity
+        pos = self.total_frames % self.capacity
+        first = min(n, self.capacity - pos)
+        self._ring[:, pos:pos + first] = log_mel[:, :first]
+        if first < n:
+            self._ring[:, :n - first] = log_mel[:, first:]
+        self.total_frames += n
+
+    def window(self, start: int, length: int) -> np.ndarray:
+        """Đặc trưng [n_mels, nb_max_frames] cho các khung [start, start+length)."""
+        oldest = max(0, self.total_frames - self.capacity)
+        if start < oldest or start + length > self.total_frames:
+            raise ValueError(f"Khung [{start}, {start + length}) không còn/chưa có trong ring "
+                             f"[{oldest}, {self.total_frames})")
+
+        length = min(length, self.nb_max_frames)
+        idx = np.arange(start, start + length) % self.capacity
+        features = np.full((self.n_mels, self.nb_max_frames), LOG_FLOOR, dtype=np.float32)
+        features[:, :length] = self._ring[:, idx]
+
+        features = np.maximum(features, features.max() - 8.0)
+        return (features + 4.0) / 4.0
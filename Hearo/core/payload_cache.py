@@ -0,0 +1,142 @@
+from __future__ import annotations
+import json, os, sqlite3, time, datetime as dt
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SECTIONS = ("definition", "images", "news")
+
+DEFAULT_SECTION_TTLS = {
+    "definition": 7 * 24 * 3600,
+    "images": 7 * 24 * 3600,
+    "news": 30 * 60,
+}
+# Section rỗng có thể do mạng lỗi lúc fetch -> hết hạn sớm để thử lại
+EMPTY_SECTION_TTL = 15 * 60
+
+class PayloadCache:
+    """
+    Cache bền trên đĩa cho payload của fetch_keyword_info, khoá (keyword, lang).
+    Mỗi section (definition/images/news) có TTL riêng; get() trả cả entry đã cũ kèm
+    danh sách section cần làm mới để caller phục vụ ngay rồi revalidate ở nền.
+    key_fn dựng khoá từ keyword (mặc định lower), để các biến thể của 1 keyword dùng chung 1 entry.
+    Đổi key_fn thì tăng key_version: các entry đã lưu được dựng lại khoá từ keyword gốc.
+    """
+    def __init__(self, path: str, section_ttls: Optional[Dict[str, int]] = None,
+                 key_fn: Optional[Callable[[str], str]] = None, key_version: int = 0):
+        self.path = path
+        self.key_fn = key_fn or (lambda keyword: keyword.strip().lower())
+        self.section_ttls = {**DEFAULT_SECTION_TTLS, **(section_ttls or {})}
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS keyword_payloads ("
+                " keyword TEXT NOT NULL, lang TEXT NOT NULL, section TEXT NOT NULL,"
+                " data TEXT NOT NULL, fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (keyword, lang, section))"
+            )
+            self._migrate_keys(key_version)
+
+    def _migrate_keys(self, version: int):
+        """Dựng lại khoá theo key_fn hiện tại nếu file được ghi với key_version khác (PRAGMA user_version)."""
+        (current,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if current == version:
+            return
+        rows = self._conn.execute(
+            "SELECT keyword, lang, section, data, fetched_at FROM keyword_payloads").fetchall()
+        originals: Dict[Tuple[str, str], str] = {}
+        for key, lang, section, data, _ in rows:
+            if section == "definition":
+                originals[(key, lang)] = json.loads(data).get("keyword") or key
+        rekeyed = [(self.key_fn(originals.get((key, lang)) or key) or key, lang, section, data, ts)
+                   for key, lang, section, data, ts in rows]
+        moved = len({(r[0], r[1]) for r, n in zip(rows, rekeyed) if r[0] != n[0]})
+        if moved:
+            # Ghi lại toàn bộ: nhiều khoá cũ về cùng 1 khoá mới thì giữ bản mới nhất
+            rekeyed.sort(key=lambda r: r[4], reverse=True)
+            self._conn.execute("DELETE FROM keyword_payloads")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO keyword_payloads (keyword, lang, section, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                rekeyed,
+            )
+        self._conn.execute(f"PRAGMA user_version = {int(version)}")
+        if moved:
+            print(f"[Cache] Dựng lại khoá cho {moved} keyword trong {self.path}")
+
+    def _key(self, keyword: str) -> str:
+        return self.key_fn(keyword or "")
+
+    def _is_stale(self, section: str, value: Any, fetched_at: float, now: float) -> bool:
+        empty = not value or (section == "definition" and not value.get("definition"))
+        ttl = EMPTY_SECTION_TTL if empty else self.section_ttls.get(section, 0)
+        return now - fetched_at > ttl
+
+    def get(self, keyword: str, lang: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """(payload, các section đã cũ/thiếu); payload None nếu chưa từng cache."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT section, data, fetched_at FROM keyword_payloads WHERE keyword = ? AND lang = ?",
+                (self._key(keyword), lang),
+            ).fetchall()
+        if not rows:
+            return None, list(SECTIONS)
+
+        now = time.time()
+        found: Dict[str, Tuple[Any, float]] = {sec: (json.loads(data), ts) for sec, data, ts in rows}
+        stale = [sec for sec in SECTIONS
+                 if sec not in found or self._is_stale(sec, found[sec][0], found[sec][1], now)]
+
+        definition = (found.get("definition") or ({}, 0))[0]
+        oldest = min(ts for _, ts in found.values())
+        payload = {
+            "keyword": definition.get("keyword") or keyword,
+            "lang": lang,
+            "fetched_at": dt.datetime.utcfromtimestamp(oldest).replace(microsecond=0).isoformat() + "Z",
+            "definition": definition.get("definition"),
+            "images": (found.get("images") or ([], 0))[0],
+            "news": (found.get("news") or ([], 0))[0],
+            "meta": {**(definition.get("meta") or {}), "cache": {"stale": stale}},
+        }
+        return payload, stale
+
+    def put(self, payload: Dict[str, Any], sections=SECTIONS, fetched_at: Optional[float] = None):
+        """
+        Ghi các section của payload. fetched_at (epoch) cho dữ liệu lấy từ trước, vd. info bundle:
+        giữ đúng tuổi để TTL vẫn đúng, và không đè section trong cache đã mới hơn.
+        """
+        lang = payload.get("lang") or ""
+        key = self._key(payload.get("keyword"))
+        if not key:
+            return
+        meta = {k: v for k, v in (payload.get("meta") or {}).items() if k != "cache"}
+        values = {
+            "definition": {"keyword": payload.get("keyword"), "definition": payload.get("definition"), "meta": meta},
+            "images": payload.get("images") or [],
+            "news": payload.get("news") or [],
+        }
+        rows = [(key, lang, sec, json.dumps(values[sec], ensure_ascii=False), fetched_at or time.time())
+                for sec in sections]
+        with self._lock, self._conn:
+            if fetched_at is None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO keyword_payloads (keyword, lang, section, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            else:
+                self._conn.executemany(
+                    "INSERT INTO keyword_payloads (keyword, lang, section, data, fetched_at) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (keyword, lang, section) DO UPDATE SET data = excluded.data, fetched_at = excluded.fetched_at"
+                    " WHERE excluded.fetched_at > keyword_payloads.fetched_at",
+                    rows,
+                )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM keyword_payloads")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
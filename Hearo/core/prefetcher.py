@@ -0,0 +1,208 @@
+from __future__ import annotations
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from . import search_engine
+
+class HostRateLimiter:
+    """Token bucket theo host: tối đa `rate` request/giây, cho phép dồn `burst` request."""
+    def __init__(self, rate: float = 2.0, burst: int = 2):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, tuple] = {}
+
+    async def acquire(self, host: str):
+        if self.rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            tokens, last = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            if tokens >= 1.0:
+                self._buckets[host] = (tokens - 1.0, now)
+                return
+            self._buckets[host] = (tokens, now)
+            await asyncio.sleep((1.0 - tokens) / self.rate)
+
+class KeywordPrefetcher:
+    """
+    Lấy trước thông tin keyword ở nền ngay khi keyword xuất hiện, để click thành cache hit.
+    Chạy trên loop của search_engine._runner:
+      - keyword đang hiển thị được ưu tiên, sau đó tới keyword mới nhất
+      - tối đa `concurrency` lookup cùng lúc, mỗi host bị giới hạn `rate_per_host` request/giây
+      - độ trễ EWMA vượt `slow_seconds` -> tạm dừng `pause_seconds` để nhường mạng cho click
+      - mỗi `refresh_seconds`, keyword đang hiển thị được đưa lại vào hàng đợi: section đã hết
+        hạn trong cache (thường là news) được làm mới ở nền trước khi người dùng click
+    Các hàm public an toàn khi gọi từ thread UI.
+    """
+    def __init__(self, *, lang: str = search_engine.DEFAULT_LANG, concurrency: int = 2,
+                 rate_per_host: float = 2.0, slow_seconds: float = 5.0, pause_seconds: float = 60.0,
+                 max_pending: int = 64, alpha: float = 0.3, refresh_seconds: float = 120.0,
+                 enabled: bool = True):
+        self.lang = lang
+        self.concurrency = max(1, concurrency)
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.slow_seconds = slow_seconds
+        self.pause_seconds = pause_seconds
+        self.max_pending = max_pending
+        self.alpha = alpha
+        self.refresh_seconds = refresh_seconds
+        self.enabled = enabled
+        self.latency: Optional[float] = None
+
+        # Các field dưới chỉ được đụng tới trên loop nền
+        self._pending: Dict[str, int] = {}
+        self._keywords: Dict[str, str] = {}
+        self._visible: Dict[str, str] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._workers: List[asyncio.Task] = []
+        self._refresher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._paused_until = 0.0
+        self._seq = 0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return search_engine._runner.loop
+
+    @staticmethod
+    def _key(keyword: str) -> str:
+        return search_engine.lookup_key((keyword or "").strip())
+
+    def _call(self, fn, *args):
+        if not self.enabled or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def enqueue(self, keywords: Iterable[str]):
+        self._call(self._enqueue, [k for k in keywords if self._key(k)])
+
+    def set_visible(self, keywords: Iterable[str]):
+        self._call(self._set_visible, [k.strip() for k in keywords if self._key(k)])
+
+    def cancel(self):
+        """Bỏ hàng đợi và huỷ các lookup nền đang chạy (worker vẫn sống để nhận keyword mới)."""
+        self._call(self._cancel)
+
+    def stop(self):
+        self._call(self._stop)
+
+    def _ensure_workers(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(asyncio.ensure_future(self._worker()))
+        if self.refresh_seconds > 0 and (self._refresher is None or self._refresher.done()):
+            self._refresher = asyncio.ensure_future(self._refresh_visible())
+
+    def _enqueue(self, keywords: List[str]):
+        self._ensure_workers()
+        for kw in keywords:
+            key = self._key(kw)
+            if key in self._pending or key in self._inflight:
+                continue
+            self._seq += 1
+            self._pending[key] = self._seq
+            self._keywords[key] = kw.strip()
+        while len(self._pending) > self.max_pending:
+            oldest = min(self._pending, key=lambda k: (k in self._visible, self._pending[k]))
+            self._drop(oldest)
+        if self._pending:
+            self._wakeup.set()
+
+    def _set_visible(self, keywords: List[str]):
+        self._visible = {self._key(k): k for k in keywords}
+
+    def _drop(self, key: str):
+        self._pending.pop(key, None)
+        if key not in self._inflight:
+            self._keywords.pop(key, None)
+
+    def _cancel(self):
+        for key in list(self._pending):
+            self._drop(key)
+        for task in list(self._inflight.values()):
+            task.cancel()
+
+    def _stop(self):
+        self._cancel()
+        for w in self._workers:
+            w.cancel()
+        self._workers = []
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    def _pop(self) -> str:
+        key = min(self._pending, key=lambda k: (k not in self._visible, -self._pending[k]))
+        del self._pending[key]
+        return key
+
+    async def _worker(self):
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            delay = self._paused_until - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            key = self._pop()
+            task = asyncio.ensure_future(self._prefetch(self._keywords[key]))
+            self._inflight[key] = task
+            # wait() không ném CancelledError khi chỉ lookup bị huỷ
+            await asyncio.wait({task})
+            self._inflight.pop(key, None)
+            self._keywords.pop(key, None)
+            if not task.cancelled() and task.exception() is not None:
+                print(f"[Prefetch] '{key}' lỗi: {task.exception()}")
+
+    async def _refresh_visible(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            if self._visible:
+                # _prefetch bỏ qua keyword còn hạn, nên chỉ section đã cũ mới gây request
+                self._enqueue(list(self._visible.values()))
+
+    async def _prefetch(self, keyword: str):
+        pc = search_engine.get_payload_cache()
+        if pc is None:
+            return
+        cached, stale = pc.get(keyword, self.lang)
+        if cached is not None and not stale:
+            return
+
+        token = search_engine.request_limiter.set(self.limiter)
+        started = self.loop.time()
+        try:
+            await search_engine.fetch_keyword_info_cached(keyword, lang=self.lang)
+        finally:
+            search_engine.request_limiter.reset(token)
+        self._observe(self.loop.time() - started)
+
+    def _observe(self, latency: float):
+        self.latency = latency if self.latency is None else (1 - self.alpha) * self.latency + self.alpha * latency
+        if self.latency > self.slow_seconds:
+            print(f"[Prefetch] mạng chậm (EWMA {self.latency:.1f}s), tạm dừng {self.pause_seconds:.0f}s")
+            self._paused_until = self.loop.time() + self.pause_seconds
+            self.latency = None
+
+_prefetcher = KeywordPrefetcher()
+
+def configure(search_config) -> None:
+    """Áp dụng các tham số prefetch trong [Search]."""
+    global _prefetcher
+    _prefetcher.stop()
+    _prefetcher = KeywordPrefetcher(
+        concurrency=search_config.prefetch_concurrency,
+        rate_per_host=search_config.prefetch_rate_per_host,
+        slow_seconds=search_config.prefetch_slow_seconds,
+        refresh_seconds=search_config.news_refresh_seconds,
+        enabled=search_config.prefetch,
+    )
+
+def get_prefetcher() -> KeywordPrefetcher:
+    return _prefetcher
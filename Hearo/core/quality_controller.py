@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .whisper_backend import smaller_models
+
+@dataclass(frozen=True)
+class QualityLevel:
+    model_size: str
+    beam_size: int
+    hop_ratio: float  # hop / cửa sổ: 0.5 = overlap 50%, 1.0 = không overlap
+
+    def describe(self) -> str:
+        return f"{self.model_size}/beam {self.beam_size}/hop {int(self.hop_ratio * 100)}%"
+
+def build_ladder(model_size: str, beam_size: int, hop_ratio: float = 0.5) -> List[QualityLevel]:
+    """
+    Các mức chất lượng từ cao xuống thấp. Encoder luôn chạy trên 30s đã pad nên
+    cửa sổ ngắn hơn không rẻ hơn; thứ thực sự giảm tải là beam nhỏ, ít overlap
+    (ít lượt encode mỗi giây) và model nhỏ hơn.
+    """
+    levels = [QualityLevel(model_size, beam_size, hop_ratio)]
+    if beam_size > 1:
+        levels.append(QualityLevel(model_size, 1, hop_ratio))
+    if hop_ratio < 1.0:
+        levels.append(QualityLevel(model_size, 1, 1.0))
+    for smaller in smaller_models(model_size):
+        levels.append(QualityLevel(smaller, 1, 1.0))
+    return levels
+
+class QualityController:
+    """
+    Theo dõi RTF (độ trễ / hop) và độ trễ hàng đợi sau mỗi cửa sổ:
+      - quá tải (RTF EWMA > high_rtf hoặc tồn đọng > max_lag_hops hop và không giảm) -> hạ 1 mức
+      - dư tải liên tục `patience` cửa sổ -> nâng 1 mức (đổi model cần dư nhiều hơn)
+    Mỗi lần đổi mức đều được log để chỉnh policy.
+    """
+    def __init__(self, levels: List[QualityLevel], *, high_rtf: float = 0.9, low_rtf: float = 0.5,
+                 model_up_rtf: float = 0.3, max_lag_hops: float = 2.0, patience: int = 5, alpha: float = 0.3):
+        self.levels = levels
+        self.high_rtf = high_rtf
+        self.low_rtf = low_rtf
+        self.model_up_rtf = model_up_rtf
+        self.max_lag_hops = max_lag_hops
+        self.patience = patience
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.rtf: Optional[float] = None
+        self._since_switch = 0
+        self._calm = 0
+        self._last_lag = 0.0
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.levels[self.index]
+
+    def observe(self, latency: float, hop_seconds: float, lag_seconds: float) -> Optional[QualityLevel]:
+        """Ghi nhận 1 cửa sổ; trả về mức mới nếu vừa đổi, ngược lại None."""
+        rtf = latency / hop_seconds if hop_seconds > 0 else float("inf")
+        self.rtf = rtf if self.rtf is None else (1 - self.alpha) * self.rtf + self.alpha * rtf
+        self._since_switch += 1
+
+        # Tồn đọng đang giảm dần thì mức hiện tại đã đủ nhẹ, chỉ cần chờ bắt kịp
+        lagging = lag_seconds > self.max_lag_hops * hop_seconds and lag_seconds >= self._last_lag
+        self._last_lag = lag_seconds
+        if (self.rtf > self.high_rtf or lagging) and self.index < len(self.levels) - 1 and self._since_switch >= 2:
+            return self._switch(self.index + 1, lag_seconds)
+
+        if self.index == 0:
+            return None
+        target = self.levels[self.index - 1]
+        threshold = self.model_up_rtf if target.model_size != self.level.model_size else self.low_rtf
+        self._calm = self._calm + 1 if (self.rtf < threshold and lag_seconds < hop_seconds) else 0
+        if self._calm >= self.patience and self._since_switch >= self.patience:
+            return self._switch(self.index - 1, lag_seconds)
+        return None
+
+    def _switch(self, index: int, lag_seconds: float) -> QualityLevel:
+        old, old_index = self.level, self.index
+        self.index = index
+        print(f"[Quality] {'hạ' if index > old_index else 'nâng'} mức: "
+              f"{old.describe()} -> {self.level.describe()} "
+              f"(RTF {self.rtf:.2f}, tồn đọng {lag_seconds:.1f}s)")
+        # EWMA cũ phản ánh mức trước, đo lại từ đầu
+        self.rtf = None
+        self._since_switch = 0
+        self._calm = 0
+        return self.level
@@ -0,0 +1,118 @@
+import ctypes
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from .whisper_backend import WhisperBackend
+
+def _lower_thread_priority():
+    """Hạ ưu tiên của thread hiện tại xuống mức idle (best effort)."""
+    try:
+        if sys.platform.startswith("win"):
+            THREAD_PRIORITY_IDLE = -15
+            ctypes.windll.kernel32.SetThreadPriority(ctypes.windll.kernel32.GetCurrentThread(), THREAD_PRIORITY_IDLE)
+        elif hasattr(os, "setpriority"):
+            # Trên Linux mỗi thread là 1 task riêng, nice theo native id chỉ áp dụng cho thread này
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception as e:
+        print(f"Không hạ được ưu tiên thread refine: {e}")
+
+class BackgroundRefiner:
+    """
+    Tầng nền: giải mã lại các cửa sổ đã phát bằng model lớn hơn khi CPU còn dư.
+      - chỉ chạy khi tầng live đang rảnh và RTF live (EWMA) dưới max_live_rtf
+      - thread ưu tiên idle, ít cpu_threads; hàng đợi có giới hạn, tràn thì bỏ cửa sổ cũ nhất
+      - kết quả đẩy vào result_queue dưới dạng event task="refine" cùng window_id
+    """
+    def __init__(self, model_size, device, compute_type, result_queue, *, event_factory,
+                 cpu_threads: int = 0, max_pending: int = 8, max_live_rtf: float = 0.5):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 4) // 4)
+        self.result_queue = result_queue
+        self.event_factory = event_factory
+        self.max_live_rtf = max_live_rtf
+
+        self.backend: Optional[WhisperBackend] = None
+        self.pending = deque(maxlen=max_pending)
+        self.live_busy = threading.Event()
+        self.live_rtf = 0.0
+        self.is_running = False
+        self.thread = None
+        self._wakeup = threading.Event()
+
+    def report_live_rtf(self, rtf: float):
+        self.live_rtf = rtf if self.live_rtf == 0.0 else 0.8 * self.live_rtf + 0.2 * rtf
+
+    def submit(self, window_id: int, audio: np.ndarray, language: Optional[str], task: str = "transcribe"):
+        """Không bao giờ chặn tầng live: deque tự bỏ phần tử cũ nhất khi đầy."""
+        self.pending.append((window_id, audio, language, task))
+        self._wakeup.set()
+
+    def _has_headroom(self) -> bool:
+        return not self.live_busy.is_set() and self.live_rtf < self.max_live_rtf
+
+    def _refine(self, audio, language, task):
+        features = self.backend.feature_extractor(audio)[:, :self.backend.feature_extractor.nb_max_frames]
+        padded = np.zeros((features.shape[0], self.backend.feature_extractor.nb_max_frames), dtype=np.float32)
+        padded[:, :features.shape[1]] = features
+        encoder_output = self.backend.encode(padded)
+        if language is None:
+            language, _ = self.backend.detect_language(encoder_output)
+        return self.backend.decode(encoder_output, language=language, task=task, beam_size=5), language
+
+    def run_loop(self):
+        _lower_thread_priority()
+        if self.backend is None:
+            try:
+                self.backend = WhisperBackend(
+                    self.model_size, device=self.device, compute_type=self.compute_type, cpu_threads=self.cpu_threads
+                )
+            except Exception as e:
+                print(f"Không tải được model refine ({self.model_size}): {e}")
+                self.is_running = False
+                return
+
+        while self.is_running:
+            if not self.pending:
+                self._wakeup.wait(timeout=0.5)
+                self._wakeup.clear()
+                continue
+            if not self._has_headroom():
+                time.sleep(0.1)
+                continue
+
+            window_id, audio, language, task = self.pending.popleft()
+            try:
+                started = time.perf_counter()
+                result, language = self._refine(audio, language, task)
+                elapsed = time.perf_counter() - started
+                if result.text and not result.is_silence:
+                    print(f"Refine #{window_id} ({self.model_size}, {elapsed:.2f}s): {result.text}")
+                    self.result_queue.put(self.event_factory(
+                        window_id, "refine", result.text, language, time.strftime('%H:%M:%S')
+                    ))
+            except Exception as e:
+                print(f"Refine error: {e}")
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.run_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._wakeup.set()
+        self.pending.clear()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
@@ -1,11 +1,18 @@
 # keyword_info_service_v3.py
 from __future__ import annotations
-import asyncio, html, urllib.parse, datetime as dt, re, atexit, sys
-from typing import Dict, Any, List, Optional, Tuple
+import asyncio, html, urllib.parse, datetime as dt, re, atexit, sys, os, time, base64, contextlib, contextvars
+import unicodedata
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 from threading import Thread
 import aiohttp
 from cachetools import TTLCache
-import feedparser
+
+from .payload_cache import PayloadCache, SECTIONS
+from .thumbnail_cache import ThumbnailCache
+from .local_kb import DEFAULT_KB_PATH, LocalKnowledgeBase
+from .source_health import HealthRegistry
+from .source_ranking import DEFAULT_STATS_PATH, SourceRanking
 
 try:
     from unidecode import unidecode
@@ -20,26 +27,309 @@ NEWS_WINDOW_DAYS = 14
 
 CACHE_TTL = 600
 cache = TTLCache(maxsize=4096, ttl=CACHE_TTL)
+# ETag/Last-Modified + kết quả lần trước của từng feed news, để request lại có điều kiện (304)
+NEWS_VALIDATOR_TTL = 24 * 3600
+_news_validators = TTLCache(maxsize=1024, ttl=NEWS_VALIDATOR_TTL)
+NEWS_CHUNK_SIZE = 16 * 1024
+# Đã đủ mục mà body còn dài hơn mức này thì bỏ connection thay vì đọc hết để giữ keep-alive
+NEWS_DRAIN_BYTES = 512 * 1024
+# Keyword không có kết quả nào: nhớ ngắn hạn để click/prefetch lại không fan-out lại.
+# Ngắn vì kết quả rỗng cũng có thể do mạng lỗi lúc tra
+NEGATIVE_TTL = 600
+_negative = TTLCache(maxsize=2048, ttl=NEGATIVE_TTL)
+
+PAYLOAD_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".hearo", "keyword_cache.sqlite3")
+_payload_cache: Optional[PayloadCache] = None
+_payload_cache_ttls: Dict[str, int] = {}
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".hearo", "thumbnails")
+THUMBNAIL_CACHE_BYTES = 200 * 1024 * 1024
+# Scheme UI đăng ký để webview lấy ảnh qua cache đĩa (xem ui/thumbnail_scheme.py)
+THUMBNAIL_SCHEME = "hearo-thumb"
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_use_thumbnail_scheme = False
+# Kho định nghĩa offline (xem local_kb.py); chỉ dùng khi file đã được import
+LOCAL_KB_PATH = DEFAULT_KB_PATH
+_local_kb: Optional[LocalKnowledgeBase] = None
+# Nguồn định nghĩa theo thứ tự ưu tiên mặc định; thứ tự thực tế học từ thống kê (source_ranking.py)
+DEFINITION_SOURCES = ("wikipedia", "wikidata", "ddg", "wiktionary")
+SOURCE_STATS_PATH = DEFAULT_STATS_PATH
+ADAPTIVE_SOURCES = True
+# Nguồn đầu chưa trả lời sau chừng này giây (hoặc trả về rỗng) thì gọi nguồn kế tiếp
+SOURCE_FALLBACK_DELAY = 0.8
+_ranking: Optional[SourceRanking] = None
+_refreshing: set = set()
+_refresh_tasks: set = set()
+# Việc đang chạy dùng chung theo key, xem _single_flight
+_inflight: Dict[tuple, asyncio.Future] = {}
+_inflight_waiters: Dict[tuple, int] = {}
+_inflight_limiters: Dict[tuple, "_FlightLimiter"] = {}
+_lookup_progress: Dict[tuple, "_LookupProgress"] = {}
 
 UA = "KeywordInfoService/3.0 (+https://example.com)"
 
+# Connection pool dùng chung cho mọi lookup (xem _AsyncLoopRunner.get_session)
+POOL_LIMIT = 64
+POOL_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+# Giới hạn thời gian: mỗi request tối đa REQUEST_TIMEOUT, cả 1 lookup tối đa LOOKUP_DEADLINE
+REQUEST_TIMEOUT = 10.0
+LOOKUP_DEADLINE = 8.0
+# Nguồn định nghĩa chưa trả lời sau HEDGE_DELAY giây thì gửi thêm 1 request trùng, lấy cái về trước (0 = tắt)
+HEDGE_DELAY = 1.0
+# Thời điểm (time.monotonic) lookup hiện tại phải xong; None = chỉ áp REQUEST_TIMEOUT
+lookup_deadline: contextvars.ContextVar = contextvars.ContextVar("lookup_deadline", default=None)
+_health = HealthRegistry()
+
+# Lookup đang chạy: [số request trả None vì lỗi, breaker bỏ qua hoặc hết deadline]. Khác 0 thì
+# payload rỗng không có nghĩa là upstream "không có gì", không được nhớ làm kết quả âm
+lookup_failures: contextvars.ContextVar = contextvars.ContextVar("lookup_failures", default=None)
+
+def _note_failure(count: int = 1):
+    failures = lookup_failures.get()
+    if failures is not None:
+        failures[0] += count
+
+# Limiter theo host cho request nền (prefetch đặt vào context); None = request của người dùng, không giới hạn
+request_limiter: contextvars.ContextVar = contextvars.ContextVar("request_limiter", default=None)
+
 OPENVERSE_ENDPOINT = "https://api.openverse.engineering/v1/images"
+# Truy vấn Openverse chặt chưa về sau chừng này giây thì gửi thêm truy vấn lỏng hơn
+OPENVERSE_STAGGER = 0.6
 WIKI_SUMMARY       = "https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title}"
 WIKI_SEARCH        = "https://{lang}.wikipedia.org/w/rest.php/v1/search/page?q={q}&limit=1"
 WIKI_PAGEIMAGES    = "https://{lang}.wikipedia.org/w/api.php?action=query&format=json&prop=pageimages&titles={title}&pithumbsize=600&origin=*"
 COMMONS_MEDIASEARCH= "https://commons.wikimedia.org/w/api.php?action=query&format=json&generator=search&gsrnamespace=6&gsrlimit={n}&gsrsearch={q}&prop=imageinfo&iiprop=url|mime&iiurlwidth=600&origin=*"
 WIKIDATA_SEARCH    = "https://www.wikidata.org/w/api.php?action=wbsearchentities&format=json&language={lang}&search={q}&limit=1&origin=*"
+WIKI_API           = "https://{lang}.wikipedia.org/w/api.php"
+
+# titles=A|B|... nhận tối đa 50 tiêu đề mỗi request (client thường)
+MULTI_TITLE_LIMIT = 50
+BATCH_CONCURRENCY = 4
+_TITLE_FORBIDDEN = re.compile(r"[|#<>\[\]{}]")
 
 GOOGLE_NEWS_RSS    = "https://news.google.com/rss/search?q={q}&hl={hl}&gl={gl}&ceid={ceid}"
 DDG_IA             = "https://api.duckduckgo.com/?q={q}&format=json&no_html=1&skip_disambig=1"
 WIKT_DEF           = "https://en.wiktionary.org/api/rest_v1/page/definition/{term}"
 
+# Tên các hằng URL upstream ở trên, đổi được qua override_endpoints (vd. trỏ sang bench/mock_upstream.py)
+ENDPOINTS = ("OPENVERSE_ENDPOINT", "WIKI_SUMMARY", "WIKI_SEARCH", "WIKI_PAGEIMAGES", "COMMONS_MEDIASEARCH",
+             "WIKIDATA_SEARCH", "WIKI_API", "GOOGLE_NEWS_RSS", "DDG_IA", "WIKT_DEF")
+
+def override_endpoints(**urls: str) -> Dict[str, str]:
+    """Đổi URL của các upstream theo tên trong ENDPOINTS; trả giá trị cũ để khôi phục lại."""
+    unknown = set(urls) - set(ENDPOINTS)
+    if unknown:
+        raise ValueError(f"Không có endpoint: {', '.join(sorted(unknown))}")
+    module = globals()
+    previous = {name: module[name] for name in urls}
+    module.update(urls)
+    return previous
+
+def configure(search_config) -> None:
+    """Áp dụng [Search] từ config.ini; gọi 1 lần lúc khởi động, trước lookup đầu tiên."""
+    global PAYLOAD_CACHE_PATH, _payload_cache, _payload_cache_ttls, LOOKUP_DEADLINE, HEDGE_DELAY
+    global THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_BYTES, _thumbnail_cache, _use_thumbnail_scheme
+    global LOCAL_KB_PATH, _local_kb, SOURCE_STATS_PATH, ADAPTIVE_SOURCES, SOURCE_FALLBACK_DELAY, _ranking
+    if search_config.cache_path:
+        PAYLOAD_CACHE_PATH = search_config.cache_path
+    _payload_cache_ttls = {
+        "definition": search_config.definition_ttl,
+        "images": search_config.images_ttl,
+        "news": search_config.news_ttl,
+    }
+    _payload_cache = None
+    if search_config.thumbnail_cache_path:
+        THUMBNAIL_CACHE_DIR = search_config.thumbnail_cache_path
+    THUMBNAIL_CACHE_BYTES = search_config.thumbnail_cache_mb * 1024 * 1024
+    _thumbnail_cache = None
+    _use_thumbnail_scheme = search_config.cache_thumbnails
+    LOCAL_KB_PATH = search_config.local_kb_path or DEFAULT_KB_PATH
+    _local_kb = None
+    SOURCE_STATS_PATH = search_config.source_stats_path or DEFAULT_STATS_PATH
+    ADAPTIVE_SOURCES = search_config.adaptive_sources
+    SOURCE_FALLBACK_DELAY = search_config.source_fallback_delay
+    if _ranking is not None:
+        _ranking.save()
+    _ranking = None
+    LOOKUP_DEADLINE = search_config.lookup_deadline
+    HEDGE_DELAY = search_config.hedge_delay
+    _health.configure(search_config.breaker_failures, search_config.breaker_cooldown)
+    if search_config.prewarm_connections:
+        _runner.prewarm()
+
+def source_stats() -> Dict[str, Dict[str, Any]]:
+    """Trạng thái breaker và độ trễ p50/p95 của từng host upstream."""
+    return _health.snapshot()
+
+def definition_source_stats() -> Dict[str, Dict[str, Any]]:
+    """Tỉ lệ hit, độ trễ và điểm xếp hạng của từng nguồn định nghĩa theo ngôn ngữ."""
+    return get_source_ranking().snapshot()
+
+def get_source_ranking() -> SourceRanking:
+    global _ranking
+    if _ranking is None:
+        _ranking = SourceRanking(SOURCE_STATS_PATH, enabled=ADAPTIVE_SOURCES)
+    return _ranking
+
+@atexit.register
+def _save_source_ranking():
+    if _ranking is not None:
+        _ranking.save()
+
+def get_payload_cache() -> Optional[PayloadCache]:
+    global _payload_cache
+    if _payload_cache is None and PAYLOAD_CACHE_PATH:
+        try:
+            _payload_cache = PayloadCache(PAYLOAD_CACHE_PATH, _payload_cache_ttls, key_fn=lookup_key,
+                                          key_version=LOOKUP_KEY_VERSION)
+        except Exception as e:
+            print(f"Không mở được payload cache ({PAYLOAD_CACHE_PATH}): {e}")
+            return None
+    return _payload_cache
+
+def get_thumbnail_cache() -> Optional[ThumbnailCache]:
+    global _thumbnail_cache
+    if _thumbnail_cache is None and THUMBNAIL_CACHE_DIR:
+        try:
+            _thumbnail_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_BYTES)
+        except Exception as e:
+            print(f"Không mở được thumbnail cache ({THUMBNAIL_CACHE_DIR}): {e}")
+            return None
+    return _thumbnail_cache
+
+def get_local_kb() -> Optional[LocalKnowledgeBase]:
+    global _local_kb
+    if _local_kb is None and LOCAL_KB_PATH and os.path.exists(LOCAL_KB_PATH):
+        try:
+            _local_kb = LocalKnowledgeBase(LOCAL_KB_PATH)
+        except Exception as e:
+            print(f"Không mở được kho định nghĩa offline ({LOCAL_KB_PATH}): {e}")
+            return None
+    return _local_kb
+
+def _local_definition(kw: str, lang: str, prefix: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Định nghĩa từ kho offline. Mặc định chỉ khớp tiêu đề chính xác: đủ tin để bỏ qua mạng.
+    prefix=True (trang phân biệt nghĩa, prefix theo từ) chỉ dùng làm dự phòng khi mạng không có.
+    """
+    kb = get_local_kb()
+    if kb is None:
+        return None
+    try:
+        return kb.lookup(kw, lang, prefix=prefix)
+    except Exception as e:
+        print(f"Tra kho offline cho '{kw}' lỗi: {e}")
+        return None
+
+def thumbnail_src(url: str) -> str:
+    """URL ảnh cho panel: qua scheme cache khi UI đã bật, ngược lại giữ nguyên URL gốc."""
+    if not _use_thumbnail_scheme or not url.startswith(("http://", "https://")):
+        return url
+    token = base64.urlsafe_b64encode(url.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{THUMBNAIL_SCHEME}:{token}"
+
+def thumbnail_origin(src: str) -> Optional[str]:
+    """Ngược của thumbnail_src: URL gốc từ URL scheme, None nếu không hợp lệ."""
+    prefix = THUMBNAIL_SCHEME + ":"
+    if not src.startswith(prefix):
+        return None
+    token = src[len(prefix):].lstrip("/")
+    try:
+        return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+    except Exception:
+        return None
+
+def known_hosts() -> List[str]:
+    """Các host upstream mà 1 lookup sẽ gọi (đọc từ hằng endpoint hiện tại)."""
+    urls = [
+        OPENVERSE_ENDPOINT,
+        WIKI_SUMMARY.format(lang=DEFAULT_LANG, title="x"),
+        COMMONS_MEDIASEARCH.format(n=1, q="x"),
+        WIKIDATA_SEARCH.format(lang=DEFAULT_LANG, q="x"),
+        GOOGLE_NEWS_RSS.format(q="x", hl=DEFAULT_NEWS_HL, gl=DEFAULT_NEWS_GL, ceid=DEFAULT_NEWS_CEID),
+        DDG_IA.format(q="x"),
+        WIKT_DEF.format(term="x"),
+    ]
+    hosts = []
+    for u in urls:
+        parts = urllib.parse.urlsplit(u)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in hosts:
+            hosts.append(origin)
+    return hosts
+
+@contextlib.asynccontextmanager
+async def _session_scope(session: Optional[aiohttp.ClientSession] = None) -> AsyncIterator[aiohttp.ClientSession]:
+    """Session truyền vào > session pool của _runner (nếu đang chạy trên loop đó) > session tạm."""
+    if session is not None:
+        yield session
+    elif asyncio.get_running_loop() is _runner.loop:
+        yield await _runner.get_session()
+    else:
+        async with aiohttp.ClientSession(headers={"User-Agent": UA}) as tmp:
+            yield tmp
+
 def _now_iso() -> str:
     return dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
 def _norm_kw(kw: str) -> str:
     return (kw or "").strip()
 
+# Số nhiều tiếng Anh -> số ít cho từ cuối của keyword, chỉ dùng để dựng khoá. Chỉ giữ các luật
+# không gộp nhầm 2 từ khác nhau: "-ies"/"-ches" mơ hồ (movies/cities, caches/watches) thì chỉ
+# bỏ "s"; thiếu gộp chỉ tốn thêm 1 lần tra, gộp nhầm thì trả sai payload
+_PLURAL_RULES = ((re.compile(r"(olog|ograph|it|[ae]nc)ies$"), r"\1y"), (re.compile(r"ies$"), "ie"),
+                 (re.compile(r"(ss|x|sh|tch)es$"), r"\1"), (re.compile(r"([^siuj])s$"), r"\1"))
+# Từ tận cùng bằng "s" nhưng không phải số nhiều
+_INVARIANT_WORDS = {"series", "species", "news", "means", "physics", "mathematics", "economics",
+                    "politics", "ethics", "analytics", "robotics", "graphics", "diabetes", "chassis"}
+# Từ viết tắt viết hoa, có thể kèm "s" số nhiều: "GPU", "GPUs", "U.S.", ".NET"
+_ACRONYM = re.compile(r"([A-Z0-9]*[A-Z][A-Z0-9]*[A-Z0-9])s?")
+# Tăng khi đổi cách dựng khoá: PayloadCache dựng lại khoá của các entry đã lưu
+LOOKUP_KEY_VERSION = 2
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word in _INVARIANT_WORDS:
+        return word
+    for pattern, repl in _PLURAL_RULES:
+        single = pattern.sub(repl, word)
+        if single != word:
+            return single
+    return word
+
+def lookup_key(keyword: str) -> str:
+    """
+    Khoá cache/gộp request cho keyword: "Open AI", "OpenAI", "open-ai" -> "openai";
+    "Neural Networks" -> "neuralnetwork"; "Node.js", "nodejs" -> "nodejs". Dựa trên
+    _normalize_text (unidecode + lower), bỏ khoảng trắng và dấu nối, đưa từ cuối về số ít.
+    Keyword 1 từ dạng "Apple", "Windows" coi là tên riêng: giữ chữ hoa và không bỏ số nhiều,
+    để không trùng "apples"/"windows". Từ viết tắt ("GPU"/"GPUs", "U.S.", ".NET") giữ chữ hoa
+    nên không trùng "us", "net". Chỉ dùng làm khoá; upstream vẫn được tra bằng keyword gốc.
+    """
+    raw = (keyword or "").split()
+    # Bỏ dấu trước để không phụ thuộc unidecode với chữ Việt/Latin có dấu
+    folded = "".join(c for c in unicodedata.normalize("NFKD", keyword or "") if not unicodedata.combining(c))
+    if len(raw) == 1:
+        word = folded.strip()
+        acronym = _ACRONYM.fullmatch(word.replace(".", ""))
+        if acronym:
+            return acronym.group(1)
+        if word.isalpha() and word.istitle():
+            return word
+    tokens = re.sub(r"[-_/.]", " ", _normalize_text(folded)).split()
+    if not tokens:
+        # Chữ không chuyển được sang latin (thiếu unidecode): vẫn cần khoá khác rỗng
+        return "".join(raw).casefold()
+    # "C++", "C#" không được trùng khoá với "C"
+    symbols = "".join(re.findall(r"[+#]", keyword))
+    tokens[-1] = _singular(tokens[-1])
+    return "".join(tokens) + symbols
+
+def _empty_payload(keyword: str, lang: str) -> Dict[str, Any]:
+    return {"keyword": keyword, "lang": lang, "fetched_at": _now_iso(), "definition": None, "images": [], "news": []}
+
 def _cache_key(prefix: str, *parts: str) -> str:
     return prefix + "::" + "||".join(parts)
 
@@ -72,55 +362,253 @@ def _pick_first(items: List[Dict[str, Any]], n: int) -> List[Dict[str, Any]]:
         if len(out) >= n: break
     return out
 
-async def _get_json(session: aiohttp.ClientSession, url: str, **kw) -> Optional[Dict[str, Any]]:
+class _FlightLimiter:
+    """Limiter của caller nền đã mở 1 flight; lift() khi caller foreground tham gia để phần còn lại không bị giới hạn."""
+    def __init__(self, inner):
+        self.inner = inner
+        self.lifted = asyncio.Event()
+
+    def lift(self):
+        self.lifted.set()
+
+    async def acquire(self, host: str):
+        if self.lifted.is_set():
+            return
+        waiter = asyncio.ensure_future(self.inner.acquire(host))
+        lifted = asyncio.ensure_future(self.lifted.wait())
+        try:
+            await asyncio.wait({waiter, lifted}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            _cancel_pending(waiter, lifted)
+
+async def _single_flight(key: tuple, factory, *, keep_orphan: bool = True):
+    """
+    Các caller cùng key (trên cùng 1 loop) await chung 1 task thay vì gọi upstream lặp lại.
+    shield: 1 caller bị huỷ (click bị thay thế, prefetch bị dừng) không huỷ việc của caller khác.
+    Khi không còn ai chờ: keep_orphan=True -> task vẫn chạy xong để kết quả vào cache
+    (thumbnail), False -> huỷ luôn để lookup bị thay thế không tiếp tục tốn mạng.
+    Task dùng chung chạy với contextvars của caller đầu tiên; nếu đó là prefetch thì
+    request_limiter của nó được gỡ ngay khi 1 caller không giới hạn (click) tham gia.
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop),) + key
+    fut = _inflight.get(key)
+    limiter = request_limiter.get()
+    if fut is None:
+        ctx = contextvars.copy_context()
+        if limiter is not None:
+            _inflight_limiters[key] = flight_limiter = _FlightLimiter(limiter)
+            ctx.run(request_limiter.set, flight_limiter)
+        fut = ctx.run(loop.create_task, factory())
+        _inflight[key] = fut
+        _inflight_waiters[key] = 0
+
+        def _done(f, key=key):
+            if _inflight.get(key) is f:
+                del _inflight[key]
+                _inflight_waiters.pop(key, None)
+                _inflight_limiters.pop(key, None)
+            if not f.cancelled():
+                f.exception()  # tránh cảnh báo "exception was never retrieved" khi không còn ai chờ
+        fut.add_done_callback(_done)
+    elif limiter is None and key in _inflight_limiters:
+        _inflight_limiters.pop(key).lift()
+
+    _inflight_waiters[key] = _inflight_waiters.get(key, 0) + 1
     try:
-        async with session.get(url, timeout=10, **kw) as r:
-            if r.status == 200:
-                return await r.json()
-    except Exception:
+        return await asyncio.shield(fut)
+    finally:
+        left = _inflight_waiters.get(key, 1) - 1
+        if _inflight.get(key) is fut:
+            _inflight_waiters[key] = left
+        if left <= 0 and not keep_orphan and not fut.done():
+            fut.cancel()
+
+class _LookupProgress:
+    """Các section của 1 lookup đang chạy, theo thứ tự về; nhiều stream cùng đọc được."""
+    def __init__(self, key: tuple):
+        self.key = key
+        self.events: List[Tuple[str, Any]] = []
+        self.finished = False
+        # True khi 1 flight đã nhận publish/finish progress này; không thì stream tự finish
+        self.driven = False
+        self._waiters: List[asyncio.Future] = []
+
+    def publish(self, section: str, value: Any):
+        self.events.append((section, value))
+        self._wake()
+
+    def finish(self):
+        self.finished = True
+        if _lookup_progress.get(self.key) is self:
+            del _lookup_progress[self.key]
+        self._wake()
+
+    def _wake(self):
+        for w in self._waiters:
+            if not w.done():
+                w.set_result(None)
+        self._waiters = []
+
+    async def wait(self, seen: int):
+        """Chờ tới khi có section thứ `seen` trở đi hoặc lookup kết thúc."""
+        if len(self.events) > seen or self.finished:
+            return
+        w = asyncio.get_running_loop().create_future()
+        self._waiters.append(w)
+        await w
+
+def _progress_for(key: tuple) -> _LookupProgress:
+    key = (id(asyncio.get_running_loop()),) + key
+    progress = _lookup_progress.get(key)
+    if progress is None:
+        progress = _lookup_progress[key] = _LookupProgress(key)
+    return progress
+
+async def _throttle(url: str):
+    limiter = request_limiter.get()
+    if limiter is not None:
+        await limiter.acquire(urllib.parse.urlsplit(url).netloc)
+
+def _request_timeout() -> float:
+    deadline = lookup_deadline.get()
+    if deadline is None:
+        return REQUEST_TIMEOUT
+    return min(REQUEST_TIMEOUT, deadline - time.monotonic())
+
+async def _get(session: aiohttp.ClientSession, url: str, read, *, accept: Tuple[int, ...] = (200,), **kw):
+    """
+    1 GET qua breaker của host và deadline của lookup; None nếu bị bỏ qua, lỗi hoặc status
+    không nằm trong `accept`. Lỗi mạng/timeout/5xx/429 tính là host lỗi; 4xx khác vẫn là host khoẻ.
+    """
+    await _throttle(url)
+    timeout = _request_timeout()
+    health = _health.get(urllib.parse.urlsplit(url).netloc)
+    if timeout <= 0 or not health.allow():
+        _note_failure()
         return None
+    started = time.monotonic()
+    ok = cancelled = False
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout), **kw) as r:
+            ok = r.status < 500 and r.status != 429
+            if r.status in accept:
+                return await read(r)
+            if not ok:
+                _note_failure()
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    except asyncio.TimeoutError:
+        # Request bắt đầu khi deadline của lookup gần hết thì hết giờ không phải lỗi của host
+        cancelled = timeout < 1.0
+        _note_failure()
+    except Exception:
+        _note_failure()
+    finally:
+        if cancelled:
+            health.release()
+        else:
+            health.record(ok, time.monotonic() - started)
     return None
 
-async def _get_text(session: aiohttp.ClientSession, url: str, **kw) -> Optional[str]:
+async def _hedged(url: str, factory):
+    """Request chưa về sau HEDGE_DELAY -> gửi thêm 1 bản, lấy kết quả hợp lệ về trước, huỷ bản còn lại."""
+    first = asyncio.ensure_future(factory())
+    if HEDGE_DELAY <= 0:
+        return await first
+    done, _ = await asyncio.wait({first}, timeout=HEDGE_DELAY)
+    health = _health.get(urllib.parse.urlsplit(url).netloc)
+    if done or health.state != "closed" or _request_timeout() <= 0:
+        return await first
+    health.hedges += 1
+    second = asyncio.ensure_future(factory())
+    pending = {first, second}
     try:
-        async with session.get(url, timeout=10, **kw) as r:
-            if r.status == 200:
-                return await r.text()
-    except Exception:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.result() is not None:
+                    return t.result()
         return None
-    return None
+    finally:
+        _cancel_pending(first, second)
+
+async def _read_json(r):
+    return await r.json()
+
+async def _get_json(session: aiohttp.ClientSession, url: str, *, hedge: bool = False, **kw) -> Optional[Dict[str, Any]]:
+    """
+    GET JSON, gộp các request trùng URL+params đang bay trên cùng session. Kết quả dùng chung, chỉ đọc.
+    hedge=True cho các nguồn định nghĩa nằm trên đường găng của lookup.
+    """
+    params = tuple(sorted((kw.get("params") or {}).items()))
+    once = lambda: _get(session, url, _read_json, **kw)
+    fetch = (lambda: _hedged(url, once)) if hedge else once
+
+    async def run():
+        # Lỗi được đếm trong flight rồi báo cho mọi lookup đang chờ, không chỉ lookup mở flight
+        failures = [0]
+        token = lookup_failures.set(failures)
+        try:
+            return await fetch(), failures[0]
+        finally:
+            lookup_failures.reset(token)
+    data, failed = await _single_flight(("json", id(session), url, params), run, keep_orphan=False)
+    if failed:
+        _note_failure(failed)
+    return data
+
+def _wiki_summary(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not (data and data.get("title")):
+        return None
+    return {
+        "title": data.get("title"),
+        "extract": data.get("extract") or data.get("description"),
+        "url": (data.get("content_urls") or {}).get("desktop", {}).get("page"),
+        "thumbnail": (data.get("thumbnail") or {}).get("source"),
+    }
+
+async def _result(task: "asyncio.Future", default):
+    """Kết quả của task, hoặc default nếu task lỗi (giống gather(return_exceptions=True))."""
+    try:
+        return await task
+    except Exception:
+        return default
+
+def _cancel_pending(*tasks):
+    for t in tasks:
+        if t is not None and not t.done():
+            t.cancel()
 
 async def fetch_wikipedia_summary(session: aiohttp.ClientSession, keyword: str, lang: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     url = WIKI_SUMMARY.format(lang=lang, title=_quote(keyword.replace(" ", "_")))
-    data = await _get_json(session, url)
-    if data and data.get("title"):
-        return ({
-            "title": data.get("title"),
-            "extract": data.get("extract") or data.get("description"),
-            "url": (data.get("content_urls") or {}).get("desktop", {}).get("page"),
-            "thumbnail": (data.get("thumbnail") or {}).get("source"),
-        }, data.get("title"))
     s_url = WIKI_SEARCH.format(lang=lang, q=_quote(keyword))
-    s = await _get_json(session, s_url)
+    # Tìm kiếm chạy song song với summary thay vì chờ summary trượt mới bắt đầu
+    summary_task = asyncio.ensure_future(_get_json(session, url, hedge=True))
+    search_task = asyncio.ensure_future(_get_json(session, s_url, hedge=True))
+    try:
+        found = _wiki_summary(await _result(summary_task, None))
+        if found:
+            return found, found["title"]
+        s = await _result(search_task, None)
+    finally:
+        _cancel_pending(search_task)
+
     lst = (s or {}).get("pages") or (s or {}).get("results") or []
     if lst:
         title = lst[0].get("title") or lst[0].get("key")
         if title:
             url2 = WIKI_SUMMARY.format(lang=lang, title=_quote(title.replace(" ", "_")))
-            d2 = await _get_json(session, url2)
-            if d2 and d2.get("title"):
-                return ({
-                    "title": d2.get("title"),
-                    "extract": d2.get("extract") or d2.get("description"),
-                    "url": (d2.get("content_urls") or {}).get("desktop", {}).get("page"),
-                    "thumbnail": (d2.get("thumbnail") or {}).get("source"),
-                }, d2.get("title"))
+            found = _wiki_summary(await _get_json(session, url2, hedge=True))
+            if found:
+                return found, found["title"]
             return None, title
     return None, None
 
 async def fetch_wikidata_desc(session: aiohttp.ClientSession, keyword: str, lang: str) -> Optional[Dict[str, Any]]:
     url = WIKIDATA_SEARCH.format(lang=lang, q=_quote(keyword))
-    d = await _get_json(session, url)
+    d = await _get_json(session, url, hedge=True)
     try:
         s = (d or {}).get("search", [])
         if s:
@@ -136,7 +624,7 @@ async def fetch_wikidata_desc(session: aiohttp.ClientSession, keyword: str, lang
 
 async def fetch_wiktionary_definition(session: aiohttp.ClientSession, term: str) -> Optional[Dict[str, Any]]:
     url = WIKT_DEF.format(term=_quote(term))
-    data = await _get_json(session, url)
+    data = await _get_json(session, url, hedge=True)
     try:
         senses = (data or {}).get("en") or []
         defs = []
@@ -152,7 +640,7 @@ async def fetch_wiktionary_definition(session: aiohttp.ClientSession, term: str)
 
 async def fetch_ddg_instant_answer(session: aiohttp.ClientSession, keyword: str) -> Optional[Dict[str, Any]]:
     url = DDG_IA.format(q=_quote(keyword))
-    data = await _get_json(session, url)
+    data = await _get_json(session, url, hedge=True)
     if not data: return None
     abstract = data.get("AbstractText") or data.get("Abstract")
     link = data.get("AbstractURL") or data.get("Redirect")
@@ -165,7 +653,8 @@ async def fetch_wikipedia_images(session: aiohttp.ClientSession, canonical_title
     out: List[Dict[str, Any]] = []
 
     pi_url = WIKI_PAGEIMAGES.format(lang=lang, title=_quote(canonical_title.replace(" ", "_")))
-    pi = await _get_json(session, pi_url)
+    cms_url = COMMONS_MEDIASEARCH.format(n=max_images, q=_quote(canonical_title))
+    pi, cms = await asyncio.gather(_get_json(session, pi_url), _get_json(session, cms_url))
     try:
         pages = (pi or {}).get("query", {}).get("pages", {}) or {}
         for _, pg in pages.items():
@@ -175,8 +664,6 @@ async def fetch_wikipedia_images(session: aiohttp.ClientSession, canonical_title
     except Exception:
         pass
 
-    cms_url = COMMONS_MEDIASEARCH.format(n=max_images, q=_quote(canonical_title))
-    cms = await _get_json(session, cms_url)
     try:
         pages = (cms or {}).get("query", {}).get("pages", {}) or {}
         for _, pg in pages.items():
@@ -226,11 +713,33 @@ async def fetch_openverse_images(session: aiohttp.ClientSession, keyword: str, m
                 })
         return res
 
-    out.extend(await call({"title": keyword, "mature": "false", "page_size": max_images}))
-    if len(out) < max_images:
-        out.extend(await call({"q": f"\"{keyword}\"", "mature": "false", "page_size": max_images}))
-    if len(out) < max_images:
-        out.extend(await call({"q": keyword, "mature": "false", "page_size": max_images}))
+    # 3 truy vấn từ chặt tới lỏng, gộp theo đúng thứ tự đó. Truy vấn lỏng hơn chỉ được gửi khi
+    # truy vấn trước trả thiếu ảnh hoặc chưa về sau OPENVERSE_STAGGER giây; đủ ảnh thì huỷ phần còn lại
+    queries = [
+        {"title": keyword, "mature": "false", "page_size": max_images},
+        {"q": f"\"{keyword}\"", "mature": "false", "page_size": max_images},
+        {"q": keyword, "mature": "false", "page_size": max_images},
+    ]
+    tasks: List["asyncio.Future"] = []
+
+    def launch():
+        tasks.append(asyncio.ensure_future(call(queries[len(tasks)])))
+
+    launch()
+    try:
+        for i in range(len(queries)):
+            t = tasks[i]
+            while not t.done() and len(tasks) < len(queries):
+                done, _ = await asyncio.wait({t}, timeout=OPENVERSE_STAGGER)
+                if not done:
+                    launch()
+            out.extend(await _result(t, []))
+            if len(out) >= max_images:
+                break
+            if len(tasks) == i + 1 and len(tasks) < len(queries):
+                launch()
+    finally:
+        _cancel_pending(*tasks)
 
     scored = []
     for it in out:
@@ -244,70 +753,306 @@ async def fetch_openverse_images(session: aiohttp.ClientSession, keyword: str, m
     filtered = [x for x in scored if x["relevance"] >= 1.5] or scored[:max_images]
     return _pick_first(filtered, max_images)
 
+def _rss_item(elem: ET.Element) -> Dict[str, Any]:
+    return {
+        "title": (elem.findtext("title") or "").strip() or None,
+        "url": (elem.findtext("link") or "").strip() or None,
+        "published": (elem.findtext("pubDate") or "").strip() or None,
+        "source": (elem.findtext("source") or "").strip() or None,
+    }
+
+async def _drain(content: aiohttp.StreamReader, limit: int):
+    """Đọc bỏ phần body còn lại (tối đa limit byte) để connection keep-alive dùng lại được."""
+    read = 0
+    while read <= limit:
+        chunk = await content.readany()
+        if not chunk:
+            return
+        read += len(chunk)
+
+def _news_reader(max_items: int):
+    """
+    Đọc RSS theo từng chunk qua XMLPullParser, dừng parse ngay khi đủ max_items <item>. Phần
+    còn lại của body được đọc bỏ (không parse) tối đa NEWS_DRAIN_BYTES để connection được trả
+    về pool; feed dài hơn thì để aiohttp đóng connection thay vì tải hết.
+    304 -> ("not_modified", ...) để dùng lại kết quả cũ; XML lỗi -> ("partial", ...), không
+    được lưu làm kết quả chuẩn của ETag.
+    """
+    async def read(r):
+        validators = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+        if r.status == 304:
+            return "not_modified", validators, None
+        parser = ET.XMLPullParser(events=("end",))
+        items: List[Dict[str, Any]] = []
+        try:
+            async for chunk in r.content.iter_chunked(NEWS_CHUNK_SIZE):
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    if elem.tag == "item":
+                        items.append(_rss_item(elem))
+                        elem.clear()
+                        if len(items) >= max_items:
+                            await _drain(r.content, NEWS_DRAIN_BYTES)
+                            return "ok", validators, items
+        except ET.ParseError as e:
+            print(f"RSS news lỗi cú pháp sau {len(items)} mục: {e}")
+            return "partial", validators, items
+        return "ok", validators, items
+    return read
+
 async def fetch_google_news(session: aiohttp.ClientSession, keyword: str, *, max_items: int,
                             hl: str, gl: str, ceid: str, window_days: int = NEWS_WINDOW_DAYS) -> List[Dict[str, Any]]:
+    """
+    News từ Google News RSS. Hết TTL thì hỏi lại bằng If-None-Match/If-Modified-Since:
+    feed không đổi (304) thì dùng lại kết quả cũ, không tải và parse lại.
+    """
     key = _cache_key("news", keyword.lower(), str(max_items), hl, gl, ceid, str(window_days))
     if key in cache: 
         return cache[key]
     q = f"\"{keyword}\" when:{window_days}d"
     url = GOOGLE_NEWS_RSS.format(q=_quote(q), hl=hl, gl=gl, ceid=ceid)
-    try:
-        async with session.get(url, timeout=10, headers={"User-Agent": UA}) as r:
-            if r.status != 200: return []
-            xml = await r.text()
-    except Exception:
+    headers = {"User-Agent": UA}
+    previous = _news_validators.get(key)
+    if previous is not None:
+        if previous["etag"]:
+            headers["If-None-Match"] = previous["etag"]
+        if previous["last_modified"]:
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+    got = await _get(session, url, _news_reader(max_items), accept=(200, 304), headers=headers)
+    if got is None:
         return []
-    feed = await asyncio.to_thread(feedparser.parse, xml)
-    out = []
-    for e in feed.entries[:max_items]:
-        out.append({
-            "title": e.get("title"),
-            "url": e.get("link"),
-            "published": e.get("published"),
-            "source": (e.get("source") or {}).get("title") if isinstance(e.get("source"), dict) else None
-        })
+    status, validators, out = got
+    if status == "partial":
+        return out
+    if status == "not_modified":
+        if previous is None:
+            return []
+        out = previous["items"]
+        validators = {k: validators[k] or previous[k] for k in validators}
+    if validators["etag"] or validators["last_modified"]:
+        _news_validators[key] = {**validators, "items": out}
     cache[key] = out
     return out
 
+def _news_params(lang: str) -> Dict[str, Any]:
+    return {
+        "hl": ("vi" if lang.startswith("vi") else DEFAULT_NEWS_HL),
+        "gl": ("VN" if lang.startswith("vi") else DEFAULT_NEWS_GL),
+        "ceid": ("VN:vi" if lang.startswith("vi") else DEFAULT_NEWS_CEID),
+        "window_days": NEWS_WINDOW_DAYS,
+    }
+
 async def fetch_keyword_info(keyword: str, *, lang: str = DEFAULT_LANG,
-                             max_images: int = 6, max_news: int = 6) -> Dict[str, Any]:
+                             max_images: int = 6, max_news: int = 6,
+                             session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
+    """
+    Lookup đầy đủ cho 1 keyword. Các lời gọi trùng lookup_key (double-click, click chen prefetch,
+    "OpenAI"/"Open AI") đang chạy cùng lúc chờ chung 1 lần fan-out; payload dùng chung, chỉ đọc.
+    Keyword vừa tra không ra gì trong NEGATIVE_TTL giây trả rỗng luôn, không gọi upstream.
+    """
     kw = _norm_kw(keyword)
-    if not kw:
-        return {"keyword": keyword, "lang": lang, "fetched_at": _now_iso(), "definition": None, "images": [], "news": []}
-
-    async with aiohttp.ClientSession(headers={"User-Agent": UA}) as session:
-        wiki_task = fetch_wikipedia_summary(session, kw, lang=lang)
-        ddg_task  = fetch_ddg_instant_answer(session, kw)
-        wikt_task = fetch_wiktionary_definition(session, kw)
-        wd_task   = fetch_wikidata_desc(session, kw, lang=lang)
-
-        (definition, canonical), ddg, wikt, wd = await asyncio.gather(
-            wiki_task, ddg_task, wikt_task, wd_task, return_exceptions=True
-        )
-        if isinstance(definition, Exception): definition, canonical = None, None
-        if isinstance(ddg, Exception): ddg = None
-        if isinstance(wikt, Exception): wikt = None
-        if isinstance(wd, Exception): wd = None
-
-        final_def = definition or wd or ddg or wikt
-        canonical_title = canonical or (final_def.get("title") if final_def else None)
-
-        images: List[Dict[str, Any]] = []
-        if canonical_title:
-            imgs_wp = await fetch_wikipedia_images(session, canonical_title, lang, max_images)
-            images.extend(imgs_wp)
-        if len(images) < max_images:
-            imgs_ov = await fetch_openverse_images(session, canonical_title or kw, max_images)
-            images.extend(imgs_ov)
-        images = _pick_first(images, max_images)
-
-        news = await fetch_google_news(
-            session, kw, max_items=max_news,
-            hl=("vi" if lang.startswith("vi") else DEFAULT_NEWS_HL),
-            gl=("VN" if lang.startswith("vi") else DEFAULT_NEWS_GL),
-            ceid=("VN:vi" if lang.startswith("vi") else DEFAULT_NEWS_CEID),
-            window_days=NEWS_WINDOW_DAYS
-        )
+    key = lookup_key(kw)
+    if not key or (key, lang) in _negative:
+        return _empty_payload(kw or keyword, lang)
+    if session is not None:
+        # Session của caller có thể bị đóng khi caller xong, không chia sẻ cho người khác
+        return _remember_negative(key, lang, await _fetch_keyword_info(kw, lang, max_images, max_news, session))
+    flight_key = ("keyword", key, lang, max_images, max_news)
+    progress = _progress_for(flight_key)
+
+    async def run():
+        return _remember_negative(key, lang, await _fetch_keyword_info(kw, lang, max_images, max_news, None, progress))
+
+    def start():
+        # Chỉ gọi khi flight mới được tạo; nhập flight đang chạy thì progress này không ai publish
+        progress.driven = True
+        return run()
+    # Không còn ai chờ (click bị thay thế, prefetch bị huỷ) -> huỷ cả fan-out để nhả mạng
+    return await _single_flight(flight_key, start, keep_orphan=False)
+
+def _remember_negative(key: str, lang: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Chỉ nhớ kết quả rỗng khi mọi nguồn đã thực sự trả lời (không lỗi, không bị breaker/deadline bỏ qua)."""
+    incomplete = (data.get("meta") or {}).get("incomplete")
+    if not incomplete and not (data.get("definition") or data.get("images") or data.get("news")):
+        _negative[(key, lang)] = True
+    return data
+
+def _cacheable_sections(data: Dict[str, Any]) -> Tuple[str, ...]:
+    """Lookup có request lỗi: section rỗng có thể chỉ do lỗi, không ghi đè/ghi vào cache đĩa."""
+    if not (data.get("meta") or {}).get("incomplete"):
+        return SECTIONS
+    return tuple(sec for sec in SECTIONS if data.get(sec))
+
+async def _fetch_keyword_info(kw: str, lang: str, max_images: int, max_news: int,
+                              session: Optional[aiohttp.ClientSession],
+                              progress: Optional[_LookupProgress] = None) -> Dict[str, Any]:
+    """
+    Chạy lookup theo đồ thị phụ thuộc: news, ảnh Openverse (theo keyword) và 4 nguồn định nghĩa
+    bắt đầu ngay; chỉ ảnh Wikipedia/Commons chờ tiêu đề chuẩn. Tổng thời gian ~ chuỗi dài nhất.
+    Mỗi section xong được publish ngay vào `progress` cho aiter_keyword_info.
+    """
+    publish = progress.publish if progress is not None else (lambda section, value: None)
+    # Mọi request con (kể cả task tạo sau) thừa hưởng deadline qua context
+    token = lookup_deadline.set(time.monotonic() + LOOKUP_DEADLINE) if LOOKUP_DEADLINE > 0 else None
+    failures = [0]
+    failures_token = lookup_failures.set(failures)
+    try:
+        data = await _run_keyword_graph(kw, lang, max_images, max_news, session, publish)
+        if failures[0]:
+            data.setdefault("meta", {})["incomplete"] = True
+        return data
+    finally:
+        lookup_failures.reset(failures_token)
+        if token is not None:
+            lookup_deadline.reset(token)
+        if progress is not None:
+            progress.finish()
+
+def _has_extract(definition: Optional[Dict[str, Any]]) -> bool:
+    return bool(definition and definition.get("extract"))
+
+async def _definition_tiers(session: aiohttp.ClientSession, kw: str, lang: str,
+                            on_canonical) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Định nghĩa từ các nguồn mạng, trả (definition, tiêu đề Wikipedia chuẩn).
+    Wikipedia luôn được gọi trước (cho extract đầy đủ và tiêu đề chuẩn mà ảnh cần). Đã đủ thống
+    kê: các nguồn dự phòng xếp theo thống kê, nguồn kế tiếp chỉ được gọi khi nguồn trước không có
+    extract/lỗi hoặc chưa xong sau fallback_delay; kết quả đầu tiên có extract thắng, nguồn còn
+    chạy bị huỷ. Chưa đủ thống kê: gọi tất cả song song, trả ngay khi mọi nguồn đứng trước theo
+    DEFINITION_SOURCES đã xong mà không có extract và nguồn kế tiếp có extract; các nguồn còn
+    lại chạy nốt ở nền để được ghi thống kê.
+    on_canonical(title) được gọi ngay khi Wikipedia cho tiêu đề chuẩn để tải ảnh sớm.
+    """
+    factories = {
+        "wikipedia": lambda: fetch_wikipedia_summary(session, kw, lang=lang),
+        "wikidata": lambda: fetch_wikidata_desc(session, kw, lang=lang),
+        "ddg": lambda: fetch_ddg_instant_answer(session, kw),
+        "wiktionary": lambda: fetch_wiktionary_definition(session, kw),
+    }
+    ranking = get_source_ranking()
+    order = ranking.ranked(DEFINITION_SOURCES[1:], lang)
+    tiered = order is not None
+    if tiered:
+        order = [DEFINITION_SOURCES[0]] + order
+    waiting = list(order or DEFINITION_SOURCES)
+    loop = asyncio.get_running_loop()
+    started: Dict["asyncio.Future", Tuple[str, float]] = {}
+    found: Dict[str, Optional[Dict[str, Any]]] = {}
+    running: set = set()
+    canonical = None
+    deadline = None
+
+    def launch():
+        nonlocal deadline
+        source = waiting.pop(0)
+        task = asyncio.ensure_future(factories[source]())
+        started[task] = (source, loop.time())
+        running.add(task)
+        deadline = loop.time() + ranking.fallback_delay(source, lang, SOURCE_FALLBACK_DELAY)
+
+    def settle(task) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Ghi thống kê cho task đã xong; trả (definition, tiêu đề chuẩn nếu là Wikipedia)."""
+        source, t0 = started[task]
+        value = None if task.cancelled() or task.exception() is not None else task.result()
+        title = None
+        if source == "wikipedia":
+            value, title = value or (None, None)
+        # Chỉ có URL/mô tả rỗng (vd. Wikidata không có description) không tính là trả lời được
+        ranking.record(source, lang, _has_extract(value), loop.time() - t0)
+        return value, title
+
+    def settle_late(task):
+        if not task.cancelled():
+            settle(task)
+
+    launch()
+    while waiting and not tiered:
+        launch()
+    answered = False
+    try:
+        while running:
+            timeout = max(0.0, deadline - loop.time()) if waiting else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            running.difference_update(done)
+            for task in done:
+                value, title = settle(task)
+                if title:
+                    canonical = title
+                    on_canonical(title)
+                found[started[task][0]] = value
+            if not tiered:
+                # Song song: trả ngay khi nguồn ưu tiên cao nhất còn có thể thắng đã có extract
+                for source in DEFINITION_SOURCES:
+                    if source not in found:
+                        break
+                    if _has_extract(found[source]):
+                        answered = True
+                        return found[source], canonical
+                continue
+            hit = next((found[s] for s in order if _has_extract(found.get(s))), None)
+            if hit is not None:
+                return hit, canonical
+            # Hết hạn chờ hoặc nguồn vừa xong trả rỗng -> gọi nguồn kế tiếp
+            if waiting:
+                launch()
+        ranked = [found.get(s) for s in DEFINITION_SOURCES]
+        best = next((v for v in ranked if _has_extract(v)), None) or next((v for v in ranked if v is not None), None)
+        return best, canonical
+    finally:
+        if answered:
+            # Song song: request đã gửi, để nguồn chậm chạy nốt ở nền và vẫn ghi thống kê.
+            # Huỷ thì nguồn dự phòng chỉ có mẫu khi Wikipedia trượt, ranked() mãi chưa đủ MIN_SAMPLES
+            for task in running:
+                task.add_done_callback(settle_late)
+        else:
+            _cancel_pending(*started)
+
+async def _run_keyword_graph(kw: str, lang: str, max_images: int, max_news: int,
+                             session: Optional[aiohttp.ClientSession], publish) -> Dict[str, Any]:
+    async with _session_scope(session) as session:
+        spawn = asyncio.ensure_future
+        news_task = spawn(fetch_google_news(session, kw, max_items=max_news, **_news_params(lang)))
+        # News thường về trước ảnh: publish ngay khi xong thay vì chờ theo thứ tự
+        news_task.add_done_callback(
+            lambda t: publish("news", t.result()) if not t.cancelled() and t.exception() is None else None)
+        ov_task = spawn(fetch_openverse_images(session, kw, max_images))
+        # Kho offline trả lời trong chưa tới 1ms: khớp đúng tiêu đề thì bỏ hẳn 4 nguồn định nghĩa qua mạng
+        local = _local_definition(kw, lang)
+        wp_task = None
+
+        def start_images(title: str):
+            nonlocal wp_task
+            if wp_task is None:
+                wp_task = spawn(fetch_wikipedia_images(session, title, lang, max_images))
+        try:
+            if local is not None:
+                final_def, canonical_title = local, local["title"]
+                publish("definition", final_def)
+                start_images(canonical_title)
+            else:
+                # Wikipedia cho tiêu đề chuẩn thì lấy ảnh ngay, không chờ định nghĩa chốt xong
+                final_def, canonical = await _definition_tiers(session, kw, lang, start_images)
+                if not _has_extract(final_def):
+                    # Mạng không có: mới dùng tới khớp prefix của kho offline
+                    final_def = _local_definition(kw, lang, prefix=True) or final_def
+                canonical_title = canonical or (final_def.get("title") if final_def else None)
+                publish("definition", final_def)
+                if canonical_title:
+                    start_images(canonical_title)
+
+            images: List[Dict[str, Any]] = []
+            if wp_task is not None:
+                images.extend(await _result(wp_task, []))
+            if len(images) < max_images:
+                images.extend(await _result(ov_task, []))
+            images = _pick_first(images, max_images)
+            publish("images", images)
+
+            news = await _result(news_task, [])
+        finally:
+            # Openverse không còn cần khi ảnh Wikipedia đã đủ; lỗi giữa chừng cũng không để task mồ côi
+            _cancel_pending(news_task, ov_task, wp_task)
 
         return {
             "keyword": kw,
@@ -319,14 +1064,130 @@ async def fetch_keyword_info(keyword: str, *, lang: str = DEFAULT_LANG,
             "meta": {"canonical_title": canonical_title}
         }
 
-def render_keyword_html(payload: Dict[str, Any]) -> str:
-    kw = html.escape(payload.get("keyword", ""))
-    defn = payload.get("definition") or {}
-    images = payload.get("images") or []
-    news = payload.get("news") or []
+async def _refresh_cached(kw: str, lang: str, stale: List[str], max_images: int, max_news: int):
+    pc = get_payload_cache()
+    try:
+        if stale == ["news"]:
+            cached, _ = pc.get(kw, lang)
+            failures = [0]
+            token = lookup_failures.set(failures)
+            try:
+                async with _session_scope() as session:
+                    cached["news"] = await fetch_google_news(session, kw, max_items=max_news, **_news_params(lang))
+            finally:
+                lookup_failures.reset(token)
+            if cached["news"] or not failures[0]:
+                pc.put(cached, sections=("news",))
+        else:
+            data = await fetch_keyword_info(kw, lang=lang, max_images=max_images, max_news=max_news)
+            pc.put(data, sections=_cacheable_sections(data))
+    except Exception as e:
+        print(f"Làm mới cache cho '{kw}' thất bại: {e}")
 
-    if not defn and not images and not news:
-        return f"""
+def _schedule_refresh(kw: str, lang: str, stale: List[str], max_images: int, max_news: int):
+    key = (lookup_key(kw), lang)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.get_running_loop().create_task(_refresh_cached(kw, lang, stale, max_images, max_news))
+    _refresh_tasks.add(task)
+
+    def _done(t):
+        _refresh_tasks.discard(t)
+        _refreshing.discard(key)
+    task.add_done_callback(_done)
+
+async def fetch_keyword_info_cached(keyword: str, *, lang: str = DEFAULT_LANG,
+                                    max_images: int = 6, max_news: int = 6) -> Dict[str, Any]:
+    """
+    fetch_keyword_info qua cache đĩa (stale-while-revalidate):
+      - còn hạn -> trả ngay
+      - đã cũ -> vẫn trả ngay, làm mới các section cũ ở nền
+      - chưa có -> fetch rồi ghi cache
+    """
+    kw = _norm_kw(keyword)
+    pc = get_payload_cache()
+    if not kw or pc is None:
+        return await fetch_keyword_info(keyword, lang=lang, max_images=max_images, max_news=max_news)
+
+    cached, stale = pc.get(kw, lang)
+    if cached is not None:
+        if stale:
+            _schedule_refresh(kw, lang, stale, max_images, max_news)
+        return cached
+
+    return await _fetch_and_store(kw, lang, max_images, max_news)
+
+async def _fetch_and_store(kw: str, lang: str, max_images: int, max_news: int) -> Dict[str, Any]:
+    """Fetch rồi ghi cache, chạy chung 1 lần theo key; caller cuối cùng bỏ đi thì huỷ luôn."""
+    async def run():
+        data = await fetch_keyword_info(kw, lang=lang, max_images=max_images, max_news=max_news)
+        pc = get_payload_cache()
+        if pc is not None:
+            pc.put(data, sections=_cacheable_sections(data))
+            # Alias: "openai models" ra trang OpenAI -> click "OpenAI" sau đó là cache hit.
+            # News tra theo câu chữ nên không chép, section đó sẽ được làm mới theo keyword mới
+            title = (data.get("meta") or {}).get("canonical_title")
+            if data.get("definition") and title and lookup_key(title) != lookup_key(kw):
+                cached, _ = pc.get(title, lang)
+                if cached is None:
+                    pc.put({**data, "keyword": title}, sections=("definition", "images"))
+        return data
+    return await _single_flight(("store", lookup_key(kw), lang, max_images, max_news), run, keep_orphan=False)
+
+async def aiter_keyword_info(keyword: str, *, lang: str = DEFAULT_LANG, max_images: int = 6,
+                             max_news: int = 6) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Lookup dạng stream: yield (section, payload một phần) ngay khi từng section
+    (definition / images / news) về, theo thứ tự về; cuối cùng là ("done", payload đầy đủ).
+    Cache hit chỉ yield ("done", ...). Dừng đọc giữa chừng chỉ huỷ lookup khi không còn ai khác chờ nó.
+    """
+    kw = _norm_kw(keyword)
+    pc = get_payload_cache()
+    if kw and pc is not None:
+        cached, stale = pc.get(kw, lang)
+        if cached is not None:
+            if stale:
+                _schedule_refresh(kw, lang, stale, max_images, max_news)
+            yield "done", cached
+            return
+    if not kw:
+        yield "done", await fetch_keyword_info(keyword, lang=lang, max_images=max_images, max_news=max_news)
+        return
+
+    progress = _progress_for(("keyword", lookup_key(kw), lang, max_images, max_news))
+    flight = asyncio.ensure_future(_fetch_and_store(kw, lang, max_images, max_news))
+    partial = {"keyword": kw, "lang": lang, "fetched_at": _now_iso(),
+               "definition": None, "images": [], "news": [], "meta": {}}
+    seen = 0
+    try:
+        while True:
+            waiter = asyncio.ensure_future(progress.wait(seen))
+            await asyncio.wait({waiter, flight}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            for section, value in progress.events[seen:]:
+                partial[section] = value
+                yield section, partial
+            seen = len(progress.events)
+            if flight.done() or progress.finished:
+                break
+        data = await flight
+    finally:
+        _cancel_pending(flight)
+        # Không flight nào nhận progress (negative cache, key rỗng, nhập flight đã publish xong),
+        # hoặc flight bị huỷ trước khi kịp chạy: tự gỡ khỏi _lookup_progress
+        if not progress.finished and (not progress.driven or progress.key not in _inflight):
+            progress.finish()
+    yield "done", data
+
+# id phần tử trong panel cho từng section, để cập nhật tại chỗ khi section về
+SECTION_IDS = {"definition": "kw-definition", "images": "kw-images", "news": "kw-news", "footer": "kw-footer"}
+# Ngữ cảnh trong transcript: có sẵn cục bộ, không thuộc payload tra mạng
+TRANSCRIPT_SECTION_ID = "kw-transcript"
+
+def render_not_found_html(keyword: str) -> str:
+    kw = html.escape(keyword or "")
+    return f"""
         <div style='display: flex; flex-direction: column; align-items: center; justify-content: center; height: 100%; font-family: Segoe UI, sans-serif; color: #DCDDDE; text-align: center; padding: 20px;'>
             <p style='font-size: 48px; margin: 0;'>🤔</p>
             <h3 style='margin-top: 15px;'>Không tìm thấy thông tin</h3>
@@ -334,39 +1195,236 @@ def render_keyword_html(payload: Dict[str, Any]) -> str:
         </div>
         """
 
+def render_definition_html(defn: Optional[Dict[str, Any]]) -> str:
+    defn = defn or {}
+    return (
+        f'<div class="definition"><p>{html.escape(defn.get("extract") or "No definition found.")}</p>'
+        + (f'<p><a href="{html.escape(defn.get("url") or "#")}" target="_blank" rel="noopener">Source</a></p>' if defn.get("url") else "")
+        + "</div>"
+    )
+
+def render_images_html(images: List[Dict[str, Any]], keyword: str) -> str:
+    kw = html.escape(keyword or "")
     img_html = "".join(
         f'<a href="{html.escape(i.get("url") or "#")}" target="_blank" rel="noopener">'
-        f'<img src="{html.escape(i.get("thumbnail") or "")}" alt="{html.escape(i.get("title") or kw)}" '
+        f'<img src="{html.escape(thumbnail_src(i.get("thumbnail") or ""))}" alt="{html.escape(i.get("title") or kw)}" '
         f'style="width:120px;height:120px;object-fit:cover;border-radius:8px;margin:4px;"/></a>'
-        for i in images if i.get("thumbnail")
+        for i in (images or []) if i.get("thumbnail")
     )
+    if not img_html:
+        return '<p><i>No images found.</i></p>'
+    return '<h4>Images</h4><div class="images" style="display:flex;flex-wrap:wrap;">' + img_html + '</div>'
+
+def render_news_html(news: List[Dict[str, Any]]) -> str:
     news_html = "".join(
         f'<li><a href="{html.escape(n.get("url") or "#")}" target="_blank" rel="noopener">{html.escape(n.get("title") or "")}</a>'
         + (f' <span style="color:#777;font-size:12px;">({html.escape(n.get("published") or "")})</span>' if n.get("published") else "")
         + "</li>"
-        for n in news
+        for n in (news or [])
     )
+    if not news_html:
+        return '<p><i>No recent news.</i></p>'
+    return '<h4>Latest News</h4><ul class="news">' + news_html + '</ul>'
 
-    defn_block = (
-        f'<div class="definition"><p>{html.escape(defn.get("extract") or "No definition found.")}</p>'
-        + (f'<p><a href="{html.escape(defn.get("url") or "#")}" target="_blank" rel="noopener">Source</a></p>' if defn.get("url") else "")
-        + "</div>"
+def render_footer_html(payload: Dict[str, Any]) -> str:
+    return f'<small>Fetched at {html.escape(payload.get("fetched_at", ""))}</small>'
+
+def render_section_html(section: str, payload: Dict[str, Any]) -> str:
+    if section == "definition":
+        return render_definition_html(payload.get("definition"))
+    if section == "images":
+        return render_images_html(payload.get("images"), payload.get("keyword", ""))
+    if section == "news":
+        return render_news_html(payload.get("news"))
+    return render_footer_html(payload)
+
+def render_transcript_contexts_html(contexts: List[Dict[str, Any]], total: int) -> str:
+    """Các đoạn transcript có keyword (TextProcessor.get_contexts), hiện ngay khi click."""
+    if not contexts:
+        return ""
+    rows = "".join(
+        f'<li><span style="color:#777;font-size:12px;">{int(c["at"]) // 60:02d}:{int(c["at"]) % 60:02d}</span> '
+        f'{html.escape(c["before"])}<b>{html.escape(c["match"])}</b>{html.escape(c["after"])}</li>'
+        for c in contexts
     )
+    more = f' <span style="color:#777;font-size:12px;">({total} mentions)</span>' if total > len(contexts) else ""
+    return f'<h4>In this transcript{more}</h4><ul class="transcript">{rows}</ul>'
 
-    html_out = f"""
+def _keyword_layout(keyword: str, sections: Dict[str, str], transcript: str = "") -> str:
+    return f"""
     <div class="kw-info">
-      <h3>Results for <span class="keyword">{kw}</span></h3>
-      {defn_block}
-      {'<h4>Images</h4><div class="images" style="display:flex;flex-wrap:wrap;">'+img_html+'</div>' if img_html else '<p><i>No images found.</i></p>'}
-      {'<h4>Latest News</h4><ul class="news">'+news_html+'</ul>' if news_html else '<p><i>No recent news.</i></p>'}
+      <h3>Results for <span class="keyword">{html.escape(keyword or "")}</span></h3>
+      <div id="{TRANSCRIPT_SECTION_ID}">{transcript}</div>
+      <div id="{SECTION_IDS['definition']}">{sections['definition']}</div>
+      <div id="{SECTION_IDS['images']}">{sections['images']}</div>
+      <div id="{SECTION_IDS['news']}">{sections['news']}</div>
       <hr>
-      <small>Fetched at {html.escape(payload.get("fetched_at",""))}</small>
+      <div id="{SECTION_IDS['footer']}">{sections['footer']}</div>
+    </div>
+    """
+
+def render_keyword_skeleton(keyword: str, transcript_html: str = "") -> str:
+    """Khung panel với các section đang tải, được điền dần bằng render_section_html."""
+    loading = "<p style='color:#B9BBBE;'><i>Loading...</i></p>"
+    return _keyword_layout(keyword, {"definition": loading, "images": loading, "news": loading, "footer": ""},
+                           transcript_html)
+
+def render_keyword_html(payload: Dict[str, Any]) -> str:
+    defn = payload.get("definition") or {}
+    images = payload.get("images") or []
+    news = payload.get("news") or []
+
+    if not defn and not images and not news:
+        return render_not_found_html(payload.get("keyword", ""))
+    return _keyword_layout(payload.get("keyword", ""), {sec: render_section_html(sec, payload) for sec in SECTION_IDS})
+
+async def _read_image(r) -> Optional[Tuple[bytes, str]]:
+    content_type = (r.headers.get("Content-Type") or "").split(";")[0].strip()
+    if not content_type.startswith("image/"):
+        return None
+    return await r.read(), content_type
+
+async def fetch_thumbnail(url: str) -> Optional[Tuple[bytes, str]]:
+    """(bytes, content type) của 1 thumbnail: từ cache đĩa, hoặc tải qua session pool rồi ghi cache."""
+    tc = get_thumbnail_cache()
+    if tc is not None:
+        hit = tc.get(url)
+        if hit is not None:
+            return hit
+
+    async def download():
+        async with _session_scope() as session:
+            got = await _get(session, url, _read_image)
+        if got is not None and tc is not None:
+            tc.put(url, *got)
+        return got
+    return await _single_flight(("thumbnail", url), download)
+
+async def _fetch_title_batch(session: aiohttp.ClientSession, titles: List[str], lang: str) -> Dict[str, Dict[str, Any]]:
+    """
+    1 lượt MediaWiki cho nhiều tiêu đề: extract đoạn mở đầu + ảnh đại diện + URL, theo cả
+    normalize và redirect. exintro chỉ trả tối đa 20 extract mỗi response nên đi tiếp theo
+    `continue` cho phần còn lại của cùng lô. Trả {tiêu đề gửi lên: page}.
+    """
+    params = {
+        "action": "query", "format": "json", "formatversion": "2", "origin": "*",
+        "prop": "extracts|pageimages|info", "inprop": "url",
+        "exintro": "1", "explaintext": "1", "exlimit": "max", "pithumbsize": "600",
+        "redirects": "1", "titles": "|".join(titles),
+    }
+    pages: Dict[str, Dict[str, Any]] = {}
+    aliases: Dict[str, str] = {}
+    cont: Dict[str, Any] = {}
+    while True:
+        data = await _get_json(session, WIKI_API.format(lang=lang), params={**params, **cont})
+        if not data:
+            break
+        q = data.get("query") or {}
+        for m in (q.get("normalized") or []) + (q.get("redirects") or []):
+            aliases[m.get("from")] = m.get("to")
+        for pg in q.get("pages") or []:
+            if pg.get("missing") or pg.get("invalid") or not pg.get("title"):
+                continue
+            entry = pages.setdefault(pg["title"], {"title": pg["title"]})
+            if pg.get("extract"):
+                entry["extract"] = pg["extract"]
+            if pg.get("fullurl"):
+                entry["url"] = pg["fullurl"]
+            if (pg.get("thumbnail") or {}).get("source"):
+                entry["thumbnail"] = pg["thumbnail"]["source"]
+        if "continue" not in data:
+            break
+        cont = data["continue"]
+
+    out = {}
+    for t in titles:
+        final, seen = t, set()
+        while final in aliases and final not in seen:
+            seen.add(final)
+            final = aliases[final]
+        if final in pages:
+            out[t] = pages[final]
+    return out
+
+def _batch_entry(kw: str, definition: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    images = []
+    if definition and definition.get("thumbnail"):
+        images.append({"thumbnail": definition["thumbnail"], "url": definition["thumbnail"],
+                       "title": definition.get("title") or kw, "source": "wikipedia"})
+    return {"keyword": kw, "definition": definition, "images": images}
+
+async def fetch_many_keywords(keywords: List[str], *, lang: str = DEFAULT_LANG,
+                              batch_size: int = MULTI_TITLE_LIMIT, concurrency: int = BATCH_CONCURRENCY,
+                              session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Định nghĩa + ảnh đại diện cho nhiều keyword một lúc: kho offline trước, phần còn lại gom
+    `batch_size` tiêu đề mỗi request MediaWiki, tối đa `concurrency` lô song song.
+    Trả {keyword: {"keyword", "definition", "images"}} theo thứ tự vào; không thấy -> definition None.
+    Không có news/ảnh Openverse: cần đủ thì click từng keyword (fetch_keyword_info).
+    """
+    ordered: List[str] = []
+    seen = set()
+    for k in keywords:
+        kw = _norm_kw(k)
+        key = lookup_key(kw)
+        if key and key not in seen:
+            seen.add(key)
+            ordered.append(kw)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    remaining = []
+    for kw in ordered:
+        local = _local_definition(kw, lang)
+        if local is not None:
+            results[kw] = _batch_entry(kw, local)
+        elif _TITLE_FORBIDDEN.search(kw):
+            # Không thể là tiêu đề Wikipedia: chỉ còn khớp prefix offline
+            results[kw] = _batch_entry(kw, _local_definition(kw, lang, prefix=True))
+        else:
+            remaining.append(kw)
+
+    batches = [remaining[i:i + batch_size] for i in range(0, len(remaining), max(1, batch_size))]
+    sem = asyncio.Semaphore(max(1, concurrency))
+    async with _session_scope(session) as session:
+        async def run(batch):
+            async with sem:
+                return batch, await _fetch_title_batch(session, batch, lang)
+        for batch, found in await asyncio.gather(*(run(b) for b in batches)):
+            for kw in batch:
+                page = found.get(kw)
+                if page is None:
+                    page = _local_definition(kw, lang, prefix=True)
+                results[kw] = _batch_entry(kw, dict(page) if page else None)
+    return {kw: results[kw] for kw in ordered}
+
+def render_digest_html(entries: Dict[str, Dict[str, Any]]) -> str:
+    """Tổng kết cuối buổi: mỗi keyword 1 dòng với ảnh nhỏ, câu định nghĩa đầu và link."""
+    rows = []
+    for kw, entry in entries.items():
+        defn = entry.get("definition") or {}
+        extract = (defn.get("extract") or "").strip()
+        first = re.split(r"(?<=[.!?])\s", extract, maxsplit=1)[0] if extract else ""
+        img = ""
+        if entry.get("images"):
+            img = (f'<img src="{html.escape(thumbnail_src(entry["images"][0]["thumbnail"]))}" alt="{html.escape(kw)}" '
+                   f'style="width:48px;height:48px;object-fit:cover;border-radius:6px;margin-right:8px;flex:none;"/>')
+        title = html.escape(defn.get("title") or kw)
+        if defn.get("url"):
+            title = f'<a href="{html.escape(defn["url"])}" target="_blank" rel="noopener">{title}</a>'
+        body = html.escape(first) if first else "<i>No definition found.</i>"
+        rows.append(f'<li style="display:flex;align-items:flex-start;margin:6px 0;">{img}'
+                    f'<div><b>{title}</b><br><span style="color:#B9BBBE;">{body}</span></div></li>')
+    return f"""
+    <div class="kw-info">
+      <h3>Meeting digest: {len(entries)} keywords</h3>
+      <ul style="list-style:none;padding:0;">{''.join(rows)}</ul>
+      <hr>
+      <small>Generated at {html.escape(_now_iso())}</small>
     </div>
     """
-    return html_out
 
 async def aget_info_for_keyword(keyword: str, lang: str = DEFAULT_LANG) -> str:
-    data = await fetch_keyword_info(keyword, lang=lang)
+    data = await fetch_keyword_info_cached(keyword, lang=lang)
     return render_keyword_html(data)
 
 class _AsyncLoopRunner:
@@ -379,13 +1437,50 @@ class _AsyncLoopRunner:
         self.loop = asyncio.new_event_loop()
         self.thread = Thread(target=self.loop.run_forever, daemon=True)
         self.thread.start()
+        self._session: Optional[aiohttp.ClientSession] = None
         atexit.register(self.close)
 
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        1 ClientSession sống suốt vòng đời app: giữ kết nối keep-alive, giới hạn theo host
+        và cache DNS, thay vì handshake TCP+TLS lại tới từng host ở mỗi lần click.
+        Chỉ gọi từ chính self.loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": UA})
+        return self._session
+
+    async def _prewarm(self, origins: List[str]):
+        session = await self.get_session()
+
+        async def touch(origin):
+            try:
+                async with session.head(origin + "/", timeout=aiohttp.ClientTimeout(total=5), allow_redirects=False):
+                    pass
+            except Exception:
+                pass
+        await asyncio.gather(*(touch(o) for o in origins))
+
+    def prewarm(self, origins: Optional[List[str]] = None):
+        """Mở sẵn DNS + TLS tới các host đã biết ở nền, không chặn caller."""
+        return asyncio.run_coroutine_threadsafe(self._prewarm(origins or known_hosts()), self.loop)
+
     def run(self, coro):
         fut = asyncio.run_coroutine_threadsafe(coro, self.loop)
         return fut.result()  # block sync thread đến khi xong
 
     def close(self):
+        try:
+            if self._session is not None and not self._session.closed and self.loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._session.close(), self.loop).result(timeout=2.0)
+        except Exception:
+            pass
         try:
             if self.loop.is_running():
                 self.loop.call_soon_threadsafe(self.loop.stop)
@@ -405,4 +1500,32 @@ def get_info_for_keyword(keyword: str, lang: str = DEFAULT_LANG) -> str:
     - Thread nền giữ loop chạy, dùng run_coroutine_threadsafe.
     - Trong môi trường async (FastAPI), hãy gọi aget_info_for_keyword(...) và await.
     """
-    return _runner.run(aget_info_for_keyword(keyword, lang=lang))
\ No newline at end of file
+    return _runner.run(aget_info_for_keyword(keyword, lang=lang))
+
+async def astream_info_for_keyword(keyword: str, on_section, lang: str = DEFAULT_LANG) -> str:
+    """
+    Gọi on_section(element_id, html) ngay khi từng section về (trên loop nền) để UI điền vào
+    khung render_keyword_skeleton. Khi xong, các section được đẩy lại từ payload đầy đủ;
+    không có kết quả -> on_section("page", trang "không tìm thấy"). Trả về HTML đầy đủ.
+    """
+    data = None
+    stream = aiter_keyword_info(keyword, lang=lang)
+    try:
+        async for section, payload in stream:
+            if section == "done":
+                data = payload
+                break
+            on_section(SECTION_IDS[section], render_section_html(section, payload))
+    finally:
+        await stream.aclose()
+
+    if not (data.get("definition") or data.get("images") or data.get("news")):
+        on_section("page", render_not_found_html(data.get("keyword") or keyword))
+    else:
+        for section, element_id in SECTION_IDS.items():
+            on_section(element_id, render_section_html(section, data))
+    return render_keyword_html(data)
+
+async def aget_keyword_digest(keywords: List[str], lang: str = DEFAULT_LANG) -> str:
+    """HTML tổng kết các keyword của buổi, qua fetch_many_keywords."""
+    return render_digest_html(await fetch_many_keywords(keywords, lang=lang))
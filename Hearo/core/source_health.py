@@ -0,0 +1,108 @@
+from __future__ import annotations
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+class HostHealth:
+    """
+    Circuit breaker + thống kê độ trễ cho 1 host upstream.
+      - closed: gọi bình thường; lỗi liên tiếp >= failure_threshold -> open
+      - open: bỏ qua host trong `cooldown` giây
+      - half_open: hết cooldown, cho đúng 1 request thăm dò; thành công -> closed, lỗi -> open lại
+    """
+    def __init__(self, host: str, failure_threshold: int = 3, cooldown: float = 60.0, window: int = 200):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.skipped = 0
+        self.hedges = 0
+        self.latencies: deque = deque(maxlen=window)
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                self.skipped += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                self.skipped += 1
+                return False
+            self._probing = True
+        return True
+
+    def record(self, ok: bool, latency: float):
+        self.requests += 1
+        self._probing = False
+        if ok:
+            self.latencies.append(latency)
+            if self.state != "closed":
+                print(f"[Search] {self.host} hoạt động lại, đóng breaker")
+            self.state = "closed"
+            self.failures = 0
+            return
+        self.errors += 1
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            print(f"[Search] {self.host} lỗi {self.failures} lần liên tiếp, bỏ qua trong {self.cooldown:.0f}s")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Request bị huỷ giữa chừng: không tính thành công hay lỗi, chỉ trả lượt thăm dò."""
+        self._probing = False
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return float(np.percentile(list(self.latencies), q))
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "requests": self.requests,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "hedges": self.hedges,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+class HealthRegistry:
+    """HostHealth theo host, tạo khi cần; snapshot() an toàn khi gọi từ thread khác."""
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._hosts: Dict[str, HostHealth] = {}
+        self._lock = Lock()
+
+    def configure(self, failure_threshold: int, cooldown: float):
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.cooldown = cooldown
+            for h in self._hosts.values():
+                h.failure_threshold = failure_threshold
+                h.cooldown = cooldown
+
+    def get(self, host: str) -> HostHealth:
+        health = self._hosts.get(host)
+        if health is None:
+            with self._lock:
+                health = self._hosts.setdefault(host, HostHealth(host, self.failure_threshold, self.cooldown))
+        return health
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: h.snapshot() for host, h in sorted(hosts.items())}
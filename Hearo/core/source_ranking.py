@@ -0,0 +1,111 @@
+from __future__ import annotations
+import json, os, random
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_STATS_PATH = os.path.join(os.path.expanduser("~"), ".hearo", "source_stats.json")
+# Nguồn có ít mẫu hơn mức này thì chưa xếp hạng được: lookup gọi tất cả song song như trước
+MIN_SAMPLES = 20
+SAVE_EVERY = 20
+# Độ trễ sàn khi tính điểm, để nguồn "nhanh" nhưng hiếm khi có kết quả không được xếp đầu
+LATENCY_FLOOR = 0.25
+# Tăng khi đổi cách tính hit: thống kê cũ bị bỏ thay vì xếp hạng theo tiêu chí cũ
+STATS_VERSION = 2
+
+class SourceRanking:
+    """
+    Tỉ lệ có kết quả (định nghĩa có extract) và độ trễ EWMA của từng nguồn định nghĩa theo ngôn
+    ngữ, lưu ra JSON giữa các lần chạy. ranked() trả thứ tự nên thử (điểm = tỉ lệ hit / độ trễ), hoặc None khi
+    cần gọi tất cả song song: chưa đủ mẫu, hoặc ngẫu nhiên với xác suất `explore` để thống kê
+    của các nguồn dự phòng không bị cũ.
+    Chỉ record() trên loop nền; save()/snapshot() an toàn từ thread khác.
+    """
+    def __init__(self, path: str = DEFAULT_STATS_PATH, alpha: float = 0.2, explore: float = 0.05,
+                 enabled: bool = True):
+        self.path = path
+        self.alpha = alpha
+        self.explore = explore
+        self.enabled = enabled
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = Lock()
+        self._unsaved = 0
+        self._load()
+
+    @staticmethod
+    def _key(source: str, lang: str) -> str:
+        return f"{lang}:{source}"
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("_version") != STATS_VERSION:
+                print(f"[Search] Bỏ thống kê nguồn kiểu cũ ({self.path}), thu thập lại")
+                return
+            self._stats = {k: v for k, v in data.items()
+                           if isinstance(v, dict) and {"attempts", "hits", "latency"} <= v.keys()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[Search] Bỏ qua thống kê nguồn hỏng ({self.path}): {e}")
+
+    def record(self, source: str, lang: str, hit: bool, latency: float):
+        key = self._key(source, lang)
+        with self._lock:
+            st = self._stats.setdefault(key, {"attempts": 0, "hits": 0, "latency": latency})
+            st["attempts"] += 1
+            st["hits"] += 1 if hit else 0
+            st["latency"] = (1 - self.alpha) * st["latency"] + self.alpha * latency
+            self._unsaved += 1
+            due = self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+
+    def _score(self, st: Dict[str, float]) -> float:
+        hit_rate = (st["hits"] + 1) / (st["attempts"] + 2)
+        return hit_rate / max(st["latency"], LATENCY_FLOOR)
+
+    def ranked(self, sources: Sequence[str], lang: str) -> Optional[List[str]]:
+        if not self.enabled or random.random() < self.explore:
+            return None
+        with self._lock:
+            stats = [self._stats.get(self._key(s, lang)) for s in sources]
+        if any(st is None or st["attempts"] < MIN_SAMPLES for st in stats):
+            return None
+        # sort ổn định: điểm bằng nhau thì giữ thứ tự ưu tiên mặc định
+        order = sorted(range(len(sources)), key=lambda i: -self._score(stats[i]))
+        return [sources[i] for i in order]
+
+    def fallback_delay(self, source: str, lang: str, cap: float) -> float:
+        """Chờ nguồn đầu bao lâu trước khi gọi nguồn tiếp: ~1.5 lần độ trễ quen thuộc, tối đa cap."""
+        with self._lock:
+            st = self._stats.get(self._key(source, lang))
+        if st is None:
+            return cap
+        return min(cap, max(0.2, st["latency"] * 1.5))
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({"_version": STATS_VERSION, **self._stats}, indent=1, sort_keys=True)
+            self._unsaved = 0
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Search] Không lưu được thống kê nguồn ({self.path}): {e}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stats = {k: dict(v) for k, v in self._stats.items()}
+        return {
+            key: {
+                "attempts": st["attempts"],
+                "hit_rate": round(st["hits"] / st["attempts"], 3) if st["attempts"] else None,
+                "latency_ms": round(st["latency"] * 1000, 1),
+                "score": round(self._score(st), 3),
+            }
+            for key, st in sorted(stats.items())
+        }
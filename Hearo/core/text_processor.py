@@ -1,6 +1,7 @@
-import re
+import os, re, time
 from difflib import SequenceMatcher
 from . import ai_services
+from .doc_store import DocStore
 from ..config.app_config import TextProcessorConfig
 
 class EnhancedTextProcessor:
@@ -11,9 +12,16 @@ class EnhancedTextProcessor:
         self.similarity_threshold = config.similarity_threshold
         self.overlap_threshold = config.overlap_threshold
         self.max_buffer_size = config.max_buffer_size
+        if config.keyword_glossary:
+            ai_services.load_glossary(config.keyword_glossary)
+        self.transcript_dir = config.transcript_dir
 
-        self.processed_sentences = []
+        # Transcript theo câu + Doc của từng câu (parse 1 lần), dùng chung cho hiển thị, keyword, ngữ cảnh, export
+        self.docs = DocStore(ai_services.nlp)
+        self.started_at = time.time()
         self.raw_buffer = []
+        # segment_id -> (chỉ số câu, phần text segment đóng góp)
+        self.segments = {}
 
     
     def similarity(self, a, b):
@@ -48,13 +56,13 @@ class EnhancedTextProcessor:
         new_text_clean = self.clean_text(new_text)
         if len(new_text_clean) < 10: return False
         
-        check_buffer = self.processed_sentences[-10:]
+        check_buffer = self.docs.texts(-10)
         for existing in check_buffer:
             if self.similarity(new_text_clean, self.clean_text(existing)) >= self.similarity_threshold:
                 return True
         return False
     
-    def process_text(self, new_text):
+    def process_text(self, new_text, segment_id=None):
         if not new_text or not new_text.strip():
             return "", False
         
@@ -70,30 +78,127 @@ class EnhancedTextProcessor:
         if len(self.raw_buffer) > self.max_buffer_size:
             self.raw_buffer.pop(0)
 
-        if self.processed_sentences:
-            last_sentence = self.processed_sentences[-1]
+        last_index = len(self.docs) - 1
+        if last_index >= 0:
+            last_sentence = self.docs.text(last_index)
             merged, did_merge = self.merge_overlapping_texts(last_sentence, cleaned_text)
             if did_merge:
                 print("Merged overlapping text")
-                self.processed_sentences[-1] = merged
+                self.docs.set(last_index, merged)
+                if segment_id is not None:
+                    _, overlap_words = self.find_overlap(last_sentence, cleaned_text)
+                    contributed = " ".join(cleaned_text.split()[overlap_words:])
+                    self.segments[segment_id] = (last_index, contributed)
                 return merged, True
         
-        self.processed_sentences.append(cleaned_text)
+        self.docs.set(last_index + 1, cleaned_text)
+        if segment_id is not None:
+            self.segments[segment_id] = (last_index + 1, cleaned_text)
         return cleaned_text, True
 
+    def replace_segment(self, segment_id, new_text):
+        """
+        Thay phần text của 1 segment bằng bản giải mã lại; trả về chỉ số câu đã đổi hoặc None.
+        Ranh giới từ của bản refine có thể khác bản live, nên phần trùng với đoạn đứng trước
+        được tính lại bằng find_overlap thay vì dùng số từ overlap lúc ghép.
+        """
+        entry = self.segments.pop(segment_id, None)
+        if entry is None:
+            return None
+        index, old_part = entry
+        sentence = self.docs.text(index)
+        pos = sentence.rfind(old_part)
+        if not old_part or pos < 0:
+            return None
+
+        refined = self.clean_text(new_text)
+        _, overlap_words = self.find_overlap(sentence[:pos], refined) if pos else (0, 0)
+        new_part = " ".join(refined.split()[overlap_words:])
+        if not new_part or new_part == old_part:
+            return None
+        self.docs.set(index, sentence[:pos] + new_part + sentence[pos + len(old_part):])
+        return index
+
+    def sentence_count(self) -> int:
+        return len(self.docs)
+
     def get_full_text(self):
-        return " ".join(self.processed_sentences)
+        return self.docs.full_text()
 
     def get_latest_sentences(self, count=2):
-        return self.processed_sentences[-count:]
+        return self.docs.texts(-count)
 
     def extract_keywords_from_text(self, text: str) -> list[str]:
         return ai_services.extract_keywords_from_text(text)
 
-    def get_info_for_keyword(self, keyword: str) -> str:
-        return ai_services.get_info_for_keyword(keyword)
+    def extract_keywords_for_sentence(self, index: int) -> list[str]:
+        """Trích keyword từ Doc đã lưu của câu index; pipeline chỉ chạy khi gazetteer chưa phủ hết câu."""
+        return ai_services.extract_keywords_from_doc(self.docs.get(index), parse=self.docs.parse, ref=index)
+
+    def get_contexts(self, keyword: str, limit: int = 5, window: int = 60):
+        """
+        (tổng số lần keyword được nhắc, tối đa `limit` đoạn gần nhất trước) từ occurrence index:
+        mỗi đoạn là dict sent_id, at (giây từ lúc bắt đầu), before, match, after.
+        Chỉ tra dict và cắt chuỗi, không quét lại transcript.
+        """
+        total, occurrences = ai_services.keyword_occurrences(keyword, limit)
+        contexts = []
+        for sent_id, start, end in reversed(occurrences):
+            if not isinstance(sent_id, int) or sent_id >= len(self.docs):
+                continue
+            sentence = self.docs.text(sent_id)
+            before = sentence[max(0, start - window):start]
+            after = sentence[end:end + window]
+            # Cắt ở ranh giới từ cho gọn
+            if start > window and " " in before:
+                before = "…" + before[before.index(" ") + 1:]
+            if end + window < len(sentence) and " " in after:
+                after = after[:after.rindex(" ")] + "…"
+            contexts.append({
+                "sent_id": sent_id,
+                "at": max(0.0, self.docs.said_at(sent_id) - self.started_at),
+                "before": before,
+                "match": sentence[start:end],
+                "after": after,
+            })
+        return total, contexts
+
+    def save_transcript(self):
+        """Ghi transcript (.txt) và Doc đã parse (.spacy, DocBin) vào transcript_dir; rỗng thì bỏ qua."""
+        if not self.transcript_dir or not len(self.docs):
+            return None
+        base = os.path.join(os.path.expanduser(self.transcript_dir),
+                            time.strftime("hearo-%Y%m%d-%H%M%S", time.localtime(self.started_at)))
+        try:
+            self.docs.save(base + ".spacy")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write("\n\n".join(self.docs.texts()) + "\n")
+        except OSError as e:
+            print(f"Không lưu được transcript ({base}): {e}")
+            return None
+        print(f"Đã lưu transcript: {base}.txt ({self.docs.stats()})")
+        return base
+
+    async def astream_info_for_keyword(self, keyword: str, progress_callback=None) -> str:
+        """Coroutine chạy trên loop của search_engine; progress_callback((keyword, element_id, html)) khi từng section về."""
+        def on_section(element_id, html):
+            if progress_callback:
+                progress_callback((keyword, element_id, html))
+        return await ai_services.astream_info_for_keyword(keyword, on_section)
+
+    async def abuild_keyword_digest(self, keywords: list[str]) -> str:
+        return await ai_services.aget_keyword_digest(keywords)
+
+    def set_visible_keywords(self, keywords: list[str]):
+        ai_services.set_visible_keywords(keywords)
+
+    def cancel_prefetch(self):
+        ai_services.cancel_prefetch()
 
     def clear(self):
-        self.processed_sentences = []
         self.raw_buffer = []
+        self.segments = {}
+        self.docs.clear()
+        ai_services.clear_occurrences()
+        self.started_at = time.time()
         print("Enhanced text processor cleared")
\ No newline at end of file
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import hashlib, os, sqlite3, time
+from threading import Lock
+from typing import Optional, Tuple
+
+# Ảnh lớn hơn mức này không phải thumbnail, không cache
+MAX_THUMBNAIL_BYTES = 4 * 1024 * 1024
+
+class ThumbnailCache:
+    """
+    Thumbnail tải về lưu trên đĩa: mỗi ảnh 1 file đặt tên theo sha1(url), index SQLite giữ
+    content type, kích thước và lần dùng cuối. Tổng dung lượng vượt max_bytes thì xoá ảnh
+    lâu không dùng nhất (LRU).
+    """
+    def __init__(self, folder: str, max_bytes: int = 200 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(os.path.join(folder, "index.sqlite3"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS thumbnails ("
+                " url TEXT PRIMARY KEY, file TEXT NOT NULL, content_type TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS thumbnails_lru ON thumbnails (last_access)")
+
+    @staticmethod
+    def _file_for(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            row = self._conn.execute("SELECT file, content_type FROM thumbnails WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(os.path.join(self.folder, row[0]), "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM thumbnails WHERE url = ?", (url,))
+            return None
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE thumbnails SET last_access = ? WHERE url = ?", (time.time(), url))
+        return data, row[1]
+
+    def put(self, url: str, data: bytes, content_type: str):
+        if not data or len(data) > MAX_THUMBNAIL_BYTES:
+            return
+        name = self._file_for(url)
+        path = os.path.join(self.folder, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (url, file, content_type, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                (url, name, content_type, len(data), time.time()),
+            )
+        self._evict()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbnails").fetchone()[0]
+
+    def _evict(self):
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        with self._lock:
+            rows = self._conn.execute("SELECT url, file, size FROM thumbnails ORDER BY last_access").fetchall()
+        victims = []
+        for url, name, size in rows:
+            if excess <= 0:
+                break
+            victims.append((url, name))
+            excess -= size
+        for _, name in victims:
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM thumbnails WHERE url = ?", [(url,) for url, _ in victims])
+
+    def clear(self):
+        with self._lock, self._conn:
+            names = [r[0] for r in self._conn.execute("SELECT file FROM thumbnails").fetchall()]
+            self._conn.execute("DELETE FROM thumbnails")
+        for name in names:
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
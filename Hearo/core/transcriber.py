@@ -2,9 +2,12 @@
 from faster_whisper import WhisperModel
 import numpy as np
 import torch
+import time
+
+from .language_tracker import LanguageTracker
 
 class Transcriber:
-    def __init__(self, model_size, device, compute_type):
+    def __init__(self, model_size, device, compute_type, language=None, language_recheck_interval=30):
         print("Đang kiểm tra thiết bị...")
         if device.lower() == "cuda" and not torch.cuda.is_available():
             print("CUDA không khả dụng! Chuyển sang CPU...")
@@ -20,6 +23,7 @@ class Transcriber:
         print("Tải mô hình thành công!")
         
         self.audio_buffer = np.array([], dtype=np.float32)
+        self.language_tracker = LanguageTracker(language, recheck_interval=language_recheck_interval)
 
     def transcribe(self, new_audio_chunk, samplerate, required_length_seconds):
         if new_audio_chunk.ndim > 1:
@@ -44,16 +48,24 @@ class Transcriber:
         audio_to_transcribe = self.audio_buffer.copy()
         self.audio_buffer = np.array([], dtype=np.float32)
 
+        language = self.language_tracker.next_language()
+        started = time.perf_counter()
         segments, info = self.model.transcribe(
             audio_to_transcribe,
             beam_size=5,
-            language=None,
+            language=language,
             vad_filter=True,
             vad_parameters=dict(min_silence_duration_ms=500),
         )
+        segments = list(segments)
+        rtf = (time.perf_counter() - started) / buffer_length_seconds
 
-        if info.language:
+        if language is None and info.language:
             print(f"Ngôn ngữ được phát hiện: {info.language} (tự tin: {info.language_probability:.2f})")
+            self.language_tracker.observe_detection(info.language, info.language_probability)
+        if segments:
+            self.language_tracker.observe_decode(float(np.mean([s.avg_logprob for s in segments])))
+        print(f"RTF: {rtf:.3f} (ngôn ngữ: {language or 'auto'})")
 
         transcribed_text = "".join(segment.text for segment in segments)
         
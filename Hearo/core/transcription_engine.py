@@ -3,13 +3,39 @@ import numpy as np
 import threading
 import time
 import queue
-from faster_whisper import WhisperModel
-import torch
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from .language_tracker import LanguageTracker
+from .mel_frontend import StreamingMelFrontend
+from .quality_controller import QualityController, build_ladder
+from .refiner import BackgroundRefiner
+from .whisper_backend import load_backend
+
+TASKS = ("transcribe", "translate", "both")
+
+@dataclass
+class TranscriptEvent:
+    """1 kết quả đẩy vào text_queue; các event cùng window_id là của cùng 1 cửa sổ âm thanh."""
+    window_id: int
+    task: str
+    text: str
+    language: Optional[str] = None
+    timestamp: str = ""
 
 class TranscriptionEngine:
     def __init__(self, model_size="base", device="cuda", compute_type="float16", 
-                 samplerate=16000, chunk_duration=3, text_queue=None):
+                 samplerate=16000, chunk_duration=3, text_queue=None,
+                 language=None, language_recheck_interval=30, task="transcribe",
+                 refine_model_size=None, refine_compute_type="int8", beam_size=5, cpu_threads=0,
+                 adaptive_quality=True):
+        if task not in TASKS:
+            raise ValueError(f"Unsupported task: {task} (expected one of {TASKS})")
         self.samplerate = samplerate
+        self.task = task
+        self.beam_size = beam_size
+        self.hop_ratio = 0.5
         self.chunk_duration = chunk_duration  
         self.audio_queue = queue.Queue()
         self.text_queue = text_queue or queue.Queue()
@@ -17,11 +43,23 @@ class TranscriptionEngine:
         
         self.record_thread = None
         self.process_thread = None
+        self.language_tracker = LanguageTracker(language, recheck_interval=language_recheck_interval)
         
         print("Khởi tạo Transcription Engine...")
         
         self.setup_audio()
-        self.setup_model(model_size, device, compute_type)
+        self.setup_model(model_size, device, compute_type, cpu_threads)
+        
+        self.quality = QualityController(build_ladder(model_size, beam_size, self.hop_ratio)) if adaptive_quality else None
+        self._loader = ThreadPoolExecutor(max_workers=1)
+        self._pending_backend = None
+        
+        self.refiner = None
+        if refine_model_size:
+            self.refiner = BackgroundRefiner(
+                refine_model_size, self.backend.device, refine_compute_type,
+                self.text_queue, event_factory=TranscriptEvent
+            )
     
     def setup_audio(self):
         try:
@@ -49,20 +87,78 @@ class TranscriptionEngine:
             print(f"Audio setup error: {e}")
             raise e
     
-    def setup_model(self, model_size, device, compute_type):
-        if device.lower() == "cuda" and not torch.cuda.is_available():
-            print("CUDA không khả dụng. Chuyển sang CPU...")
-            device = "cpu"
-            compute_type = "int8"
-        
-        print(f"Loading WhisperModel ({model_size}) on {device.upper()}...")
-        
+    def setup_model(self, model_size, device, compute_type, cpu_threads=0):
+        self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
         try:
-            self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
-            print("Model ready.")
+            self.backend = load_backend(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+            self.frontend = StreamingMelFrontend(
+                self.backend.feature_extractor,
+                capacity_seconds=max(60.0, 3 * self.chunk_duration)
+            )
         except Exception as e:
             print(f"Model loading error: {e}")
             raise e
+
+    def _apply_quality_level(self, level):
+        self.beam_size = level.beam_size
+        self.hop_ratio = level.hop_ratio
+        if level.model_size != self.backend.model_size and self._pending_backend is None:
+            # Tải model ở thread riêng để tầng live không đứng chờ
+            self._pending_backend = self._loader.submit(
+                load_backend, level.model_size, self.device, self.compute_type, self.cpu_threads
+            )
+
+    def _swap_backend(self, audio_buffer, window_start):
+        """Đổi sang model vừa tải xong; trả về (audio_buffer, window_start) đã căn lại nếu phải dựng lại frontend."""
+        future, self._pending_backend = self._pending_backend, None
+        try:
+            backend = future.result()
+        except Exception as e:
+            print(f"Không tải được model mới: {e}")
+            return audio_buffer, window_start
+
+        print(f"Đổi model live: {self.backend.model_size} -> {backend.model_size}")
+        old_mels = self.frontend.n_mels
+        self.backend = backend
+        if backend.feature_extractor.mel_filters.shape[0] != old_mels:
+            # audio_buffer bắt đầu đúng tại window_start nên dựng lại ring từ đó
+            self.frontend = StreamingMelFrontend(
+                backend.feature_extractor,
+                capacity_seconds=max(60.0, 3 * self.chunk_duration)
+            )
+            self.frontend.push(audio_buffer)
+            window_start = 0
+
+        if self.quality and self.quality.level.model_size != backend.model_size:
+            self._apply_quality_level(self.quality.level)
+        return audio_buffer, window_start
+
+    def transcribe_window(self, features):
+        """
+        Encode 1 cửa sổ đặc trưng đúng 1 lần, dò ngôn ngữ nếu tracker yêu cầu rồi giải mã.
+        Trả về {task: DecodeResult}; task="both" chạy 2 lượt decoder trên cùng encoder output.
+        """
+        language = self.language_tracker.next_language()
+        encoder_output = self.backend.encode(features)
+        if language is None:
+            language, probability = self.backend.detect_language(encoder_output)
+            self.language_tracker.observe_detection(language, probability)
+
+        tasks = ("transcribe", "translate") if self.task == "both" else (self.task,)
+        results = {}
+        for task in tasks:
+            if task == "translate" and language == "en" and "transcribe" in results:
+                # Nguồn đã là tiếng Anh: bản dịch chính là bản phiên âm
+                results[task] = results["transcribe"]
+                continue
+            results[task] = self.backend.decode(encoder_output, language=language, task=task, beam_size=self.beam_size)
+
+        primary = results[tasks[0]]
+        if primary.text and not primary.is_silence:
+            self.language_tracker.observe_decode(primary.avg_logprob)
+        return results, language
     
     def record_loop(self):
         try:
@@ -82,7 +178,11 @@ class TranscriptionEngine:
     
     def process_loop(self):
         audio_buffer = np.array([], dtype=np.float32)
-        chunk_size = self.samplerate * self.chunk_duration
+        hop_length = self.frontend.hop_length
+        window_frames = self.frontend.frames_for(self.chunk_duration)
+        chunk_size = window_frames * hop_length
+        window_start = 0
+        window_id = 0
         silence_counter = 0
         
         while self.is_running:
@@ -90,6 +190,7 @@ class TranscriptionEngine:
                 while not self.audio_queue.empty():
                     chunk = self.audio_queue.get_nowait()
                     audio_buffer = np.concatenate([audio_buffer, chunk])
+                    self.frontend.push(chunk)
                 
                 if len(audio_buffer) >= int(self.samplerate * 0.1):
                     recent_chunk = audio_buffer[-int(self.samplerate * 0.1):]
@@ -104,9 +205,22 @@ class TranscriptionEngine:
                             print(f"Âm thanh phát hiện! (energy: {energy:.4f})")
                         silence_counter = 0
                 
-                if len(audio_buffer) >= chunk_size:
-                    audio_chunk = audio_buffer[:int(chunk_size)].copy()
-                    audio_buffer = audio_buffer[int(chunk_size//2):] 
+                if self._pending_backend is not None and self._pending_backend.done():
+                    audio_buffer, window_start = self._swap_backend(audio_buffer, window_start)
+                hop_frames = max(1, int(window_frames * self.hop_ratio))
+                
+                oldest_frame = self.frontend.total_frames - self.frontend.capacity
+                if window_start < oldest_frame:
+                    skipped = -(-(oldest_frame - window_start) // hop_frames) * hop_frames
+                    print(f"Xử lý chậm hơn thời gian thực, bỏ qua {skipped * hop_length / self.samplerate:.1f}s âm thanh")
+                    audio_buffer = audio_buffer[skipped * hop_length:]
+                    window_start += skipped
+                
+                if len(audio_buffer) >= chunk_size and self.frontend.total_frames >= window_start + window_frames:
+                    audio_chunk = audio_buffer[:chunk_size]
+                    features = self.frontend.window(window_start, window_frames)
+                    audio_buffer = audio_buffer[hop_frames * hop_length:]
+                    window_start += hop_frames
                     
                     avg_energy = np.mean(np.abs(audio_chunk))
                     
@@ -114,27 +228,46 @@ class TranscriptionEngine:
                         print(f"Transcribing... (energy: {avg_energy:.4f})")
                         
                         try:
-                            segments, info = self.model.transcribe(
-                                audio_chunk,
-                                beam_size=5,
-                                vad_filter=True,
-                                task="transcribe"
-                            )
+                            if self.refiner:
+                                self.refiner.live_busy.set()
+                            started = time.perf_counter()
+                            results, lang = self.transcribe_window(features)
+                            latency = time.perf_counter() - started
+                            rtf = latency / (len(audio_chunk) / self.samplerate)
+                            timestamp = time.strftime('%H:%M:%S')
+                            window_id += 1
                             
-                            text = "".join(segment.text for segment in segments).strip()
-                            
-                            if text:
-                                timestamp = time.strftime('%H:%M:%S')
-                                lang = getattr(info, 'language', 'unknown')
-                                print(f" {timestamp} | {lang} | {text}")
-                                
+                            emitted = False
+                            for task, result in results.items():
+                                text = "" if result.is_silence else result.text
+                                if not text:
+                                    continue
+                                print(f" {timestamp} | {lang} | {task} | RTF {rtf:.3f} | {text}")
+                                emitted = True
                                 if self.text_queue:
-                                    self.text_queue.put(text)
-                            else:
+                                    self.text_queue.put(TranscriptEvent(window_id, task, text, lang, timestamp))
+                            
+                            if not emitted:
                                 print("Không phát hiện lời nói rõ ràng")
+                            
+                            if self.quality:
+                                pending = len(audio_buffer) + self.audio_queue.qsize() * int(self.samplerate * 0.1)
+                                lag = max(0.0, pending / self.samplerate - self.chunk_duration)
+                                level = self.quality.observe(latency, hop_frames * hop_length / self.samplerate, lag)
+                                if level:
+                                    self._apply_quality_level(level)
+                            
+                            if self.refiner:
+                                self.refiner.report_live_rtf(rtf)
+                                primary_task = next(iter(results))
+                                if emitted and not results[primary_task].is_silence:
+                                    self.refiner.submit(window_id, audio_chunk.copy(), lang, primary_task)
                                 
                         except Exception as e:
                             print(f"Transcription error: {e}")
+                        finally:
+                            if self.refiner:
+                                self.refiner.live_busy.clear()
                     else:
                         print(f"Bỏ qua chunk yếu (energy: {avg_energy:.4f})")
                 
@@ -151,12 +284,19 @@ class TranscriptionEngine:
         
         print("Bắt đầu transcription engine...")
         self.is_running = True
+        self.language_tracker.reset()
+        self.frontend.reset()
+        if self.quality:
+            self.quality.reset()
+            self._apply_quality_level(self.quality.level)
         
         self.record_thread = threading.Thread(target=self.record_loop, daemon=True)
         self.process_thread = threading.Thread(target=self.process_loop, daemon=True)
         
         self.record_thread.start()
         self.process_thread.start()
+        if self.refiner:
+            self.refiner.start()
         
         print("Engine đã bắt đầu!")
     
@@ -174,6 +314,9 @@ class TranscriptionEngine:
         if self.process_thread and self.process_thread.is_alive():
             self.process_thread.join(timeout=2.0)
         
+        if self.refiner:
+            self.refiner.stop()
+        
         while not self.audio_queue.empty():
             try:
                 self.audio_queue.get_nowait()
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import numpy as np
+import torch
+from faster_whisper import WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+
+# Thứ tự từ nhỏ/nhanh tới lớn/chính xác, dùng khi cần hạ/nâng model
+MODEL_LADDER = ["tiny", "base", "small", "medium", "large-v3"]
+
+_BACKEND_CACHE = {}
+_backend_lock = Lock()
+
+@dataclass
+class DecodeResult:
+    text: str
+    avg_logprob: float
+    no_speech_prob: float
+
+    @property
+    def is_silence(self) -> bool:
+        # Cùng ngưỡng mặc định mà faster-whisper dùng để bỏ đoạn không có lời
+        return self.no_speech_prob > 0.6 and self.avg_logprob < -1.0
+
+class WhisperBackend:
+    """
+    Bọc WhisperModel ở mức đặc trưng: nhận log-mel đã tính sẵn thay vì waveform,
+    tách riêng encode / dò ngôn ngữ / giải mã để encoder output dùng lại được.
+    """
+    def __init__(self, model_size, device="cuda", compute_type="float16", cpu_threads=0):
+        if device.lower() == "cuda" and not torch.cuda.is_available():
+            print("CUDA không khả dụng. Chuyển sang CPU...")
+            device = "cpu"
+            compute_type = "int8"
+
+        print(f"Loading WhisperModel ({model_size}, {compute_type}) on {device.upper()}...")
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+        self.feature_extractor = self.model.feature_extractor
+        self.multilingual = self.model.model.is_multilingual
+        self._tokenizers: Dict[Tuple[str, Optional[str]], Tokenizer] = {}
+        print("Model ready.")
+
+    def encode(self, features: np.ndarray):
+        return self.model.encode(features)
+
+    def detect_language(self, encoder_output) -> Tuple[str, float]:
+        if not self.multilingual:
+            return "en", 1.0
+        token, prob = self.model.model.detect_language(encoder_output)[0][0]
+        return token[2:-2], prob
+
+    def _tokenizer(self, task: str, language: Optional[str]) -> Tokenizer:
+        key = (task, language)
+        if key not in self._tokenizers:
+            self._tokenizers[key] = Tokenizer(
+                self.model.hf_tokenizer, self.multilingual, task=task, language=language
+            )
+        return self._tokenizers[key]
+
+    def decode(self, encoder_output, *, language: Optional[str], task: str = "transcribe",
+               beam_size: int = 5) -> DecodeResult:
+        tokenizer = self._tokenizer(task, language)
+        prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+        result = self.model.model.generate(
+            encoder_output,
+            [prompt],
+            beam_size=beam_size,
+            max_length=self.model.max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )[0]
+
+        tokens = result.sequences_ids[0]
+        avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+        return DecodeResult(
+            text=tokenizer.decode(tokens).strip(),
+            avg_logprob=avg_logprob,
+            no_speech_prob=result.no_speech_prob,
+        )
+
+def load_backend(model_size, device="cuda", compute_type="float16", cpu_threads=0) -> WhisperBackend:
+    """Registry: mỗi cấu hình chỉ tải model 1 lần, các lần sau dùng lại."""
+    key = (model_size, device.lower(), compute_type, cpu_threads)
+    with _backend_lock:
+        if key not in _BACKEND_CACHE:
+            _BACKEND_CACHE[key] = WhisperBackend(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+        return _BACKEND_CACHE[key]
+
+def smaller_models(model_size: str):
+    """Các model nhỏ hơn model_size trong ladder, từ lớn tới nhỏ."""
+    if model_size not in MODEL_LADDER:
+        return []
+    return list(reversed(MODEL_LADDER[:MODEL_LADDER.index(model_size)]))
@@ -3,18 +3,20 @@ import ctypes
 import os
 import queue
 from PySide6.QtWidgets import QApplication, QMessageBox
-from PySide6.QtCore import Qt, QTimer, QLocale, QThreadPool
+from PySide6.QtCore import Qt, QTimer, QLocale
 from PySide6.QtGui import QIcon
-from PySide6.QtCore import QThreadPool
 
 from .core.transcription_engine import TranscriptionEngine
 from .ui.main_window import ResizableOverlayWindow
+from .ui.thumbnail_scheme import register_thumbnail_scheme
 from .core.text_processor import EnhancedTextProcessor
 from .config.app_config import AppConfig
-from .core.worker import Worker
+from .core.async_bridge import AsyncCall
+from .core import search_engine, prefetcher, info_bundle
 
 def run_app():
     os.environ['QT_LOGGING_RULES'] = 'qt.widgets.style=false'
+    register_thumbnail_scheme()
     app = QApplication(sys.argv)
     app.setApplicationName("LiveNote AI")
     app.setApplicationVersion("2.0")
@@ -31,14 +33,19 @@ def run_app():
 
     class ApplicationController:
         def __init__(self):
-            self.threadpool = QThreadPool()
             self.engine = None
             self.is_running = False
             self.keyword_history = []
-            self.active_workers = []
+            self.current_info_keyword = None
+            self.current_contexts_html = ""
+            # Lookup đang hiển thị trên panel; lần click sau huỷ lần trước
+            self.info_call = None
             
             print("Đang tải cấu hình...")
             self.config = AppConfig('config.ini')
+            search_engine.configure(self.config.search)
+            prefetcher.configure(self.config.search)
+            info_bundle.configure(self.config.search)
             
             self.text_queue = queue.Queue()
             
@@ -75,7 +82,15 @@ def run_app():
                     compute_type=self.config.whisper.compute_type,
                     samplerate=self.config.audio.samplerate,
                     chunk_duration=self.config.audio.record_seconds,
-                    text_queue=self.text_queue
+                    text_queue=self.text_queue,
+                    language=self.config.whisper.language or None,
+                    language_recheck_interval=self.config.whisper.language_recheck_interval,
+                    task=self.config.whisper.task,
+                    refine_model_size=self.config.whisper.refine_model_size or None,
+                    refine_compute_type=self.config.whisper.refine_compute_type,
+                    beam_size=self.config.whisper.beam_size,
+                    cpu_threads=self.config.whisper.cpu_threads,
+                    adaptive_quality=self.config.whisper.adaptive_quality
                 )
                 print("Engine transcription đã sẵn sàng")
             except Exception as e:
@@ -90,59 +105,80 @@ def run_app():
                 print("Bắt đầu transcription...")
                 self.main_window.clear_all()
                 self.text_processor.clear()
+                self.keyword_history = []
                 self.engine.start()
                 self.main_window.enable_stop_button()
                 self.is_running = True
             except Exception as e:
                 print(f"Lỗi bắt đầu transcription: {e}")
 
-        def stop_transcription(self):
+        def stop_transcription(self, show_digest=True):
             if not self.engine: return
             print("Dừng transcription...")
             self.engine.stop()
+            self.text_processor.cancel_prefetch()
+            self.text_processor.save_transcript()
             self.main_window.enable_start_button()
             self.is_running = False
+            if show_digest:
+                self.show_keyword_digest()
+
+        def show_keyword_digest(self):
+            """Tổng kết toàn bộ keyword của buổi trong panel, tra theo lô thay vì từng keyword."""
+            if not self.keyword_history:
+                return
+            self.current_info_keyword = None
+            call = self.start_info_call(self.text_processor.abuild_keyword_digest, list(self.keyword_history))
+            call.result.connect(self.on_keyword_digest_received)
+
+        def on_keyword_digest_received(self, digest_html):
+            # Người dùng đã click keyword khác trong lúc chờ thì giữ nguyên panel
+            if self.current_info_keyword is None:
+                self.main_window.update_ai_info(digest_html)
 
         def handle_keyword_click(self, keyword):
             print(f"Yêu cầu thông tin cho từ khóa: {keyword}")
 
-            loading_html = f"""
-            <div style='display: flex; flex-direction: column; align-items: center; justify-content: center; height: 100%; font-family: Segoe UI, sans-serif; color: #DCDDDE;'>
-                <style>
-                    .spinner {{
-                        border: 4px solid rgba(255, 255, 255, 0.2);
-                        border-left-color: #5865F2;
-                        border-radius: 50%;
-                        width: 40px;
-                        height: 40px;
-                        animation: spin 1s linear infinite;
-                    }}
-                    @keyframes spin {{
-                        to {{ transform: rotate(360deg); }}
-                    }}
-                </style>
-                <div class='spinner'></div>
-                <p style='margin-top: 15px;'>Loading information for '<b>{keyword}</b>'...</p>
-            </div>
-            """
-            self.main_window.update_ai_info(loading_html) 
-
-
-            worker = Worker(self.text_processor.get_info_for_keyword, keyword)
-            def cleanup_worker():
-                if worker in self.active_workers:
-                    self.active_workers.remove(worker)
-                    
-            worker.signals.result.connect(self.on_keyword_info_received)
-            worker.signals.error.connect(self.on_keyword_info_error)
-            worker.signals.finished.connect(cleanup_worker)
+            # Hiện khung các section ngay (kèm các đoạn transcript có keyword, lấy từ index cục bộ),
+            # từng section được điền khi nguồn của nó trả về
+            self.current_info_keyword = keyword
+            total, contexts = self.text_processor.get_contexts(keyword)
+            self.current_contexts_html = search_engine.render_transcript_contexts_html(contexts, total)
+            self.main_window.update_ai_info(search_engine.render_keyword_skeleton(keyword, self.current_contexts_html))
+
+            call = self.start_info_call(self.text_processor.astream_info_for_keyword, keyword)
+            call.progress.connect(self.on_keyword_section_received)
+            call.result.connect(self.on_keyword_info_received)
+
+        def start_info_call(self, fn, *args):
+            """Huỷ lookup cũ của panel (nhả mạng ngay) rồi chạy fn trên loop nền, không chiếm thread nào."""
+            if self.info_call is not None:
+                self.info_call.cancel()
+            call = AsyncCall(fn, *args, parent=self.main_window)
+            call.error.connect(self.on_keyword_info_error)
+            call.finished.connect(call.deleteLater)
+            call.finished.connect(lambda: self.on_info_call_finished(call))
+            self.info_call = call
+            # Signal được nối xong mới start, tránh kết quả về trước khi có slot
+            QTimer.singleShot(0, call.start)
+            return call
 
-            self.active_workers.append(worker)
-            self.threadpool.start(worker)
+        def on_info_call_finished(self, call):
+            if self.info_call is call:
+                self.info_call = None
+
+        def on_keyword_section_received(self, update):
+            keyword, element_id, html = update
+            if keyword != self.current_info_keyword:
+                return  # kết quả của lần click cũ đã bị thay thế
+            if element_id == "page":
+                self.main_window.update_ai_info(self.current_contexts_html + html)
+            else:
+                self.main_window.update_ai_section(element_id, html)
         
         def on_keyword_info_received(self, info_html):
+            # Các section đã được điền tại chỗ qua on_keyword_section_received
             print(f" Dữ liệu nhận được (50 ký tự đầu): {info_html[:50]}")
-            self.main_window.update_ai_info(info_html)
 
         def on_keyword_info_error(self, error_tuple):
             """Slot này sẽ được gọi khi worker gặp lỗi"""
@@ -157,8 +193,15 @@ def run_app():
                 new_keywords_generated = False
                 
                 while not self.text_queue.empty():
-                    raw_text = self.text_queue.get_nowait()
-                    processed_text, is_new = self.text_processor.process_text(raw_text)
+                    event = self.text_queue.get_nowait()
+                    if event.task == "translate" and self.engine.task == "both":
+                        self.main_window.update_translated_text(event.text)
+                        continue
+                    if event.task == "refine":
+                        if self.apply_refined_segment(event):
+                            new_keywords_generated = True
+                        continue
+                    processed_text, is_new = self.text_processor.process_text(event.text, segment_id=event.window_id)
                     if is_new:
                         new_text_received = True
 
@@ -166,9 +209,9 @@ def run_app():
                     latest_sentences = self.text_processor.get_latest_sentences(2)
                     self.main_window.update_transcribed_text("\n\n".join(latest_sentences))
                     
-                    last_sentence_list = self.text_processor.get_latest_sentences(1)
-                    if last_sentence_list:
-                        new_words = self.text_processor.extract_keywords_from_text(last_sentence_list[0])
+                    if self.text_processor.sentence_count():
+                        last_index = self.text_processor.sentence_count() - 1
+                        new_words = self.text_processor.extract_keywords_for_sentence(last_index)
                         if new_words:
                             self.keyword_history.extend(new_words)
                             new_keywords_generated = True
@@ -177,16 +220,36 @@ def run_app():
                     MAX_KEYWORDS_TO_DISPLAY = 15
                     keywords_to_display = self.keyword_history[-MAX_KEYWORDS_TO_DISPLAY:][::-1]
                     self.main_window.set_keywords(keywords_to_display)
+                    self.text_processor.set_visible_keywords(keywords_to_display)
 
             except queue.Empty:
                 pass
             except Exception as e:
                 print(f"Lỗi xử lý queue: {e}")
+
+        def apply_refined_segment(self, event):
+            """Thay text tầng live bằng bản model lớn và trích keyword lại trên câu đã sửa."""
+            index = self.text_processor.replace_segment(event.window_id, event.text)
+            if index is None:
+                return False
+
+            if index >= self.text_processor.sentence_count() - 2:
+                self.main_window.display_lines = []
+                self.main_window.update_transcribed_text("\n\n".join(self.text_processor.get_latest_sentences(2)))
+
+            new_words = self.text_processor.extract_keywords_for_sentence(index)
+            if new_words:
+                print(f"Keyword từ bản refine: {new_words}")
+                self.keyword_history.extend(new_words)
+                return True
+            return False
                 
         def on_closing(self):
             print("Đang đóng ứng dụng...")
             if self.engine and self.is_running:
-                self.stop_transcription()
+                self.stop_transcription(show_digest=False)
+            if self.info_call is not None:
+                self.info_call.cancel()
             if self.config and self.config.ui.remember_position:
                 geo = self.main_window.geometry()
                 self.config.save_window_geometry(geo.x(), geo.y(), geo.width(), geo.height())
@@ -1,3 +1,4 @@
+import json
 import sys
 import qtawesome as qta
 from PySide6.QtCore import Qt, QPoint, QTimer, QSize, QPropertyAnimation, QEasingCurve, QRect, Signal, QUrl, QObject, QRunnable, Slot
@@ -7,7 +8,9 @@ from PySide6.QtWidgets import (QApplication, QWidget, QLabel, QPushButton, QVBox
 from PySide6.QtGui import QMouseEvent, QIcon, QFont, QPainter, QPen, QBrush, QColor, QPixmap
 from PySide6.QtWebEngineWidgets import QWebEngineView
 
+from ..core import search_engine
 from ..styles.main_styles import UIStyles, WebViewStyles
+from .thumbnail_scheme import ThumbnailSchemeHandler
 
 class WorkerSignals(QObject):
     finished = Signal()
@@ -424,6 +427,12 @@ class ResizableOverlayWindow(QWidget):
         self.text_display.setReadOnly(True)
         self.text_section_widget.layout().addWidget(self.text_display)
 
+        self.translation_label = QLabel()
+        self.translation_label.setObjectName("translationText")
+        self.translation_label.setWordWrap(True)
+        self.translation_label.setVisible(False)
+        self.text_section_widget.layout().addWidget(self.translation_label)
+
         self.keywords_section_widget = self._create_section_widget(
             "keywordsSection", "🔖 Keywords"
         )
@@ -455,6 +464,14 @@ class ResizableOverlayWindow(QWidget):
         self.info_webview = ModernWebView()
         self.info_webview.setObjectName("infoWebView")
         self.info_webview.page().setBackgroundColor(Qt.GlobalColor.transparent)
+        # Section về trước khi trang load xong thì giữ lại, điền khi loadFinished
+        self._info_loaded = False
+        self._pending_sections = {}
+        self.info_webview.loadFinished.connect(self._flush_ai_sections)
+        # Ảnh trong panel đi qua cache đĩa (scheme THUMBNAIL_SCHEME), giữ handler sống cùng cửa sổ
+        self.thumbnail_handler = ThumbnailSchemeHandler(self)
+        self.info_webview.page().profile().installUrlSchemeHandler(
+            search_engine.THUMBNAIL_SCHEME.encode("ascii"), self.thumbnail_handler)
         
         self.info_section_widget.layout().addWidget(self.info_webview, 1)
 
@@ -516,6 +533,13 @@ class ResizableOverlayWindow(QWidget):
                 border: 1px solid rgba(30, 136, 229, 0.5);
             }
             
+            #translationText {
+                color: #B9BBBE;
+                font-style: italic;
+                font-size: 13px;
+                padding: 4px 8px;
+            }
+            
             #textDisplay {
                 background: rgba(0, 0, 0, 0.4);
                 border-radius: 8px;
@@ -632,6 +656,10 @@ class ResizableOverlayWindow(QWidget):
         scrollbar = self.text_display.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
+    def update_translated_text(self, text):
+        self.translation_label.setText(f"🌐 {text}")
+        self.translation_label.setVisible(bool(text))
+
     def on_keyword_clicked(self, keyword):
         is_expanded = self.height() > (self.min_height + self.expanded_height) / 2
         if not is_expanded:
@@ -647,27 +675,28 @@ class ResizableOverlayWindow(QWidget):
         <head>
             {WebViewStyles.get_dark_theme_wrapper()}
             <script>
-                document.addEventListener('DOMContentLoaded', function() {{
-                    var links = document.querySelectorAll('a[href]');
-                    links.forEach(function(link) {{
-                        link.style.cursor = 'pointer';
-                        link.addEventListener('click', function(e) {{
-                            e.preventDefault();
-                            // Dòng này sẽ kích hoạt yêu cầu điều hướng
-                            // để code Python ở trên có thể bắt được
-                            window.location.href = link.href;
-                        }});
-                    }});
-                    
-                    var images = document.querySelectorAll('img[src]');
-                    images.forEach(function(img) {{
+                // Uỷ quyền sự kiện ở document để cả nội dung điền sau (update_ai_section) cũng bắt được
+                document.addEventListener('click', function(e) {{
+                    var img = e.target.closest('img[src]');
+                    var link = e.target.closest('a[href]');
+                    if (img && !link) {{
+                        e.preventDefault();
+                        window.location.href = img.src;
+                    }} else if (link) {{
+                        e.preventDefault();
+                        // Dòng này sẽ kích hoạt yêu cầu điều hướng
+                        // để code Python ở trên có thể bắt được
+                        window.location.href = link.href;
+                    }}
+                }});
+                document.addEventListener('mouseover', function(e) {{
+                    var img = e.target.closest('img[src]');
+                    if (img && !img.title) {{
                         img.style.cursor = 'pointer';
                         img.title = 'Click to open image';
-                        img.addEventListener('click', function(e) {{
-                            e.preventDefault();
-                            window.location.href = img.src;
-                        }});
-                    }});
+                    }}
+                    var link = e.target.closest('a[href]');
+                    if (link) link.style.cursor = 'pointer';
                 }});
             </script>
         </head>
@@ -677,13 +706,31 @@ class ResizableOverlayWindow(QWidget):
         </html>
         """
         
+        self._info_loaded = False
+        self._pending_sections = {}
         self.info_webview.setHtml(enhanced_wrapper)
+
+    def update_ai_section(self, element_id, html_content):
+        """Thay nội dung 1 section của trang đang hiển thị mà không load lại cả trang."""
+        if not self._info_loaded:
+            self._pending_sections[element_id] = html_content
+            return
+        script = (f"(function(el) {{ if (el) el.innerHTML = {json.dumps(html_content)}; }})"
+                  f"(document.getElementById({json.dumps(element_id)}));")
+        self.info_webview.page().runJavaScript(script)
+
+    def _flush_ai_sections(self, ok):
+        self._info_loaded = True
+        pending, self._pending_sections = self._pending_sections, {}
+        for element_id, html_content in pending.items():
+            self.update_ai_section(element_id, html_content)
         
 
     def clear_all(self):
         self.display_lines = []
         self.keywords = []
         self.text_display.setPlainText("Press ▶ to start listening...")
+        self.update_translated_text("")
         self.add_keywords([])
         self.update_ai_info("")
 
@@ -0,0 +1,63 @@
+import asyncio
+from PySide6.QtCore import QBuffer, QByteArray, Signal, Slot
+from PySide6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+
+from ..core import search_engine
+
+def register_thumbnail_scheme():
+    """Phải gọi trước khi tạo QApplication."""
+    scheme = QWebEngineUrlScheme(search_engine.THUMBNAIL_SCHEME.encode("ascii"))
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+    scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme | QWebEngineUrlScheme.Flag.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+class ThumbnailSchemeHandler(QWebEngineUrlSchemeHandler):
+    """
+    Trả ảnh cho URL hearo-thumb:<base64 URL gốc>: có trong cache đĩa thì trả ngay,
+    chưa có thì tải trên loop nền của search_engine rồi trả về trên thread UI.
+    """
+    _ready = Signal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = {}
+        self._next_id = 0
+        self._ready.connect(self._reply)
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob):
+        origin = search_engine.thumbnail_origin(job.requestUrl().toString())
+        if not origin:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlInvalid)
+            return
+
+        tc = search_engine.get_thumbnail_cache()
+        hit = tc.get(origin) if tc is not None else None
+        if hit is not None:
+            self._send(job, *hit)
+            return
+
+        # Job bị Qt huỷ (trang đổi nội dung) trước khi tải xong thì bỏ qua kết quả
+        job_id = self._next_id
+        self._next_id += 1
+        self._jobs[job_id] = job
+        job.destroyed.connect(lambda *_, job_id=job_id: self._jobs.pop(job_id, None))
+
+        future = asyncio.run_coroutine_threadsafe(search_engine.fetch_thumbnail(origin), search_engine._runner.loop)
+        future.add_done_callback(
+            lambda f, job_id=job_id: self._ready.emit(job_id, None if f.cancelled() or f.exception() else f.result()))
+
+    @Slot(int, object)
+    def _reply(self, job_id, result):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        if result is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+        else:
+            self._send(job, *result)
+
+    @staticmethod
+    def _send(job, data, content_type):
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        job.reply(content_type.encode("ascii"), buffer)
@@ -0,0 +1,56 @@
+import json
+import sqlite3
+
+import pytest
+
+from Hearo.core.payload_cache import PayloadCache
+from Hearo.core.search_engine import LOOKUP_KEY_VERSION, lookup_key
+
+@pytest.mark.parametrize("a, b", [
+    ("movies", "movie"),
+    ("nodejs", "Node.js"),
+    ("GPUs", "GPU"),
+    ("APIs", "API"),
+    ("U.S.", "US"),
+    ("Neural Networks", "neural network"),
+    ("Open AI", "OpenAI"),
+    ("open-ai", "OpenAI"),
+    ("cities", "city"),
+    ("classes", "class"),
+    ("watches", "watch"),
+    ("Hà Nội", "Ha Noi"),
+])
+def test_variants_share_a_key(a, b):
+    assert lookup_key(a) == lookup_key(b)
+
+@pytest.mark.parametrize("a, b", [
+    ("Apple", "apples"),
+    (".NET", "net"),
+    ("U.S.", "us"),
+    ("GPU", "gpu"),
+    ("Windows", "windows"),
+    ("C++", "C"),
+    ("C#", "C"),
+])
+def test_different_terms_keep_separate_keys(a, b):
+    assert lookup_key(a) != lookup_key(b)
+
+@pytest.mark.parametrize("word", ["series", "species", "news", "physics"])
+def test_invariant_words_are_not_singularized(word):
+    assert lookup_key(word) == word
+
+def test_cache_rows_are_rekeyed_on_version_change(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    old = PayloadCache(path)  # khoá cũ: keyword.lower(), user_version 0
+    old.put({"keyword": "movies", "lang": "en", "definition": {"title": "Movie"}, "images": [], "news": []})
+    old.close()
+
+    cache = PayloadCache(path, key_fn=lookup_key, key_version=LOOKUP_KEY_VERSION)
+    payload, _ = cache.get("movie", "en")
+    assert payload is not None and payload["definition"] == {"title": "Movie"}
+    cache.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == LOOKUP_KEY_VERSION
+    assert {row[0] for row in conn.execute("SELECT keyword FROM keyword_payloads")} == {"movie"}
+    conn.close()
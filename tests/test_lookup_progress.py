@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from Hearo.core import search_engine
+
+@pytest.fixture(autouse=True)
+def no_disk_cache(monkeypatch):
+    monkeypatch.setattr(search_engine, "PAYLOAD_CACHE_PATH", "")
+    monkeypatch.setattr(search_engine, "_payload_cache", None)
+
+async def _stream(keyword):
+    return [section async for section, _ in search_engine.aiter_keyword_info(keyword)]
+
+def test_negative_cache_hit_leaves_no_progress(monkeypatch):
+    monkeypatch.setitem(search_engine._negative, (search_engine.lookup_key("zorblax"), "en"), True)
+    assert asyncio.run(_stream("zorblax")) == ["done"]
+    assert search_engine._lookup_progress == {}
+
+def test_stream_joining_a_published_flight_leaves_no_progress(monkeypatch):
+    async def lookup(kw, lang, max_images, max_news, session, progress=None):
+        # Progress đã finish nhưng flight còn chạy (vd. đang ghi negative cache)
+        progress.publish("definition", None)
+        progress.finish()
+        await asyncio.sleep(0.02)
+        return search_engine._empty_payload(kw, lang)
+
+    monkeypatch.setattr(search_engine, "_fetch_keyword_info", lookup)
+
+    async def main():
+        first = asyncio.ensure_future(search_engine.fetch_keyword_info("quantum widget"))
+        await asyncio.sleep(0.005)
+        sections = await _stream("quantum widget")
+        await first
+        return sections
+
+    assert asyncio.run(main()) == ["done"]
+    assert search_engine._lookup_progress == {}
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from Hearo.core import search_engine
+from Hearo.core.source_ranking import MIN_SAMPLES, SourceRanking
+
+LATENCY = {"wikipedia": 0.01, "wikidata": 0.03, "ddg": 0.05, "wiktionary": 0.04}
+
+@pytest.fixture
+def fake_sources(monkeypatch, tmp_path):
+    calls = []
+
+    def source(name):
+        async def fetch(session, keyword, lang=None):
+            calls.append(name)
+            await asyncio.sleep(LATENCY[name])
+            definition = {"title": keyword, "extract": f"{keyword} from {name}", "source": name}
+            return (definition, keyword) if name == "wikipedia" else definition
+        return fetch
+
+    monkeypatch.setattr(search_engine, "fetch_wikipedia_summary", source("wikipedia"))
+    monkeypatch.setattr(search_engine, "fetch_wikidata_desc", source("wikidata"))
+    monkeypatch.setattr(search_engine, "fetch_ddg_instant_answer", source("ddg"))
+    monkeypatch.setattr(search_engine, "fetch_wiktionary_definition", source("wiktionary"))
+    monkeypatch.setattr(search_engine, "_ranking", SourceRanking(str(tmp_path / "stats.json"), explore=0.0))
+    return calls
+
+def test_parallel_lookups_record_every_source(fake_sources):
+    ranking = search_engine.get_source_ranking()
+
+    async def lookups(n):
+        for i in range(n):
+            definition, _ = await search_engine._definition_tiers(None, f"term {i}", "en", lambda title: None)
+            assert definition["source"] == "wikipedia"
+        # Nguồn chậm chạy nốt ở nền sau khi Wikipedia đã trả
+        await asyncio.sleep(max(LATENCY.values()) * 2)
+
+    assert ranking.ranked(search_engine.DEFINITION_SOURCES[1:], "en") is None
+    asyncio.run(lookups(MIN_SAMPLES))
+    assert ranking.ranked(search_engine.DEFINITION_SOURCES[1:], "en") is not None
+
+    fake_sources.clear()
+    asyncio.run(lookups(1))
+    assert fake_sources == ["wikipedia"]